@@ -1,6 +1,9 @@
 """
 Custom function tools for the gastronomy voice assistant.
 These tools allow the assistant to perform restaurant-specific actions.
+The database tools are coroutines using the async session, the blocking ones (the knowledge base
+refreshes through a sync session, dateparser) run in the thread pool of the tool executor. The
+tools placing orders and bookings are never cancelled mid-write, see `bounded_write_tool`.
 """
 
 import traceback
@@ -9,27 +12,22 @@ from datetime import datetime
 import dateparser
 from agents import function_tool
 
-from app.crud import (
-    create_booking as crud_create_booking,
-)
-from app.crud import (
-    create_order as crud_create_order,
-)
-from app.crud import (
-    get_menu_items_by_name_fuzzy as crud_get_menu_items_by_name_fuzzy,
-)
-from app.crud import (
-    get_order as crud_get_order,
-)
-from app.database import SessionLocal
+from app.crud import create_booking_async, create_order_async, get_order_async
+from app.database import AsyncSessionLocal
 from app.items import ReservationInput
 from app.knowledge_base import get_knowledge_base
 from app.models import BookingCreate, OrderCreate, OrderItemCreate
+from app.telemetry import timed_tool
+from app.tool_executor import bounded_tool, bounded_write_tool
 from app.utils import log_debug, log_error
 
 
 @function_tool
-def place_order(items: list[OrderItemCreate], table_number: int, notes: str | None = None) -> str:
+@timed_tool
+@bounded_write_tool
+async def place_order(
+    items: list[OrderItemCreate], table_number: int, notes: str | None = None
+) -> str:
     """
     Places a food or drink order for a given table.
     Requires a list of order items, each specifying menu_item_id,
@@ -42,18 +40,18 @@ def place_order(items: list[OrderItemCreate], table_number: int, notes: str | No
         items,
         notes,
     )
-    db = SessionLocal()
     try:
         order_payload = OrderCreate(table_number=table_number, items=items, notes=notes)
 
-        created_order = crud_create_order(db=db, order=order_payload)
+        async with AsyncSessionLocal() as db:
+            created_order = await create_order_async(db=db, order=order_payload)
 
         item_count = sum(item.quantity for item in created_order.items)
 
         return (
             f'Order placed successfully for table {table_number}. '
             f'Order ID: {created_order.id}. Total items ordered: {item_count}. '
-            f'Status: {created_order.status.value}.'
+            f'Total price: {created_order.total:.2f}. Status: {created_order.status.value}.'
         )
     except ValueError as ve:
         log_error('Validation error in place_order tool: %s\n%s', ve, traceback.format_exc())
@@ -64,17 +62,17 @@ def place_order(items: list[OrderItemCreate], table_number: int, notes: str | No
             'Sorry, I encountered an error while trying to place your order. '
             'Please try again later.'
         )
-    finally:
-        db.close()
 
 
 @function_tool
-def get_order_status(order_id: int) -> str:
+@timed_tool
+@bounded_tool
+async def get_order_status(order_id: int) -> str:
     """Check the status of an order using its unique order ID."""
     log_debug('Tool: get_order_status called with order_id: %s', order_id)
-    db = SessionLocal()
     try:
-        order = crud_get_order(db=db, order_id=order_id)
+        async with AsyncSessionLocal() as db:
+            order = await get_order_async(db=db, order_id=order_id)
         if not order:
             return f'No order found with ID {order_id}.'
 
@@ -85,9 +83,10 @@ def get_order_status(order_id: int) -> str:
 
         items_desc = ', '.join(items_summary) if items_summary else 'No items in this order.'
 
+        total = f' Total price: {order.total:.2f}.' if order.total is not None else ''
         return (
             f'Order ID: {order.id} for table {order.table_number} is currently '
-            f'{order.status.value}. Items: {items_desc}. Last updated: {order.updated_at}.'
+            f'{order.status.value}. Items: {items_desc}.{total} Last updated: {order.updated_at}.'
         )
     except Exception as e:
         log_error('Error in get_order_status tool: %s\n%s', e, traceback.format_exc())
@@ -95,16 +94,15 @@ def get_order_status(order_id: int) -> str:
             'Sorry, I encountered an error while trying to check the order status. '
             'Please try again later.'
         )
-    finally:
-        db.close()
 
 
 @function_tool
-def make_reservation(reservation_input: ReservationInput) -> str:
+@timed_tool
+@bounded_write_tool
+async def make_reservation(reservation_input: ReservationInput) -> str:
     """Make a table reservation using the restaurant's booking system."""
     log_debug('Tool: make_reservation called with input: %s', reservation_input)
 
-    db = SessionLocal()
     try:
         booking_data = BookingCreate(
             customer_name=reservation_input.customer_name,
@@ -116,7 +114,8 @@ def make_reservation(reservation_input: ReservationInput) -> str:
             special_requests=reservation_input.special_requests,
         )
 
-        created_booking = crud_create_booking(db=db, booking=booking_data)
+        async with AsyncSessionLocal() as db:
+            created_booking = await create_booking_async(db=db, booking=booking_data)
 
         return (
             f'Reservation confirmed for {created_booking.customer_name} '
@@ -131,11 +130,11 @@ def make_reservation(reservation_input: ReservationInput) -> str:
             'Sorry, I encountered an error while trying to make your reservation. '
             'Please try again later.'
         )
-    finally:
-        db.close()
 
 
 @function_tool
+@timed_tool
+@bounded_tool
 def query_restaurant_database(query: str) -> str:
     """
     Queries the Poligon Smaków WAT restaurant's live database for factual information.
@@ -143,6 +142,8 @@ def query_restaurant_database(query: str) -> str:
     restaurant opening hours, address, phone, payment methods, parking, summer garden,
     reservation info, current special offers, and FAQs.
     This tool provides the most up-to-date information directly from the database.
+    Only the entries matching the words of the query are returned, the data is in Polish,
+    so phrase the query in Polish and name the dish, topic or detail you are looking for.
     Example query:
         - "What are the allergens in Pierogi Ruskie?"
         - "What are the opening hours today?"
@@ -154,12 +155,16 @@ def query_restaurant_database(query: str) -> str:
         A string containing the relevant information from the database,
         or a message indicating an issue.
     """
-    log_debug(
-        "Tool: query_restaurant_database attempting to answer query: '%s' by fetching full context",
-        query,
-    )
+    log_debug("Tool: query_restaurant_database called with query: '%s'", query)
     try:
         kb = get_knowledge_base()
+        chunks = kb.search(query)
+        if chunks:
+            context = '\n'.join(chunk.text for chunk in chunks)
+            return f'Relevant information from the restaurant database:\n{context}'
+
+        # Nothing matched the query's words, e.g. it is in another language than the data
+        log_debug('No chunks matched the query, falling back to the full context')
         full_context = kb.get_full_context_as_text()
         if not full_context.strip():
             return "The restaurant's information is currently unavailable in the database."
@@ -174,6 +179,8 @@ def query_restaurant_database(query: str) -> str:
 
 
 @function_tool
+@timed_tool
+@bounded_tool
 def convert_natural_date_to_iso(raw_date: str) -> str | None:
     """
     Convert a natural language date to ISO 8601 format (YYYY-MM-DD).
@@ -198,19 +205,21 @@ def convert_natural_date_to_iso(raw_date: str) -> str | None:
 
 
 @function_tool
+@timed_tool
+@bounded_tool
 def find_menu_item_by_name(item_name: str) -> str:
     """
-    Finds menu items by their name using a fuzzy search (case-insensitive, partial match).
+    Finds menu items by their name using a fuzzy search that ignores letter case and Polish
+    accents and tolerates misspelled or partial names.
     Returns a list of matching items with their ID,
-    name, and price, or a message if no items are found.
+    name, and price, the best match first, or a message if no items are found.
     If multiple items are found, the agent should ask the user for clarification.
     Args:
         item_name: The name of the menu item to search for (e.g., "pierogi", "zupa pomidorowa").
     """
     log_debug("Tool: find_menu_item_by_name called with item_name: '%s'", item_name)
-    db = SessionLocal()
     try:
-        menu_items = crud_get_menu_items_by_name_fuzzy(db=db, name_query=item_name, limit=5)
+        menu_items = get_knowledge_base().find_menu_items(item_name, limit=5)
 
         if not menu_items:
             return (
@@ -222,18 +231,16 @@ def find_menu_item_by_name(item_name: str) -> str:
         if len(menu_items) == 1:
             item = menu_items[0]
             return (
-                f'Found one item: ID: {item.id}, Name: {item.name}, Price: {item.price:.2f} PLN. '
+                f'Found one item: ID: {item.id}, Name: {item.name}, Price: {item.price}. '
                 'You can use this ID to add the item to an order.'
             )
 
         response_parts = [
-            'Found multiple items matching your query. '
+            'Found multiple items matching your query, the best match first. '
             'Please ask the user to specify which one they mean:'
         ]
         for item in menu_items:
-            response_parts.append(
-                f'- ID: {item.id}, Name: {item.name}, Price: {item.price:.2f} PLN'
-            )
+            response_parts.append(f'- ID: {item.id}, Name: {item.name}, Price: {item.price}')
         return '\n'.join(response_parts)
 
     except Exception as e:
@@ -243,5 +250,3 @@ def find_menu_item_by_name(item_name: str) -> str:
             f"'{item_name}'. "
             'Please try again.'
         )
-    finally:
-        db.close()
@@ -0,0 +1,280 @@
+"""
+Audio helpers for the voice websocket.
+
+Binary audio frames carry raw little-endian PCM16 samples prefixed with a fixed 8 byte header:
+
+    version (uint8) | kind (uint8) | stream id (uint16) | sequence number (uint32)
+
+All header fields are little-endian. The stream id identifies one utterance (input) or one
+spoken response (output); the sequence number counts frames within a stream.
+"""
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+from agents.voice import AudioInput
+
+from app.settings import (
+    AUDIO_SAMPLE_RATE,
+    INITIAL_AUDIO_BUFFER_SECONDS,
+    MAX_UTTERANCE_SECONDS,
+    VAD_FRAME_MS,
+    VAD_MIN_SPEECH_MS,
+    VAD_PREFIX_PADDING_MS,
+    VAD_SILENCE_DURATION_MS,
+    VAD_THRESHOLD_DB,
+)
+
+AUDIO_FRAME_VERSION = 1
+INPUT_AUDIO_FRAME = 1
+OUTPUT_AUDIO_FRAME = 2
+
+AUDIO_FRAME_HEADER = struct.Struct('<BBHI')
+
+# Value of the `audio_format` field of a `session.update` message that enables binary frames
+BINARY_AUDIO_FORMAT = 'pcm16.binary'
+
+
+@dataclass(frozen=True)
+class AudioFrameHeader:
+    kind: int
+    stream_id: int
+    seq: int
+
+
+def encode_audio_frame(kind: int, stream_id: int, seq: int, pcm: np.ndarray | bytes) -> bytes:
+    """Prefix PCM16 samples with an audio frame header."""
+    if isinstance(pcm, np.ndarray):
+        pcm = pcm.astype('<i2', copy=False).tobytes()
+    header = AUDIO_FRAME_HEADER.pack(
+        AUDIO_FRAME_VERSION, kind, stream_id & 0xFFFF, seq & 0xFFFFFFFF
+    )
+    return header + pcm
+
+
+def decode_audio_frame(frame: bytes) -> tuple[AudioFrameHeader, np.ndarray]:
+    """Split a binary audio frame into its header and a read-only int16 view of the samples."""
+    if len(frame) < AUDIO_FRAME_HEADER.size:
+        raise ValueError(f'Audio frame too short: {len(frame)} bytes')
+
+    version, kind, stream_id, seq = AUDIO_FRAME_HEADER.unpack_from(frame)
+    if version != AUDIO_FRAME_VERSION:
+        raise ValueError(f'Unsupported audio frame version: {version}')
+
+    payload = memoryview(frame)[AUDIO_FRAME_HEADER.size :]
+    if len(payload) % 2:
+        raise ValueError('Audio frame payload is not a whole number of PCM16 samples')
+
+    samples = np.frombuffer(payload, dtype='<i2')
+    return AudioFrameHeader(kind=kind, stream_id=stream_id, seq=seq), samples
+
+
+class AudioBuffer:
+    """Accumulates the PCM16 samples of one utterance in a preallocated int16 array.
+
+    The array grows geometrically up to `max_seconds` of audio; samples past that limit are
+    dropped. `offset` is the stream position of the first buffered sample, it moves forward
+    when leading samples are discarded with `discard_before`. `to_audio_input` hands the
+    samples to `AudioInput` as a zero-copy view and detaches the array, so the next utterance
+    starts on a fresh allocation and the view stays valid while the pipeline reads it.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+        max_seconds: float = MAX_UTTERANCE_SECONDS,
+        initial_seconds: float = INITIAL_AUDIO_BUFFER_SECONDS,
+    ):
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+        self.max_samples = int(sample_rate * max_seconds)
+        self._initial_samples = min(int(sample_rate * initial_seconds), self.max_samples)
+        self._buffer: np.ndarray | None = None
+        self._length = 0
+        self.offset = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def is_full(self) -> bool:
+        return self._length >= self.max_samples
+
+    @property
+    def duration(self) -> float:
+        return self._length / self.sample_rate
+
+    def _reserve(self, size: int):
+        if self._buffer is None:
+            self._buffer = np.empty(max(self._initial_samples, size), dtype=np.int16)
+        elif size > len(self._buffer):
+            capacity = min(max(size, 2 * len(self._buffer)), self.max_samples)
+            grown = np.empty(capacity, dtype=np.int16)
+            grown[: self._length] = self._buffer[: self._length]
+            self._buffer = grown
+
+    def append(self, samples: np.ndarray) -> int:
+        """Append int16 samples and return how many fit below the utterance limit."""
+        count = min(len(samples), self.max_samples - self._length)
+        if count <= 0:
+            return 0
+        self._reserve(self._length + count)
+        self._buffer[self._length : self._length + count] = samples[:count]  # type: ignore
+        self._length += count
+        return count
+
+    def append_bytes(self, data: bytes | memoryview) -> int:
+        """Append raw little-endian PCM16 bytes."""
+        return self.append(np.frombuffer(data, dtype='<i2'))
+
+    def view(self) -> np.ndarray:
+        if self._buffer is None:
+            return np.empty(0, dtype=np.int16)
+        return self._buffer[: self._length]
+
+    def clear(self):
+        self._length = 0
+        self.offset = 0
+
+    def discard_before(self, position: int):
+        """Drop the samples that precede the stream `position`."""
+        count = min(position - self.offset, self._length)
+        if count <= 0 or self._buffer is None:
+            return
+        remaining = self._length - count
+        self._buffer[:remaining] = self._buffer[count : self._length]
+        self._length = remaining
+        self.offset += count
+
+    def split_audio_input(self, start: int, end: int) -> AudioInput:
+        """Like `to_audio_input`, but the samples after `end` stay buffered.
+
+        Only those samples are copied to a fresh array, the utterance is still handed over as a
+        zero-copy view.
+        """
+        stop = min(max(end - self.offset, 0), self._length)
+        tail = self.view()[stop:].copy()
+        offset = self.offset + stop
+        audio_input = self.to_audio_input(start, end)
+        self.offset = offset
+        self.append(tail)
+        return audio_input
+
+    def to_audio_input(self, start: int | None = None, end: int | None = None) -> AudioInput:
+        """Hand the samples between the stream positions `start` and `end` to an `AudioInput`."""
+        begin = 0 if start is None else max(start - self.offset, 0)
+        stop = self._length if end is None else min(end - self.offset, self._length)
+        audio_input = AudioInput(buffer=self.view()[begin:stop], frame_rate=self.sample_rate)
+        self._buffer = None
+        self.clear()
+        return audio_input
+
+
+SPEECH_STARTED = 'speech_started'
+SPEECH_STOPPED = 'speech_stopped'
+
+# Keys of a `turn_detection` session option forwarded to `VoiceActivityDetector`
+VAD_OPTIONS = ('threshold_db', 'min_speech_ms', 'silence_duration_ms', 'prefix_padding_ms')
+
+
+@dataclass(frozen=True)
+class SpeechEvent:
+    """Start or end of a speech segment, `start` and `end` are its stream positions."""
+
+    type: str
+    start: int
+    end: int | None = None
+
+
+class VoiceActivityDetector:
+    """Energy based voice activity detector for a stream of PCM16 samples.
+
+    Samples are split into `frame_ms` frames whose RMS level (in dBFS) is computed in one
+    vectorized pass per chunk. Speech starts after `min_speech_ms` of frames above
+    `threshold_db` and stops after `silence_duration_ms` of frames below it. Positions are
+    stream positions (sample counts since the last `reset`); a segment is widened by
+    `prefix_padding_ms` on both sides. `speech_start` is the start of the segment in progress,
+    the detector keeps going after a segment ends, so one chunk can end a segment and start the
+    next one.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+        threshold_db: float = VAD_THRESHOLD_DB,
+        frame_ms: int = VAD_FRAME_MS,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+        silence_duration_ms: int = VAD_SILENCE_DURATION_MS,
+        prefix_padding_ms: int = VAD_PREFIX_PADDING_MS,
+    ):
+        self.threshold_db = threshold_db
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.min_speech_frames = max(min_speech_ms // frame_ms, 1)
+        self.silence_frames = max(silence_duration_ms // frame_ms, 1)
+        self.padding_samples = sample_rate * prefix_padding_ms // 1000
+        self.reset()
+
+    def reset(self):
+        self.position = 0
+        self.in_speech = False
+        self.speech_start: int | None = None
+        self._pending = np.empty(0, dtype=np.int16)
+        self._speech_run = 0
+        self._silence_run = 0
+        self._last_speech_frame_end = 0
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_start is not None
+
+    @property
+    def history_samples(self) -> int:
+        """Samples before `position` to keep while no speech is detected.
+
+        A segment starts `prefix_padding_ms` before the run of speech frames that triggered it,
+        and up to `min_speech_ms` of that run can already be behind `position`.
+        """
+        return self.padding_samples + self.min_speech_frames * self.frame_size
+
+    def frame_levels(self, frames: np.ndarray) -> np.ndarray:
+        """RMS level in dBFS of each row of an (n_frames, frame_size) int16 array."""
+        samples = frames.astype(np.float32) / 32768.0
+        power = np.einsum('ij,ij->i', samples, samples) / frames.shape[1]
+        return 10.0 * np.log10(power + 1e-10)
+
+    def process(self, samples: np.ndarray) -> list[SpeechEvent]:
+        """Feed the next samples of the stream and return the speech events they triggered."""
+        data = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        frame_count = len(data) // self.frame_size
+        self._pending = data[frame_count * self.frame_size :].copy()
+        if not frame_count:
+            return []
+
+        frames = data[: frame_count * self.frame_size].reshape(frame_count, self.frame_size)
+        is_speech = self.frame_levels(frames) > self.threshold_db
+
+        events = []
+        for speech in is_speech:
+            frame_end = self.position + self.frame_size
+            if speech:
+                self._speech_run += 1
+                self._silence_run = 0
+                self._last_speech_frame_end = frame_end
+            else:
+                self._speech_run = 0
+                self._silence_run += 1
+            self.position = frame_end
+
+            if not self.in_speech and self._speech_run >= self.min_speech_frames:
+                self.in_speech = True
+                speech_frames = self._speech_run * self.frame_size
+                self.speech_start = max(frame_end - speech_frames - self.padding_samples, 0)
+                events.append(SpeechEvent(SPEECH_STARTED, self.speech_start))
+            elif self.in_speech and self._silence_run >= self.silence_frames:
+                speech_end = min(self._last_speech_frame_end + self.padding_samples, self.position)
+                events.append(SpeechEvent(SPEECH_STOPPED, self.speech_start, speech_end))  # type: ignore
+                # The rest of the chunk is processed, speech can start again in it
+                self.in_speech = False
+                self.speech_start = None
+        return events
@@ -0,0 +1,39 @@
+"""
+Generation counters of the knowledge base sections.
+
+Every CRUD write to the data behind a section bumps the generation of that section. The
+knowledge base compares the generations its snapshot was built from with the current ones and
+reloads only the sections that changed.
+"""
+
+import threading
+
+RESTAURANT_INFO = 'restaurant_info'
+MENU = 'menu'
+SPECIAL_OFFERS = 'special_offers'
+FAQ = 'faq'
+
+SECTIONS = (RESTAURANT_INFO, MENU, SPECIAL_OFFERS, FAQ)
+
+
+class Generations:
+    """Thread-safe counters of the writes to each knowledge base section."""
+
+    def __init__(self, sections: tuple[str, ...] = SECTIONS):
+        self._values = dict.fromkeys(sections, 0)
+        self._lock = threading.Lock()
+
+    def bump(self, *sections: str):
+        with self._lock:
+            for section in sections:
+                self._values[section] += 1
+
+    def get(self, section: str) -> int:
+        return self._values[section]
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+
+generations = Generations()
@@ -1,7 +1,11 @@
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.cache import FAQ, MENU, RESTAURANT_INFO, SPECIAL_OFFERS, generations
 from app.models import (
     AllergenCreate,
     AllergenDB,
@@ -42,16 +46,22 @@ def get_first_restaurant_info(db: Session) -> RestaurantInfoDB | None:
     return db.query(RestaurantInfoDB).first()
 
 
-def create_restaurant_info(db: Session, info: RestaurantInfoCreate) -> RestaurantInfoDB:
-    info_data = info.model_dump()
+def restaurant_info_data(info: RestaurantInfoCreate, exclude_unset: bool = False) -> dict:
+    """Column values of the restaurant info, the URL and email types stored as strings."""
+    info_data = info.model_dump(exclude_unset=exclude_unset)
     if isinstance(info_data.get('website'), HttpUrl):
         info_data['website'] = str(info_data['website'])
     if isinstance(info_data.get('email'), EmailStr):
         info_data['email'] = str(info_data['email'])
+    return info_data
+
 
+def create_restaurant_info(db: Session, info: RestaurantInfoCreate) -> RestaurantInfoDB:
+    info_data = restaurant_info_data(info)
     db_info = RestaurantInfoDB(**info_data)
     db.add(db_info)
     db.commit()
+    generations.bump(RESTAURANT_INFO)
     db.refresh(db_info)
     return db_info
 
@@ -61,15 +71,11 @@ def update_restaurant_info(
 ) -> RestaurantInfoDB | None:
     db_info = get_restaurant_info(db, info_id)
     if db_info:
-        update_data = info_update.model_dump(exclude_unset=True)
-        if 'website' in update_data and isinstance(update_data['website'], HttpUrl):
-            update_data['website'] = str(update_data['website'])
-        if 'email' in update_data and isinstance(update_data['email'], EmailStr):
-            update_data['email'] = str(update_data['email'])
-
+        update_data = restaurant_info_data(info_update, exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_info, key, value)
         db.commit()
+        generations.bump(RESTAURANT_INFO)
         db.refresh(db_info)
     return db_info
 
@@ -79,6 +85,7 @@ def delete_restaurant_info(db: Session, info_id: int) -> RestaurantInfoDB | None
     if db_info:
         db.delete(db_info)
         db.commit()
+        generations.bump(RESTAURANT_INFO)
     return db_info
 
 
@@ -118,6 +125,7 @@ def create_menu_category(db: Session, category: MenuCategoryCreate) -> MenuCateg
     db_category = MenuCategoryDB(name=category.name)
     db.add(db_category)
     db.commit()
+    generations.bump(MENU)
     db.refresh(db_category)
     return db_category
 
@@ -173,6 +181,7 @@ def create_menu_item(db: Session, item: MenuItemCreate, category_id: int) -> Men
 
     db.add(db_item)
     db.commit()
+    generations.bump(MENU)
     db.refresh(db_item)
     return db_item
 
@@ -196,6 +205,7 @@ def update_menu_item(db: Session, item_id: int, item_update: MenuItemCreate) ->
             setattr(db_item, key, value)
 
         db.commit()
+        generations.bump(MENU)
         db.refresh(db_item)
     return db_item
 
@@ -205,6 +215,7 @@ def delete_menu_item(db: Session, item_id: int) -> MenuItemDB | None:
     if db_item:
         db.delete(db_item)
         db.commit()
+        generations.bump(MENU)
     return db_item
 
 
@@ -274,6 +285,7 @@ def create_special_offer(db: Session, offer: SpecialOfferCreate) -> SpecialOffer
     db_offer = SpecialOfferDB(**offer.model_dump())
     db.add(db_offer)
     db.commit()
+    generations.bump(SPECIAL_OFFERS)
     db.refresh(db_offer)
     return db_offer
 
@@ -287,6 +299,7 @@ def update_special_offer(
         for key, value in update_data.items():
             setattr(db_offer, key, value)
         db.commit()
+        generations.bump(SPECIAL_OFFERS)
         db.refresh(db_offer)
     return db_offer
 
@@ -296,6 +309,7 @@ def delete_special_offer(db: Session, offer_id: int) -> SpecialOfferDB | None:
     if db_offer:
         db.delete(db_offer)
         db.commit()
+        generations.bump(SPECIAL_OFFERS)
     return db_offer
 
 
@@ -311,6 +325,7 @@ def create_faq(db: Session, faq: FaqCreate) -> FaqDB:
     db_faq = FaqDB(**faq.model_dump())
     db.add(db_faq)
     db.commit()
+    generations.bump(FAQ)
     db.refresh(db_faq)
     return db_faq
 
@@ -322,6 +337,7 @@ def update_faq(db: Session, faq_id: int, faq_update: FaqCreate) -> FaqDB | None:
         for key, value in update_data.items():
             setattr(db_faq, key, value)
         db.commit()
+        generations.bump(FAQ)
         db.refresh(db_faq)
     return db_faq
 
@@ -331,6 +347,7 @@ def delete_faq(db: Session, faq_id: int) -> FaqDB | None:
     if db_faq:
         db.delete(db_faq)
         db.commit()
+        generations.bump(FAQ)
     return db_faq
 
 
@@ -342,28 +359,77 @@ def get_orders(db: Session, skip: int = 0, limit: int = 100) -> list[OrderDB]:
     return db.query(OrderDB).offset(skip).limit(limit).all()
 
 
+# The rows are batched in one statement only if their None values are sent as NULL, instead of
+# being left out
+ORDER_ITEMS_INSERT_OPTIONS = {'render_nulls': True}
+
+
+def _menu_item_prices_query(items: list[OrderItemCreate]):
+    return select(MenuItemDB.id, MenuItemDB.price).where(
+        MenuItemDB.id.in_({item.menu_item_id for item in items})
+    )
+
+
+def _priced_order_items(
+    items: list[OrderItemCreate], prices: dict[int, float | None]
+) -> tuple[list[dict], float]:
+    """Values of the order item rows with their unit price, and the total of the order.
+
+    Raises ValueError if an item references a menu item that does not exist.
+    """
+    missing = sorted({item.menu_item_id for item in items} - prices.keys())
+    if missing:
+        raise ValueError(f'Menu items not found: {", ".join(map(str, missing))}.')
+    rows = [
+        {
+            'menu_item_id': item.menu_item_id,
+            'quantity': item.quantity,
+            'special_requests': item.special_requests,
+            'unit_price': prices[item.menu_item_id],
+        }
+        for item in items
+    ]
+    # Menu items without a price, like some drinks, do not count towards the total
+    total = sum(
+        price * item.quantity for item in items if (price := prices[item.menu_item_id]) is not None
+    )
+    return rows, round(total, 2)
+
+
+def _menu_item_prices(db: Session, items: list[OrderItemCreate]) -> dict[int, float | None]:
+    if not items:
+        return {}
+    return dict(db.execute(_menu_item_prices_query(items)).all())
+
+
 def create_order(db: Session, order: OrderCreate) -> OrderDB:
-    order_items_db = []
-    for item_create in order.items:
-        order_item_db = OrderItemDB(
-            menu_item_id=item_create.menu_item_id,
-            quantity=item_create.quantity,
-            special_requests=item_create.special_requests,
-        )
-        order_items_db.append(order_item_db)
+    """Create an order and return it with its items.
 
+    The menu items are checked with one query and the order items inserted in one statement.
+    Raises ValueError if an item references a menu item that does not exist.
+    """
+    rows, total = _priced_order_items(order.items, _menu_item_prices(db, order.items))
+    now = datetime.utcnow().isoformat()
     db_order = OrderDB(
         table_number=order.table_number,
         status=OrderStatusEnum.PENDING,
-        created_at=datetime.utcnow().isoformat(),
-        updated_at=datetime.utcnow().isoformat(),
+        created_at=now,
+        updated_at=now,
         notes=order.notes,
-        items=order_items_db,
+        total=total,
     )
     db.add(db_order)
+    db.flush()
+    order_id = db_order.id
+    if rows:
+        db.execute(
+            insert(OrderItemDB),
+            [{'order_id': order_id, **row} for row in rows],
+            execution_options=ORDER_ITEMS_INSERT_OPTIONS,
+        )
     db.commit()
-    db.refresh(db_order)
-    return db_order
+    # The order expired on commit, it is reloaded with its items in two queries
+    return db.scalars(select(OrderDB).where(OrderDB.id == order_id).options(*ORDER_OPTIONS)).one()
 
 
 def update_order_status(db: Session, order_id: int, status: OrderStatusEnum) -> OrderDB | None:
@@ -381,27 +447,13 @@ def update_order(db: Session, order_id: int, order_update: OrderUpdate) -> Order
     if db_order:
         update_data = order_update.model_dump(exclude_unset=True)
 
-        if 'items' in update_data and update_data['items'] is not None:
-            for item in db_order.items:
-                db.delete(item)
-            db.commit()
-
-            new_items_db = []
-            for item_create_data in update_data['items']:
-                item_create = (
-                    OrderItemCreate(**item_create_data)
-                    if isinstance(item_create_data, dict)
-                    else item_create_data
-                )
-
-                order_item_db = OrderItemDB(
-                    order_id=db_order.id,
-                    menu_item_id=item_create.menu_item_id,
-                    quantity=item_create.quantity,
-                    special_requests=item_create.special_requests,
-                )
-                new_items_db.append(order_item_db)
-            db_order.items = new_items_db
+        if order_update.items is not None:
+            rows, total = _priced_order_items(
+                order_update.items, _menu_item_prices(db, order_update.items)
+            )
+            # The replaced items are deleted as orphans on commit
+            db_order.items = [OrderItemDB(**row) for row in rows]
+            update_data['total'] = total
 
         update_data.pop('items', None)
 
@@ -420,3 +472,413 @@ def delete_order(db: Session, order_id: int) -> OrderDB | None:
         db.delete(db_order)
         db.commit()
     return db_order
+
+
+# Async equivalents, for the API routes and the agent tools running on the event loop. A
+# relationship cannot be lazy-loaded there, the ones serialized by the response models are
+# loaded with the query: the allergens of the menu items and the items of the orders.
+
+MENU_ITEM_OPTIONS = (selectinload(MenuItemDB.allergens),)
+MENU_CATEGORY_OPTIONS = (selectinload(MenuCategoryDB.items).selectinload(MenuItemDB.allergens),)
+ORDER_OPTIONS = (selectinload(OrderDB.items),)
+
+
+async def get_restaurant_info_async(db: AsyncSession, info_id: int) -> RestaurantInfoDB | None:
+    return await db.get(RestaurantInfoDB, info_id)
+
+
+async def get_first_restaurant_info_async(db: AsyncSession) -> RestaurantInfoDB | None:
+    return await db.scalar(select(RestaurantInfoDB).limit(1))
+
+
+async def create_restaurant_info_async(
+    db: AsyncSession, info: RestaurantInfoCreate
+) -> RestaurantInfoDB:
+    db_info = RestaurantInfoDB(**restaurant_info_data(info))
+    db.add(db_info)
+    await db.commit()
+    generations.bump(RESTAURANT_INFO)
+    await db.refresh(db_info)
+    return db_info
+
+
+async def update_restaurant_info_async(
+    db: AsyncSession, info_id: int, info_update: RestaurantInfoCreate
+) -> RestaurantInfoDB | None:
+    db_info = await get_restaurant_info_async(db, info_id)
+    if db_info:
+        for key, value in restaurant_info_data(info_update, exclude_unset=True).items():
+            setattr(db_info, key, value)
+        await db.commit()
+        generations.bump(RESTAURANT_INFO)
+        await db.refresh(db_info)
+    return db_info
+
+
+async def delete_restaurant_info_async(db: AsyncSession, info_id: int) -> RestaurantInfoDB | None:
+    db_info = await get_restaurant_info_async(db, info_id)
+    if db_info:
+        await db.delete(db_info)
+        await db.commit()
+        generations.bump(RESTAURANT_INFO)
+    return db_info
+
+
+async def get_allergen_by_name_async(db: AsyncSession, name: str) -> AllergenDB | None:
+    return await db.scalar(select(AllergenDB).where(AllergenDB.name == name))
+
+
+async def get_allergens_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> list[AllergenDB]:
+    result = await db.scalars(select(AllergenDB).offset(skip).limit(limit))
+    return list(result)
+
+
+async def create_allergen_async(db: AsyncSession, allergen: AllergenCreate) -> AllergenDB:
+    db_allergen = AllergenDB(name=allergen.name)
+    db.add(db_allergen)
+    await db.commit()
+    await db.refresh(db_allergen)
+    return db_allergen
+
+
+async def get_or_create_allergens_async(db: AsyncSession, names: list[str]) -> list[AllergenDB]:
+    """Allergens of the given names in one query, the missing ones added to the session."""
+    result = await db.scalars(select(AllergenDB).where(AllergenDB.name.in_(names)))
+    allergens = {allergen.name: allergen for allergen in result}
+    for name in names:
+        if name not in allergens:
+            allergens[name] = AllergenDB(name=name)
+            db.add(allergens[name])
+    return [allergens[name] for name in dict.fromkeys(names)]
+
+
+async def get_menu_category_async(db: AsyncSession, category_id: int) -> MenuCategoryDB | None:
+    return await db.scalar(
+        select(MenuCategoryDB)
+        .where(MenuCategoryDB.id == category_id)
+        .options(*MENU_CATEGORY_OPTIONS)
+    )
+
+
+async def get_menu_category_by_name_async(db: AsyncSession, name: str) -> MenuCategoryDB | None:
+    return await db.scalar(select(MenuCategoryDB).where(MenuCategoryDB.name == name))
+
+
+async def get_menu_categories_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> list[MenuCategoryDB]:
+    result = await db.scalars(
+        select(MenuCategoryDB).options(*MENU_CATEGORY_OPTIONS).offset(skip).limit(limit)
+    )
+    return list(result)
+
+
+async def create_menu_category_async(
+    db: AsyncSession, category: MenuCategoryCreate
+) -> MenuCategoryDB:
+    db_category = MenuCategoryDB(name=category.name, items=[])
+    db.add(db_category)
+    await db.commit()
+    generations.bump(MENU)
+    return db_category
+
+
+async def get_menu_item_async(db: AsyncSession, item_id: int) -> MenuItemDB | None:
+    return await db.scalar(
+        select(MenuItemDB).where(MenuItemDB.id == item_id).options(*MENU_ITEM_OPTIONS)
+    )
+
+
+async def get_menu_items_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> list[MenuItemDB]:
+    result = await db.scalars(
+        select(MenuItemDB).options(*MENU_ITEM_OPTIONS).offset(skip).limit(limit)
+    )
+    return list(result)
+
+
+async def get_menu_items_by_category_async(
+    db: AsyncSession, category_id: int, skip: int = 0, limit: int = 100
+) -> list[MenuItemDB]:
+    result = await db.scalars(
+        select(MenuItemDB)
+        .where(MenuItemDB.category_id == category_id)
+        .options(*MENU_ITEM_OPTIONS)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def create_menu_item_async(
+    db: AsyncSession, item: MenuItemCreate, category_id: int
+) -> MenuItemDB:
+    db_item = MenuItemDB(
+        name=item.name,
+        description=item.description,
+        price=item.price,
+        options=item.options,
+        category_id=category_id,
+        allergens=await get_or_create_allergens_async(db, item.allergen_names or []),
+    )
+    db.add(db_item)
+    await db.commit()
+    generations.bump(MENU)
+    return db_item
+
+
+async def update_menu_item_async(
+    db: AsyncSession, item_id: int, item_update: MenuItemCreate
+) -> MenuItemDB | None:
+    db_item = await get_menu_item_async(db, item_id)
+    if db_item:
+        update_data = item_update.model_dump(exclude_unset=True)
+
+        if 'allergen_names' in update_data:
+            allergen_names = update_data.pop('allergen_names') or []
+            db_item.allergens = await get_or_create_allergens_async(db, allergen_names)
+
+        for key, value in update_data.items():
+            setattr(db_item, key, value)
+
+        await db.commit()
+        generations.bump(MENU)
+    return db_item
+
+
+async def delete_menu_item_async(db: AsyncSession, item_id: int) -> MenuItemDB | None:
+    db_item = await get_menu_item_async(db, item_id)
+    if db_item:
+        await db.delete(db_item)
+        await db.commit()
+        generations.bump(MENU)
+    return db_item
+
+
+async def get_booking_async(db: AsyncSession, booking_id: int) -> BookingDB | None:
+    return await db.get(BookingDB, booking_id)
+
+
+async def get_bookings_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[BookingDB]:
+    result = await db.scalars(select(BookingDB).offset(skip).limit(limit))
+    return list(result)
+
+
+async def get_bookings_by_date_async(
+    db: AsyncSession, date: str, skip: int = 0, limit: int = 100
+) -> list[BookingDB]:
+    result = await db.scalars(
+        select(BookingDB).where(BookingDB.booking_date == date).offset(skip).limit(limit)
+    )
+    return list(result)
+
+
+async def create_booking_async(db: AsyncSession, booking: BookingCreate) -> BookingDB:
+    db_booking = BookingDB(**booking.model_dump())
+    db.add(db_booking)
+    await db.commit()
+    await db.refresh(db_booking)
+    return db_booking
+
+
+async def update_booking_status_async(
+    db: AsyncSession, booking_id: int, status: BookingStatusEnum
+) -> BookingDB | None:
+    db_booking = await get_booking_async(db, booking_id)
+    if db_booking:
+        db_booking.status = status  # type: ignore
+        await db.commit()
+        await db.refresh(db_booking)
+    return db_booking
+
+
+async def update_booking_async(
+    db: AsyncSession, booking_id: int, booking_update: BookingUpdate
+) -> BookingDB | None:
+    db_booking = await get_booking_async(db, booking_id)
+    if db_booking:
+        for key, value in booking_update.model_dump(exclude_unset=True).items():
+            setattr(db_booking, key, value)
+        await db.commit()
+        await db.refresh(db_booking)
+    return db_booking
+
+
+async def delete_booking_async(db: AsyncSession, booking_id: int) -> BookingDB | None:
+    db_booking = await get_booking_async(db, booking_id)
+    if db_booking:
+        await db.delete(db_booking)
+        await db.commit()
+    return db_booking
+
+
+async def get_special_offer_async(db: AsyncSession, offer_id: int) -> SpecialOfferDB | None:
+    return await db.get(SpecialOfferDB, offer_id)
+
+
+async def get_special_offers_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> list[SpecialOfferDB]:
+    result = await db.scalars(select(SpecialOfferDB).offset(skip).limit(limit))
+    return list(result)
+
+
+async def create_special_offer_async(db: AsyncSession, offer: SpecialOfferCreate) -> SpecialOfferDB:
+    db_offer = SpecialOfferDB(**offer.model_dump())
+    db.add(db_offer)
+    await db.commit()
+    generations.bump(SPECIAL_OFFERS)
+    await db.refresh(db_offer)
+    return db_offer
+
+
+async def update_special_offer_async(
+    db: AsyncSession, offer_id: int, offer_update: SpecialOfferCreate
+) -> SpecialOfferDB | None:
+    db_offer = await get_special_offer_async(db, offer_id)
+    if db_offer:
+        for key, value in offer_update.model_dump(exclude_unset=True).items():
+            setattr(db_offer, key, value)
+        await db.commit()
+        generations.bump(SPECIAL_OFFERS)
+        await db.refresh(db_offer)
+    return db_offer
+
+
+async def delete_special_offer_async(db: AsyncSession, offer_id: int) -> SpecialOfferDB | None:
+    db_offer = await get_special_offer_async(db, offer_id)
+    if db_offer:
+        await db.delete(db_offer)
+        await db.commit()
+        generations.bump(SPECIAL_OFFERS)
+    return db_offer
+
+
+async def get_faq_async(db: AsyncSession, faq_id: int) -> FaqDB | None:
+    return await db.get(FaqDB, faq_id)
+
+
+async def get_faqs_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[FaqDB]:
+    result = await db.scalars(select(FaqDB).offset(skip).limit(limit))
+    return list(result)
+
+
+async def create_faq_async(db: AsyncSession, faq: FaqCreate) -> FaqDB:
+    db_faq = FaqDB(**faq.model_dump())
+    db.add(db_faq)
+    await db.commit()
+    generations.bump(FAQ)
+    await db.refresh(db_faq)
+    return db_faq
+
+
+async def update_faq_async(db: AsyncSession, faq_id: int, faq_update: FaqCreate) -> FaqDB | None:
+    db_faq = await get_faq_async(db, faq_id)
+    if db_faq:
+        for key, value in faq_update.model_dump(exclude_unset=True).items():
+            setattr(db_faq, key, value)
+        await db.commit()
+        generations.bump(FAQ)
+        await db.refresh(db_faq)
+    return db_faq
+
+
+async def delete_faq_async(db: AsyncSession, faq_id: int) -> FaqDB | None:
+    db_faq = await get_faq_async(db, faq_id)
+    if db_faq:
+        await db.delete(db_faq)
+        await db.commit()
+        generations.bump(FAQ)
+    return db_faq
+
+
+async def get_order_async(db: AsyncSession, order_id: int) -> OrderDB | None:
+    return await db.scalar(select(OrderDB).where(OrderDB.id == order_id).options(*ORDER_OPTIONS))
+
+
+async def get_orders_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[OrderDB]:
+    result = await db.scalars(select(OrderDB).options(*ORDER_OPTIONS).offset(skip).limit(limit))
+    return list(result)
+
+
+async def _menu_item_prices_async(
+    db: AsyncSession, items: list[OrderItemCreate]
+) -> dict[int, float | None]:
+    if not items:
+        return {}
+    return dict((await db.execute(_menu_item_prices_query(items))).all())
+
+
+async def create_order_async(db: AsyncSession, order: OrderCreate) -> OrderDB:
+    """Async `create_order`. The order is returned with the inserted items, without a reload."""
+    prices = await _menu_item_prices_async(db, order.items)
+    rows, total = _priced_order_items(order.items, prices)
+    now = datetime.utcnow().isoformat()
+    db_order = OrderDB(
+        table_number=order.table_number,
+        status=OrderStatusEnum.PENDING,
+        created_at=now,
+        updated_at=now,
+        notes=order.notes,
+        total=total,
+    )
+    db.add(db_order)
+    await db.flush()
+    items = []
+    if rows:
+        # One multi-row INSERT
+        result = await db.scalars(
+            insert(OrderItemDB).returning(OrderItemDB),
+            [{'order_id': db_order.id, **row} for row in rows],
+            execution_options=ORDER_ITEMS_INSERT_OPTIONS,
+        )
+        # RETURNING gives the rows in no guaranteed order, sorted by id for a stable order
+        items = sorted(result, key=lambda item: item.id)
+    set_committed_value(db_order, 'items', items)
+    await db.commit()
+    return db_order
+
+
+async def update_order_status_async(
+    db: AsyncSession, order_id: int, status: OrderStatusEnum
+) -> OrderDB | None:
+    db_order = await get_order_async(db, order_id)
+    if db_order:
+        db_order.status = status  # type: ignore
+        db_order.updated_at = datetime.utcnow().isoformat()  # type: ignore
+        await db.commit()
+    return db_order
+
+
+async def update_order_async(
+    db: AsyncSession, order_id: int, order_update: OrderUpdate
+) -> OrderDB | None:
+    db_order = await get_order_async(db, order_id)
+    if db_order:
+        update_data = order_update.model_dump(exclude_unset=True)
+
+        update_data.pop('items', None)
+        if order_update.items is not None:
+            prices = await _menu_item_prices_async(db, order_update.items)
+            rows, total = _priced_order_items(order_update.items, prices)
+            # The replaced items are deleted as orphans on commit
+            db_order.items = [OrderItemDB(**row) for row in rows]
+            update_data['total'] = total
+
+        for key, value in update_data.items():
+            setattr(db_order, key, value)
+
+        db_order.updated_at = datetime.utcnow().isoformat()  # type: ignore
+        await db.commit()
+    return db_order
+
+
+async def delete_order_async(db: AsyncSession, order_id: int) -> OrderDB | None:
+    db_order = await get_order_async(db, order_id)
+    if db_order:
+        await db.delete(db_order)
+        await db.commit()
+    return db_order
@@ -1,8 +1,12 @@
 import json
 import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
+from app.cache import SECTIONS, generations
 from app.crud import (
     create_allergen,
     create_faq,
@@ -12,16 +16,23 @@ from app.crud import (
     create_special_offer,
     get_allergen_by_name,
     get_menu_category_by_name,
+    restaurant_info_data,
 )
 from app.database import SessionLocal
 from app.models import (
     AllergenCreate,
     AllergenDB,
     FaqCreate,
+    FaqDB,
     MenuCategoryCreate,
+    MenuCategoryDB,
     MenuItemCreate,
+    MenuItemDB,
     RestaurantInfoCreate,
+    RestaurantInfoDB,
     SpecialOfferCreate,
+    SpecialOfferDB,
+    menu_item_allergen_association,
 )
 from app.utils import log_error, log_info, log_warning
 
@@ -54,65 +65,81 @@ def parse_price(price_str):
     return None
 
 
-def _load_restaurant_info(db: Session, info_data: dict):
-    """Loads restaurant information into the database using CRUD operations."""
-    if not info_data:
-        log_warning('No restaurant_info found in JSON data.')
-        return
-
+def restaurant_info_schema(info_data: dict) -> RestaurantInfoCreate:
     website_url = info_data.get('website')
     if website_url and not website_url.startswith(('http://', 'https://')):
         website_url = 'http://' + website_url
         log_info(f'Prepended http:// to website URL: {website_url}')
 
-    try:
-        restaurant_info_create = RestaurantInfoCreate(
-            name=info_data.get('name'),
-            address=info_data.get('address'),
-            opening_hours_weekday=info_data.get('opening_hours', {}).get('weekday'),
-            opening_hours_weekend=info_data.get('opening_hours', {}).get('weekend'),
-            phone=info_data.get('phone'),
-            email=info_data.get('email'),
-            website=website_url,
-            cuisine_type=info_data.get('cuisine_type'),
-            payment_methods=info_data.get('payment_methods'),
-            parking_available=info_data.get('parking_available', False),
-            summer_garden_available=info_data.get('summer_garden_available', False),
-            reservations_info=info_data.get('reservations_info'),
-        )
+    return RestaurantInfoCreate(
+        name=info_data.get('name'),
+        address=info_data.get('address'),
+        opening_hours_weekday=info_data.get('opening_hours', {}).get('weekday'),
+        opening_hours_weekend=info_data.get('opening_hours', {}).get('weekend'),
+        phone=info_data.get('phone'),
+        email=info_data.get('email'),
+        website=website_url,
+        cuisine_type=info_data.get('cuisine_type'),
+        payment_methods=info_data.get('payment_methods'),
+        parking_available=info_data.get('parking_available', False),
+        summer_garden_available=info_data.get('summer_garden_available', False),
+        reservations_info=info_data.get('reservations_info'),
+    )
+
+
+def _load_restaurant_info(db: Session, info_data: dict | None):
+    """Loads restaurant information into the database using CRUD operations."""
+    if not info_data:
+        log_warning('No restaurant_info found in JSON data.')
+        return
 
-        created_info = create_restaurant_info(db=db, info=restaurant_info_create)
+    try:
+        created_info = create_restaurant_info(db=db, info=restaurant_info_schema(info_data))
         log_info(f'Processed restaurant info: {created_info.name}')
 
     except Exception as e:
         log_error(f'Error processing restaurant info: {e}')
 
 
+def menu_item_schema(item_data: dict, category_id: int) -> MenuItemCreate:
+    return MenuItemCreate(
+        name=item_data['name'],
+        description=item_data.get('description'),
+        price=float(item_data['price']),
+        category_id=category_id,
+        options=item_data.get('options'),
+        allergen_names=[
+            al_name.strip()
+            for al_name in item_data.get('allergens', [])
+            if al_name and al_name.strip() and al_name.strip() != '-'
+        ],
+    )
+
+
+def drink_item_schema(item_data: dict, category_id: int, sub_category_name: str) -> MenuItemCreate:
+    name_full = item_data['name']
+    price_info_str = item_data.get('price_info')
+    parsed_drink_price = parse_price(price_info_str)
+    return MenuItemCreate(
+        name=f'{name_full} ({sub_category_name})' if sub_category_name else name_full,
+        description=name_full,
+        price=parsed_drink_price if parsed_drink_price is not None else 0.0,
+        category_id=category_id,
+        options=price_info_str if parsed_drink_price is None else None,
+        allergen_names=[],
+    )
+
+
 def _load_menu_item(db: Session, item_data: dict, category_id: int, category_name: str):
     """Loads a single menu item (not a drink) into the database using CRUD."""
     name = item_data.get('name')
-    price_val = item_data.get('price')
-    description = item_data.get('description')
-    options = item_data.get('options')
-    allergens_list = item_data.get('allergens', [])
 
-    if not name or price_val is None:
+    if not name or item_data.get('price') is None:
         log_warning(f'Skipping item in {category_name} due to missing name or price: {name}')
         return
 
     try:
-        menu_item_create_schema = MenuItemCreate(
-            name=name,
-            description=description,
-            price=float(price_val),
-            category_id=category_id,
-            options=options,
-            allergen_names=[
-                al_name.strip()
-                for al_name in allergens_list
-                if al_name and al_name.strip() and al_name.strip() != '-'
-            ],
-        )
+        menu_item_create_schema = menu_item_schema(item_data, category_id)
         created_item = create_menu_item(
             db=db, item=menu_item_create_schema, category_id=category_id
         )
@@ -124,23 +151,13 @@ def _load_menu_item(db: Session, item_data: dict, category_id: int, category_nam
 def _load_drink_item(db: Session, item_data: dict, category_id: int, sub_category_name: str):
     """Loads a single drink item into the database using CRUD."""
     name_full = item_data.get('name')
-    price_info_str = item_data.get('price_info')
 
     if not name_full:
         log_warning(f'Skipping drink in {sub_category_name} due to missing name.')
         return
 
-    parsed_drink_price = parse_price(price_info_str)
-
     try:
-        menu_item_create_schema = MenuItemCreate(
-            name=f'{name_full} ({sub_category_name})' if sub_category_name else name_full,
-            description=name_full,
-            price=parsed_drink_price if parsed_drink_price is not None else 0.0,
-            category_id=category_id,
-            options=price_info_str if parsed_drink_price is None else None,
-            allergen_names=[],
-        )
+        menu_item_create_schema = drink_item_schema(item_data, category_id, sub_category_name)
         created_item = create_menu_item(
             db=db, item=menu_item_create_schema, category_id=category_id
         )
@@ -232,28 +249,241 @@ def _load_faq(db: Session, faq_data: list):
             log_error(f'Error processing FAQ "{question[:50]}...": {e}')
 
 
-def load_data_from_json(json_file_path: str):
+@dataclass
+class SeedData:
+    """Validated content of a data file, ready to be inserted in bulk."""
+
+    restaurant_info: RestaurantInfoCreate | None = None
+    categories: list[str] = field(default_factory=list)
+    # Items with the name of their category, its id is only known once the categories are inserted
+    menu_items: list[tuple[str, MenuItemCreate]] = field(default_factory=list)
+    special_offers: list[SpecialOfferCreate] = field(default_factory=list)
+    faq: list[FaqCreate] = field(default_factory=list)
+    skipped: int = 0
+
+
+def _parse_menu(seed: SeedData, menu_data: list):
+    for category_data in menu_data:
+        cat_name = category_data.get('category_name')
+        if not cat_name:
+            log_warning('Skipping menu category with no name.')
+            seed.skipped += 1
+            continue
+        if cat_name not in seed.categories:
+            seed.categories.append(cat_name)
+
+        if 'items' in category_data:
+            for item_data in category_data.get('items', []):
+                name = item_data.get('name')
+                if not name or item_data.get('price') is None:
+                    log_warning(f'Skipping item in {cat_name} due to missing name or price: {name}')
+                    seed.skipped += 1
+                    continue
+                try:
+                    seed.menu_items.append((cat_name, menu_item_schema(item_data, category_id=0)))
+                except Exception as e:
+                    log_error(f'Error processing menu item "{name}" in category "{cat_name}": {e}')
+                    seed.skipped += 1
+        elif 'sub_categories' in category_data:
+            for sub_cat_data in category_data.get('sub_categories', []):
+                sub_cat_name = sub_cat_data.get('sub_category_name')
+                for item_data in sub_cat_data.get('items', []):
+                    if not item_data.get('name'):
+                        log_warning(f'Skipping drink in {sub_cat_name} due to missing name.')
+                        seed.skipped += 1
+                        continue
+                    try:
+                        item = drink_item_schema(item_data, 0, sub_cat_name)
+                        seed.menu_items.append((cat_name, item))
+                    except Exception as e:
+                        log_error(
+                            f'Error processing drink item "{item_data.get("name")}" '
+                            f'in sub-category "{sub_cat_name}": {e}'
+                        )
+                        seed.skipped += 1
+
+
+def parse_data(data: dict) -> SeedData:
+    """Validate every entry of the data file, invalid entries are logged and skipped."""
+    seed = SeedData()
+
+    info_data = data.get('restaurant_info')
+    if not info_data:
+        log_warning('No restaurant_info found in JSON data.')
+    else:
+        try:
+            seed.restaurant_info = restaurant_info_schema(info_data)
+        except Exception as e:
+            log_error(f'Error processing restaurant info: {e}')
+            seed.skipped += 1
+
+    _parse_menu(seed, data.get('menu') or [])
+
+    for offer_data in data.get('special_offers') or []:
+        title = offer_data.get('title')
+        if not title:
+            log_warning('Skipping special offer with no title.')
+            seed.skipped += 1
+            continue
+        try:
+            seed.special_offers.append(
+                SpecialOfferCreate(
+                    title=title,
+                    description=offer_data.get('description'),
+                    price_info=offer_data.get('price_info'),
+                    details=offer_data.get('details'),
+                    validity=offer_data.get('validity'),
+                )
+            )
+        except Exception as e:
+            log_error(f'Error processing offer "{title}": {e}')
+            seed.skipped += 1
+
+    questions = set()
+    for faq_item in data.get('faq') or []:
+        question = faq_item.get('question')
+        answer = faq_item.get('answer')
+        if not question or not answer:
+            log_warning('Skipping FAQ entry with missing question or answer.')
+            seed.skipped += 1
+            continue
+        if question in questions:
+            # Questions are unique, a duplicate would abort the whole transaction
+            log_warning(f'Skipping duplicate FAQ entry: {question[:50]}...')
+            seed.skipped += 1
+            continue
+        questions.add(question)
+        seed.faq.append(FaqCreate(question=question, answer=answer))
+
+    return seed
+
+
+def _insert_returning_ids(db: Session, model, rows: list[dict], key: tuple[str, ...]) -> list[int]:
+    """Insert the rows with one executemany, returning their ids in the order of the rows.
+
+    SQLite guarantees neither the order of the rows of RETURNING nor ids increasing with it, the
+    ids are matched to the rows by their `key` columns. Rows sharing a key, rare, are inserted
+    by further statements.
     """
-    Load data from JSON file into the database.
-    Uses CRUD operations and Pydantic schemas for validation.
+    ids: list[int] = [0] * len(rows)
+    pending = list(enumerate(rows))
+    while pending:
+        positions: dict[tuple, int] = {}
+        duplicates = []
+        for index, row in pending:
+            row_key = tuple(row[column] for column in key)
+            if row_key in positions:
+                duplicates.append((index, row))
+            else:
+                positions[row_key] = index
+        statement = insert(model).returning(model.id, *(getattr(model, column) for column in key))
+        # None values are sent as NULL, rows with different None columns are split otherwise
+        result = db.execute(
+            statement,
+            [rows[index] for index in positions.values()],
+            execution_options={'render_nulls': True},
+        )
+        for row_id, *returned_key in result:
+            ids[positions[tuple(returned_key)]] = row_id
+        pending = duplicates
+    return ids
+
+
+class BulkWriter:
+    """Inserts validated entries with one executemany per table and call, without committing.
+
+    The ids of the categories and allergens, those already in the database and those inserted,
+    are kept in dicts: the allergens of the items are resolved without a query, and a writer fed
+    in batches only holds the names of the categories and allergens seen.
     """
-    try:
-        with open(json_file_path, encoding='utf-8') as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        log_error(f'JSON data file not found at: {json_file_path}')
-        return
-    except json.JSONDecodeError as e:
-        log_error(f'Error decoding JSON from file {json_file_path}: {e}')
-        return
-    except Exception as e:
-        log_error(f'An unexpected error occurred while reading {json_file_path}: {e}')
-        return
 
-    db: Session = SessionLocal()
-    try:
-        log_info('Starting data loading process...')
+    def __init__(self, db: Session):
+        self.db = db
+        self.category_ids: dict[str, int] = dict(
+            db.execute(select(MenuCategoryDB.name, MenuCategoryDB.id)).all()
+        )
+        self.allergen_ids: dict[str, int] = dict(
+            db.execute(select(AllergenDB.name, AllergenDB.id)).all()
+        )
+        self.rows = 0
 
+    def _insert_names(self, model, ids: dict[str, int], names: Iterable[str]):
+        new_names = list(dict.fromkeys(name for name in names if name not in ids))
+        inserted = _insert_returning_ids(
+            self.db, model, [{'name': name} for name in new_names], key=('name',)
+        )
+        ids.update(zip(new_names, inserted, strict=True))
+        self.rows += len(inserted)
+
+    def restaurant_info(self, info: RestaurantInfoCreate):
+        self.db.execute(insert(RestaurantInfoDB), [restaurant_info_data(info)])
+        self.rows += 1
+
+    def categories(self, names: Iterable[str]):
+        self._insert_names(MenuCategoryDB, self.category_ids, names)
+
+    def menu_items(self, items: list[tuple[str, MenuItemCreate]]):
+        """Insert items with the name of their category, missing categories and allergens too."""
+        self.categories(category_name for category_name, _ in items)
+        self._insert_names(
+            AllergenDB,
+            self.allergen_ids,
+            (name for _, item in items for name in item.allergen_names or []),
+        )
+        item_ids = _insert_returning_ids(
+            self.db,
+            MenuItemDB,
+            [
+                {
+                    'name': item.name,
+                    'description': item.description,
+                    'price': item.price,
+                    'options': item.options,
+                    'category_id': self.category_ids[category_name],
+                }
+                for category_name, item in items
+            ],
+            key=('name', 'category_id'),
+        )
+        associations = [
+            {'menu_item_id': item_id, 'allergen_id': self.allergen_ids[name]}
+            for item_id, (_, item) in zip(item_ids, items, strict=True)
+            for name in dict.fromkeys(item.allergen_names or [])
+        ]
+        if associations:
+            self.db.execute(insert(menu_item_allergen_association), associations)
+        self.rows += len(item_ids) + len(associations)
+
+    def special_offers(self, offers: list[SpecialOfferCreate]):
+        if offers:
+            self.db.execute(insert(SpecialOfferDB), [offer.model_dump() for offer in offers])
+            self.rows += len(offers)
+
+    def faq(self, entries: list[FaqCreate]):
+        if entries:
+            self.db.execute(insert(FaqDB), [faq.model_dump() for faq in entries])
+            self.rows += len(entries)
+
+
+def bulk_load(db: Session, seed: SeedData) -> int:
+    """Insert the validated data with one statement per table, without committing.
+
+    Categories and allergens already in the database are reused. Returns the number of rows
+    inserted.
+    """
+    writer = BulkWriter(db)
+    if seed.restaurant_info is not None:
+        writer.restaurant_info(seed.restaurant_info)
+    writer.categories(seed.categories)
+    writer.menu_items(seed.menu_items)
+    writer.special_offers(seed.special_offers)
+    writer.faq(seed.faq)
+    return writer.rows
+
+
+def load_data(db: Session, data: dict, bulk: bool = True):
+    """Load the content of a data file, in bulk in one transaction or row by row through CRUD."""
+    if not bulk:
         log_info('Processing Restaurant Info...')
         _load_restaurant_info(db, data.get('restaurant_info'))
 
@@ -265,7 +495,52 @@ def load_data_from_json(json_file_path: str):
 
         log_info('Processing FAQ...')
         _load_faq(db, data.get('faq', []))
+        return
+
+    seed = parse_data(data)
+    log_info(
+        f'Validated {len(seed.categories)} categories, {len(seed.menu_items)} menu items, '
+        f'{len(seed.special_offers)} special offers and {len(seed.faq)} FAQ entries '
+        f'({seed.skipped} skipped).'
+    )
+    try:
+        rows = bulk_load(db, seed)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    generations.bump(*SECTIONS)
+    log_info(f'Inserted {rows} rows in one transaction.')
+
+
+def read_data_file(json_file_path: str) -> dict | None:
+    """Read a JSON data file, errors are logged and return None."""
+    try:
+        with open(json_file_path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        log_error(f'JSON data file not found at: {json_file_path}')
+    except json.JSONDecodeError as e:
+        log_error(f'Error decoding JSON from file {json_file_path}: {e}')
+    except Exception as e:
+        log_error(f'An unexpected error occurred while reading {json_file_path}: {e}')
+    return None
+
+
+def load_data_from_json(json_file_path: str, bulk: bool = True):
+    """
+    Load data from JSON file into the database.
+    Every entry is validated with the Pydantic schemas first. In bulk mode the valid entries are
+    inserted in one transaction, otherwise each one goes through the CRUD operations.
+    """
+    data = read_data_file(json_file_path)
+    if data is None:
+        return
 
+    db: Session = SessionLocal()
+    try:
+        log_info('Starting data loading process...')
+        load_data(db, data, bulk=bulk)
         log_info('Data loading process completed.')
 
     except Exception as e:
@@ -0,0 +1,201 @@
+"""
+Streaming ingestion of large data files.
+
+`load_data_from_json` reads the whole data file into memory, too much for catalogs of hundreds
+of MB. Here the file is read as a stream of records, validated one by one and inserted in
+batches by a `BulkWriter`, so the memory used depends on the batch size, not on the file size.
+All the batches are inserted in one transaction.
+
+Two formats are read:
+
+* NDJSON (``.ndjson``, ``.jsonl``), one record per line: a JSON object with a ``section`` and
+  the fields of the entry, ``restaurant_info``, ``menu_category`` (``category_name``),
+  ``menu_item`` (``category_name`` and the fields of an item of ``data.json``, drinks also
+  have a ``sub_category_name``), ``special_offer`` or ``faq``;
+* the format of ``data.json``, parsed incrementally with ``ijson``. The ``category_name`` of a
+  category must come before its items, as in ``data.json``. Numbers are parsed as floats, not
+  ``Decimal``, so the records are the ones ``json.load`` would give.
+"""
+
+import json
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import ijson
+from sqlalchemy.orm import Session
+
+from app.cache import SECTIONS, generations
+from app.data_loader import (
+    BulkWriter,
+    drink_item_schema,
+    menu_item_schema,
+    restaurant_info_schema,
+)
+from app.database import SessionLocal
+from app.models import FaqCreate, SpecialOfferCreate
+from app.utils import log_error, log_info, log_warning
+
+DEFAULT_BATCH_SIZE = 1000
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+RESTAURANT_INFO = 'restaurant_info'
+MENU_CATEGORY = 'menu_category'
+MENU_ITEM = 'menu_item'
+SPECIAL_OFFER = 'special_offer'
+FAQ = 'faq'
+
+# Prefixes of the ijson events of the entries of data.json, with their section
+JSON_RECORD_PREFIXES = {
+    'restaurant_info': RESTAURANT_INFO,
+    'menu.item.items.item': MENU_ITEM,
+    'menu.item.sub_categories.item.items.item': MENU_ITEM,
+    'special_offers.item': SPECIAL_OFFER,
+    'faq.item': FAQ,
+}
+
+
+def read_ndjson(path: Path) -> Iterator[dict]:
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                log_error(f'Skipping invalid JSON on line {line_number} of {path}: {e}')
+
+
+def read_json_stream(path: Path) -> Iterator[dict]:
+    """Records of a file in the format of data.json, without loading the whole document."""
+    category_name: str | None = None
+    sub_category_name: str | None = None
+    builder: ijson.ObjectBuilder | None = None
+    builder_prefix: str | None = None
+    record: dict[str, Any] = {}
+    with open(path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                # Maps nested in the entry end with a longer prefix
+                if event == 'end_map' and prefix == builder_prefix:
+                    yield {**record, **builder.value}
+                    builder = None
+            elif prefix == 'menu.item.category_name':
+                category_name, sub_category_name = value, None
+                yield {'section': MENU_CATEGORY, 'category_name': category_name}
+            elif prefix == 'menu.item.sub_categories.item.sub_category_name':
+                sub_category_name = value
+            elif event == 'start_map' and prefix in JSON_RECORD_PREFIXES:
+                section = JSON_RECORD_PREFIXES[prefix]
+                record = {'section': section}
+                if section == MENU_ITEM:
+                    record['category_name'] = category_name
+                    if 'sub_categories' in prefix:
+                        record['sub_category_name'] = sub_category_name
+                builder, builder_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+
+
+def read_records(path: Path) -> Iterator[dict]:
+    if path.suffix in NDJSON_SUFFIXES:
+        return read_ndjson(path)
+    return read_json_stream(path)
+
+
+def validate_records(records: Iterable[dict]) -> Iterator[tuple[str, object]]:
+    """Pair the valid records with their section and schema, invalid ones are logged and skipped."""
+    questions = set()
+    for record in records:
+        section = record.get('section')
+        try:
+            if section == RESTAURANT_INFO:
+                yield section, restaurant_info_schema(record)
+            elif section == MENU_CATEGORY:
+                if not record.get('category_name'):
+                    log_warning('Skipping menu category with no name.')
+                    continue
+                yield section, record['category_name']
+            elif section == MENU_ITEM:
+                category_name, name = record.get('category_name'), record.get('name')
+                if not category_name:
+                    log_warning(f'Skipping menu item with no category: {name}')
+                    continue
+                if 'sub_category_name' in record:
+                    if not name:
+                        log_warning(
+                            f'Skipping drink in {record["sub_category_name"]} due to missing name.'
+                        )
+                        continue
+                    item = drink_item_schema(record, 0, record['sub_category_name'])
+                elif not name or record.get('price') is None:
+                    log_warning(
+                        f'Skipping item in {category_name} due to missing name or price: {name}'
+                    )
+                    continue
+                else:
+                    item = menu_item_schema(record, category_id=0)
+                yield section, (category_name, item)
+            elif section == SPECIAL_OFFER:
+                if not record.get('title'):
+                    log_warning('Skipping special offer with no title.')
+                    continue
+                # The section of the record is not a field, it is ignored
+                yield section, SpecialOfferCreate.model_validate(record)
+            elif section == FAQ:
+                question, answer = record.get('question'), record.get('answer')
+                if not question or not answer:
+                    log_warning('Skipping FAQ entry with missing question or answer.')
+                elif question in questions:
+                    log_warning(f'Skipping duplicate FAQ entry: {question[:50]}...')
+                else:
+                    questions.add(question)
+                    yield section, FaqCreate(question=question, answer=answer)
+            else:
+                log_warning(f'Skipping record of unknown section: {section}')
+        except Exception as e:
+            log_error(f'Error processing {section} record: {e}')
+
+
+def batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def stream_load(db: Session, records: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Insert the valid records in batches, without committing. Returns the rows inserted."""
+    writer = BulkWriter(db)
+    for batch in batches(validate_records(records), batch_size):
+        entries: dict[str, list] = {}
+        for section, entry in batch:
+            entries.setdefault(section, []).append(entry)
+        for info in entries.get(RESTAURANT_INFO, ()):
+            writer.restaurant_info(info)
+        writer.categories(entries.get(MENU_CATEGORY, ()))
+        writer.menu_items(entries.get(MENU_ITEM, []))
+        writer.special_offers(entries.get(SPECIAL_OFFER, []))
+        writer.faq(entries.get(FAQ, []))
+    return writer.rows
+
+
+def load_data_stream(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Stream a data file into the database in one transaction, see the module docstring."""
+    path = Path(file_path)
+    if not path.exists():
+        log_error(f'Data file not found at: {path}')
+        return
+    db: Session = SessionLocal()
+    try:
+        log_info(f'Streaming data from {path} in batches of {batch_size}...')
+        rows = stream_load(db, read_records(path), batch_size)
+        db.commit()
+        generations.bump(*SECTIONS)
+        log_info(f'Inserted {rows} rows in one transaction.')
+    except Exception as e:
+        log_error(f'A critical error occurred while streaming {path}: {e}.')
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,267 @@
+"""
+Incremental sync of the database with the data file.
+
+Instead of dropping the tables and reloading the data file, which also wipes the orders and
+bookings, `sync_data` compares the validated data file with the rows of the database by their
+natural key: the name of a menu item, category or allergen, the title of a special offer and
+the question of an FAQ entry. Only the inserts, updates and deletes needed are applied, in one
+transaction, and only the knowledge base sections that changed are refreshed.
+
+Menu items removed from the data file but referenced by orders are kept, the orders would lose
+their items otherwise.
+"""
+
+from dataclasses import dataclass, field
+from typing import cast
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache import FAQ, MENU, RESTAURANT_INFO, SPECIAL_OFFERS, generations
+from app.crud import restaurant_info_data
+from app.data_loader import SeedData, parse_data, read_data_file
+from app.database import SessionLocal
+from app.models import (
+    AllergenDB,
+    FaqDB,
+    MenuCategoryDB,
+    MenuItemDB,
+    OrderItemDB,
+    RestaurantInfoDB,
+    SpecialOfferDB,
+)
+from app.utils import log_info, log_warning
+
+MENU_ITEM_FIELDS = ('description', 'price', 'options')
+SPECIAL_OFFER_FIELDS = ('description', 'price_info', 'validity', 'details')
+
+
+@dataclass
+class TableChanges:
+    """Natural keys of the rows inserted, updated and deleted in one table."""
+
+    inserted: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+@dataclass
+class ChangeSet:
+    restaurant_info: TableChanges = field(default_factory=TableChanges)
+    menu_categories: TableChanges = field(default_factory=TableChanges)
+    allergens: TableChanges = field(default_factory=TableChanges)
+    menu_items: TableChanges = field(default_factory=TableChanges)
+    special_offers: TableChanges = field(default_factory=TableChanges)
+    faqs: TableChanges = field(default_factory=TableChanges)
+    # Menu items missing from the data file but referenced by orders
+    kept: list[str] = field(default_factory=list)
+
+    def tables(self) -> dict[str, TableChanges]:
+        return {
+            'restaurant_info': self.restaurant_info,
+            'menu_categories': self.menu_categories,
+            'allergens': self.allergens,
+            'menu_items': self.menu_items,
+            'special_offers': self.special_offers,
+            'faqs': self.faqs,
+        }
+
+    def sections(self) -> list[str]:
+        """Knowledge base sections built from the changed tables."""
+        sections = {
+            RESTAURANT_INFO: self.restaurant_info,
+            MENU: self.menu_categories or self.allergens or self.menu_items,
+            SPECIAL_OFFERS: self.special_offers,
+            FAQ: self.faqs,
+        }
+        return [section for section, changed in sections.items() if changed]
+
+    def report(self) -> str:
+        lines = []
+        for table, changes in self.tables().items():
+            lines.append(
+                f'{table}: {len(changes.inserted)} inserted, {len(changes.updated)} updated, '
+                f'{len(changes.deleted)} deleted'
+            )
+            for sign, keys in (
+                ('+', changes.inserted),
+                ('~', changes.updated),
+                ('-', changes.deleted),
+            ):
+                lines.extend(f'  {sign} {key}' for key in keys)
+        if self.kept:
+            lines.append(f'kept {len(self.kept)} menu items referenced by orders:')
+            lines.extend(f'  = {key}' for key in self.kept)
+        return '\n'.join(lines)
+
+
+def _changed_fields(row, values: dict) -> list[str]:
+    return [name for name, value in values.items() if getattr(row, name) != value]
+
+
+def _sync_restaurant_info(db: Session, seed: SeedData, changes: TableChanges):
+    if seed.restaurant_info is None:
+        return
+    values = restaurant_info_data(seed.restaurant_info)
+    row = db.scalar(select(RestaurantInfoDB).order_by(RestaurantInfoDB.id).limit(1))
+    if row is None:
+        db.add(RestaurantInfoDB(**values))
+        changes.inserted.append(values['name'])
+    elif fields := _changed_fields(row, values):
+        for name in fields:
+            setattr(row, name, values[name])
+        changes.updated.append(f'{row.name} ({", ".join(fields)})')
+
+
+def _sync_menu(db: Session, seed: SeedData, changes: ChangeSet):
+    items: dict[str, tuple[str, list[str], dict]] = {}
+    for category_name, item in seed.menu_items:
+        if item.name in items:
+            log_warning(f'Skipping duplicate menu item in the data file: {item.name}')
+            continue
+        values = {field_name: getattr(item, field_name) for field_name in MENU_ITEM_FIELDS}
+        items[item.name] = (category_name, list(dict.fromkeys(item.allergen_names or [])), values)
+
+    categories: dict[str, MenuCategoryDB] = {
+        cast(str, row.name): row for row in db.scalars(select(MenuCategoryDB))
+    }
+    for name in seed.categories:
+        if name not in categories:
+            categories[name] = MenuCategoryDB(name=name)
+            db.add(categories[name])
+            changes.menu_categories.inserted.append(name)
+
+    allergens: dict[str, AllergenDB] = {
+        cast(str, row.name): row for row in db.scalars(select(AllergenDB))
+    }
+    for _, allergen_names, _ in items.values():
+        for name in allergen_names:
+            if name not in allergens:
+                allergens[name] = AllergenDB(name=name)
+                db.add(allergens[name])
+                changes.allergens.inserted.append(name)
+
+    rows: dict[str, MenuItemDB] = {
+        cast(str, row.name): row
+        for row in db.scalars(
+            select(MenuItemDB).options(
+                selectinload(MenuItemDB.allergens), selectinload(MenuItemDB.category)
+            )
+        )
+    }
+    for name, (category_name, allergen_names, values) in items.items():
+        row = rows.get(name)
+        if row is None:
+            db.add(
+                MenuItemDB(
+                    name=name,
+                    category=categories[category_name],
+                    allergens=[allergens[allergen] for allergen in allergen_names],
+                    **values,
+                )
+            )
+            changes.menu_items.inserted.append(name)
+            continue
+        fields = _changed_fields(row, values)
+        for field_name in fields:
+            setattr(row, field_name, values[field_name])
+        if row.category is None or row.category.name != category_name:
+            row.category = categories[category_name]
+            fields.append('category')
+        if {allergen.name for allergen in row.allergens} != set(allergen_names):
+            row.allergens = [allergens[allergen] for allergen in allergen_names]
+            fields.append('allergens')
+        if fields:
+            changes.menu_items.updated.append(f'{name} ({", ".join(fields)})')
+
+    ordered: set[int] = set(db.scalars(select(OrderItemDB.menu_item_id).distinct()))
+    remaining = {name: row for name, row in rows.items() if name not in items}
+    for name, row in remaining.items():
+        if row.id in ordered:
+            changes.kept.append(name)
+        else:
+            db.delete(row)
+            changes.menu_items.deleted.append(name)
+
+    # Categories and allergens left without items and not in the data file are deleted too
+    kept_rows = [row for name, row in remaining.items() if name in changes.kept]
+    used_categories = set(seed.categories) | {
+        row.category.name for row in kept_rows if row.category
+    }
+    used_allergens = {name for _, allergen_names, _ in items.values() for name in allergen_names}
+    used_allergens |= {allergen.name for row in kept_rows for allergen in row.allergens}
+    for name, row in categories.items():
+        if name not in used_categories:
+            db.delete(row)
+            changes.menu_categories.deleted.append(name)
+    for name, row in allergens.items():
+        if name not in used_allergens:
+            db.delete(row)
+            changes.allergens.deleted.append(name)
+
+
+def _sync_by_key(db: Session, model, key: str, entries: list, fields: tuple, changes: TableChanges):
+    rows = {getattr(row, key): row for row in db.scalars(select(model))}
+    wanted = {getattr(entry, key): entry for entry in entries}
+    for name, entry in wanted.items():
+        values = {field_name: getattr(entry, field_name) for field_name in fields}
+        row = rows.get(name)
+        if row is None:
+            db.add(model(**{key: name}, **values))
+            changes.inserted.append(name)
+        elif changed := _changed_fields(row, values):
+            for field_name in changed:
+                setattr(row, field_name, values[field_name])
+            changes.updated.append(f'{name} ({", ".join(changed)})')
+    for name, row in rows.items():
+        if name not in wanted:
+            db.delete(row)
+            changes.deleted.append(name)
+
+
+def sync_data(db: Session, seed: SeedData, dry_run: bool = False) -> ChangeSet:
+    """Apply the difference between the data file and the database in one transaction.
+
+    With `dry_run` the changes are only computed and rolled back.
+    """
+    changes = ChangeSet()
+    try:
+        with db.no_autoflush:
+            _sync_restaurant_info(db, seed, changes.restaurant_info)
+            _sync_menu(db, seed, changes)
+            _sync_by_key(
+                db,
+                SpecialOfferDB,
+                'title',
+                seed.special_offers,
+                SPECIAL_OFFER_FIELDS,
+                changes.special_offers,
+            )
+            _sync_by_key(db, FaqDB, 'question', seed.faq, ('answer',), changes.faqs)
+        if dry_run:
+            db.rollback()
+            return changes
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    sections = changes.sections()
+    if sections:
+        generations.bump(*sections)
+    log_info(f'Data synced, changed sections: {", ".join(sections) or "none"}')
+    return changes
+
+
+def sync_data_file(json_file_path: str, dry_run: bool = False) -> ChangeSet | None:
+    """Sync the database with a data file, None if the file cannot be read."""
+    data = read_data_file(json_file_path)
+    if data is None:
+        return None
+    with SessionLocal() as db:
+        changes = sync_data(db, parse_data(data), dry_run=dry_run)
+    log_info(f'Changes{" (dry run)" if dry_run else ""}:\n{changes.report()}')
+    return changes
@@ -1,12 +1,94 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from app.settings import DATABASE_URL
+from app.settings import (
+    ASYNC_DATABASE_URL,
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_URL,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
 
-engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
+SQLITE_PRAGMAS = {
+    'journal_mode': SQLITE_JOURNAL_MODE,
+    'synchronous': SQLITE_SYNCHRONOUS,
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': SQLITE_MMAP_SIZE,
+    'cache_size': SQLITE_CACHE_SIZE,
+}
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Keyword arguments of `create_engine` for the backend of the URL."""
+    url_object = make_url(url)
+    options: dict = {}
+    if url_object.get_backend_name() == 'sqlite':
+        if not is_async:
+            options['connect_args'] = {'check_same_thread': False}
+        if url_object.database in (None, '', ':memory:'):
+            # Served by a single connection, a pool size does not apply
+            return options
+    options.update(
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        pool_timeout=DATABASE_POOL_TIMEOUT,
+        pool_pre_ping=url_object.get_backend_name() != 'sqlite',
+    )
+    return options
+
+
+def set_sqlite_pragmas(engine: Engine, pragmas: dict[str, str] | None = None):
+    """Set the pragmas on every new connection of a SQLite engine, other backends are left alone."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = {
+        name: value for name, value in (pragmas or SQLITE_PRAGMAS).items() if str(value).strip()
+    }
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def create_database_engine(url: str = DATABASE_URL, pragmas: dict[str, str] | None = None):
+    engine = create_engine(url, **engine_options(url))
+    set_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_database_engine(
+    url: str = ASYNC_DATABASE_URL, pragmas: dict[str, str] | None = None
+):
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    # The events of an async engine are registered on its sync counterpart
+    set_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+engine = create_database_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used from the event loop: the API routes and the agent tools. Objects are not expired on
+# commit, their attributes cannot be lazy-loaded outside of an awaited query
+async_engine = create_async_database_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -16,3 +98,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
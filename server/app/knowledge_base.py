@@ -1,170 +1,496 @@
-from typing import Any
+import threading
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, cast
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from app.cache import FAQ, MENU, RESTAURANT_INFO, SECTIONS, SPECIAL_OFFERS, generations
 from app.database import SessionLocal
+from app.menu_index import MenuNameIndex
 from app.models import (
     FaqDB,
     MenuCategoryDB,
+    MenuItemDB,
     RestaurantInfoDB,
     SpecialOfferDB,
 )
+from app.retrieval import KnowledgeChunk, KnowledgeRetriever
+from app.settings import (
+    RETRIEVAL_MODE,
+    RETRIEVAL_TOP_K,
+    VECTOR_INDEX_DIR,
+    VECTOR_MIN_SIMILARITY,
+)
 from app.utils import log_error, log_info, log_warning
+from app.vector_index import VectorIndex, create_embedder
+
+
+@dataclass(frozen=True, slots=True)
+class MenuItemEntry:
+    id: int
+    name: str
+    description: str | None
+    # Price as presented: the amount, the options of an item priced per option or a placeholder
+    price: str
+    allergens: str
+    options: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        data = {
+            'nazwa': self.name,
+            'opis': self.description,
+            'alergeny': self.allergens,
+            'cena': self.price,
+        }
+        if self.options:
+            data['opcje'] = self.options
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class SpecialOfferEntry:
+    name: str
+    description: str
+    price: str | None = None
+    details: str | None = None
+    validity: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        data = {'nazwa': self.name, 'opis': self.description}
+        if self.price:
+            data['cena'] = self.price
+        if self.details:
+            data['szczegóły'] = self.details
+        if self.validity:
+            data['ważność'] = self.validity
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class FaqEntry:
+    question: str
+    answer: str
+
+    def as_dict(self) -> dict[str, str]:
+        return {'pytanie': self.question, 'odpowiedź': self.answer}
+
+
+@dataclass(frozen=True, slots=True)
+class TextBlock:
+    """Rendered markdown of a part of the knowledge base, kept both as text and UTF-8 bytes."""
+
+    text: str
+    data: bytes
+
+    @classmethod
+    def from_lines(cls, lines: list[str]) -> 'TextBlock':
+        text = '\n'.join(lines)
+        return cls(text, text.encode('utf-8'))
+
+    @classmethod
+    def join(cls, blocks: list['TextBlock']) -> 'TextBlock':
+        return cls('\n'.join(block.text for block in blocks), b'\n'.join(b.data for b in blocks))
+
+
+@dataclass(frozen=True, slots=True)
+class KnowledgeSnapshot:
+    """The knowledge base data at given section generations, replaced as a whole on refresh.
+
+    Snapshots hold no ORM objects and cannot be modified, so they are shared between threads.
+    """
+
+    generations: Mapping[str, int]
+    restaurant_info: Mapping[str, Any] | None
+    menu: Mapping[str, tuple[MenuItemEntry, ...]]
+    special_offers: tuple[SpecialOfferEntry, ...]
+    faq: tuple[FaqEntry, ...]
+    chunks: Mapping[str, tuple[KnowledgeChunk, ...]]
+    # Rendered sections (None when empty) and menu categories, joined into the full context
+    blocks: Mapping[str, TextBlock | None]
+    menu_blocks: Mapping[str, TextBlock]
+    full_context: TextBlock
+    menu_index: MenuNameIndex[MenuItemEntry]
+
+
+# Loads a section from the database, and splits the loaded section into retrieval chunks
+SectionLoader = tuple[Callable[[Session], Any], Callable[[Any], tuple[KnowledgeChunk, ...]]]
 
 
 class KnowledgeBase:
-    def __init__(self, db_session: Session):
-        self.db = db_session
-        self.restaurant_info: dict[str, Any] | None = None
-        self.menu: dict[str, list[dict[str, Any]]] = {}
-        self.special_offers: list[dict[str, Any]] = []
-        self.faq: list[dict[str, str]] = []
-        self._load_data()
-
-    def _load_data(self):
+    """Knowledge base read from the database, refreshed when CRUD writes bump a generation.
+
+    Readers take the current snapshot without locking. The first reader noticing a newer
+    generation reloads the stale sections and swaps the snapshot in, readers arriving during
+    the reload keep using the previous snapshot.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._refresh_lock = threading.Lock()
+        self._retriever_lock = threading.Lock()
+        self._retriever: tuple[KnowledgeSnapshot, KnowledgeRetriever] | None = None
+        self._vector_index: VectorIndex | None = None
         log_info('Loading data from database into KnowledgeBase...')
-        self._load_restaurant_info()
-        self._load_menu()
-        self._load_special_offers()
-        self._load_faq()
+        self._snapshot = self._build_snapshot(None)
         log_info('Data loaded successfully into KnowledgeBase from database.')
 
-    def _load_restaurant_info(self):
-        info = self.db.query(RestaurantInfoDB).first()
-        if info:
-            self.restaurant_info = {
-                'Nazwa Restauracji': info.name,
-                'Adres': info.address,
-                'Godziny Otwarcia': {
-                    'Poniedziałek - Piątek': info.opening_hours_weekday,
-                    'Sobota - Niedziela': info.opening_hours_weekend,
-                },
-                'Telefon': info.phone,
-                'Email': info.email,
-                'Strona WWW': info.website,
-                'Rodzaj kuchni': info.cuisine_type,
-                'Akceptowane formy płatności': info.payment_methods,
-                'Dostępność parkingu': 'Tak' if info.parking_available else 'Nie',
-                'Ogródek letni': 'Tak' if info.summer_garden_available else 'Nie',
-                'Rezerwacje': info.reservations_info,
+    def _build_snapshot(self, previous: KnowledgeSnapshot | None) -> KnowledgeSnapshot:
+        # Read before loading, a write racing with the load is picked up by the next refresh
+        current = generations.snapshot()
+        stale = [
+            section
+            for section in SECTIONS
+            if previous is None or previous.generations[section] != current[section]
+        ]
+        data: dict[str, Any] = {}
+        if previous is not None:
+            data = {
+                RESTAURANT_INFO: previous.restaurant_info,
+                MENU: previous.menu,
+                SPECIAL_OFFERS: previous.special_offers,
+                FAQ: previous.faq,
             }
-        else:
-            log_warning('Restaurant info not found in the database for KnowledgeBase.')
-
-    def _load_menu(self):
-        categories = self.db.query(MenuCategoryDB).all()
-        if not categories:
-            log_warning('No menu categories found in the database for KnowledgeBase.')
-        for category in categories:
-            items_data = []
-            for item in category.items:
-                allergens = [allergen.name for allergen in item.allergens]
-                item_dict = {
-                    'nazwa': item.name,
-                    'opis': item.description,
-                    'alergeny': ', '.join(allergens) if allergens else '-',
-                }
+        chunks = dict(previous.chunks) if previous else {}
+        blocks = dict(previous.blocks) if previous else {}
+        menu_blocks = previous.menu_blocks if previous else MappingProxyType({})
+        menu_index = previous.menu_index if previous else None
+        loaders: dict[str, SectionLoader] = {
+            RESTAURANT_INFO: (load_restaurant_info, restaurant_info_chunks),
+            MENU: (load_menu, menu_chunks),
+            SPECIAL_OFFERS: (load_special_offers, special_offer_chunks),
+            FAQ: (load_faq, faq_chunks),
+        }
+        # The session only lives for the load, the snapshot keeps no ORM objects
+        with self.session_factory() as db:
+            for section in stale:
+                load, to_chunks = loaders[section]
+                data[section] = load(db)
+                chunks[section] = to_chunks(data[section])
+                if section == MENU:
+                    menu_blocks = MappingProxyType(render_menu_categories(data[MENU]))
+                    menu_index = MenuNameIndex(
+                        [item for items in data[MENU].values() for item in items]
+                    )
+                blocks[section] = render_section(section, data[section], menu_blocks)
+        if previous is not None:
+            log_info('KnowledgeBase sections reloaded: %s', ', '.join(stale))
+        # Built with the menu, which the first snapshot always loads
+        assert menu_index is not None
+        return KnowledgeSnapshot(
+            generations=MappingProxyType(current),
+            restaurant_info=data[RESTAURANT_INFO],
+            menu=data[MENU],
+            special_offers=data[SPECIAL_OFFERS],
+            faq=data[FAQ],
+            chunks=MappingProxyType(chunks),
+            blocks=MappingProxyType(blocks),
+            menu_blocks=menu_blocks,
+            menu_index=menu_index,
+            full_context=TextBlock.join(
+                [block for section in SECTIONS if (block := blocks[section]) is not None]
+            ),
+        )
 
-                if item.price is not None and item.price > 0:
-                    item_dict['cena'] = f'{item.price:.2f} PLN'
-                    if item.options:
-                        item_dict['opcje'] = item.options
-                elif item.options:
-                    item_dict['cena'] = item.options
-                else:
-                    item_dict['cena'] = 'Zapytaj obsługę'
-
-                items_data.append(item_dict)
-            self.menu[category.name] = items_data
-
-    def _load_special_offers(self):
-        offers = self.db.query(SpecialOfferDB).all()
-        if not offers:
-            log_info('No special offers found in the database. This might be normal.')
-        for offer in offers:
-            offer_dict = {
-                'nazwa': offer.title,
-                'opis': offer.description,
-            }
-            if offer.price_info:
-                offer_dict['cena'] = offer.price_info
-            if offer.details:
-                offer_dict['szczegóły'] = offer.details
-            if offer.validity:
-                offer_dict['ważność'] = offer.validity
-            self.special_offers.append(offer_dict)
-
-    def _load_faq(self):
-        faqs = self.db.query(FaqDB).all()
-        if not faqs:
-            log_warning('No FAQs found in the database.')
-        for faq_item in faqs:
-            self.faq.append(
-                {
-                    'pytanie': faq_item.question,
-                    'odpowiedź': faq_item.answer,
-                }
-            )
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        """The current snapshot, reloading the sections written since it was built."""
+        snapshot = self._snapshot
+        if snapshot.generations == generations.snapshot():
+            return snapshot
+        if not self._refresh_lock.acquire(blocking=False):
+            return snapshot
+        try:
+            if self._snapshot.generations != generations.snapshot():
+                self._snapshot = self._build_snapshot(self._snapshot)
+            return self._snapshot
+        finally:
+            self._refresh_lock.release()
+
+    @property
+    def restaurant_info(self) -> Mapping[str, Any] | None:
+        return self.snapshot.restaurant_info
+
+    @property
+    def menu(self) -> Mapping[str, tuple[MenuItemEntry, ...]]:
+        return self.snapshot.menu
+
+    @property
+    def special_offers(self) -> tuple[SpecialOfferEntry, ...]:
+        return self.snapshot.special_offers
+
+    @property
+    def faq(self) -> tuple[FaqEntry, ...]:
+        return self.snapshot.faq
 
     def get_structured_data(self) -> dict[str, Any]:
+        """A copy of the knowledge base as plain dicts and lists."""
+        snapshot = self.snapshot
         return {
-            'restaurant_info': self.restaurant_info or {},
-            'menu': self.menu or {},
-            'special_offers': self.special_offers or [],
-            'faq': self.faq or [],
+            'restaurant_info': {
+                key: dict(value) if isinstance(value, Mapping) else value
+                for key, value in (snapshot.restaurant_info or {}).items()
+            },
+            'menu': {
+                category: [item.as_dict() for item in items]
+                for category, items in snapshot.menu.items()
+            },
+            'special_offers': [offer.as_dict() for offer in snapshot.special_offers],
+            'faq': [item.as_dict() for item in snapshot.faq],
         }
 
     def get_full_context_as_text(self) -> str:
-        # pylint: disable=too-many-branches
-        context_parts = []
-
-        if self.restaurant_info:
-            context_parts.append('## Informacje o Restauracji')
-            for key, value in self.restaurant_info.items():
-                if isinstance(value, dict):
-                    context_parts.append(f'*   **{key}**:')
-                    for sub_key, sub_value in value.items():
-                        context_parts.append(f'    *   {sub_key}: {sub_value}')
-                else:
-                    context_parts.append(f'*   **{key}**: {value}')
-            context_parts.append('\n')
-
-        if self.menu:
-            context_parts.append('## Menu')
-            for category, items in self.menu.items():
-                context_parts.append(f'### {category}')
-                for item in items:
-                    context_parts.append(f'*   **{item.get("nazwa")}**')
-                    if item.get('opis'):
-                        context_parts.append(f'    *   Opis: {item.get("opis")}')
-                    context_parts.append(f'    *   Cena: {item.get("cena")}')
-                    if item.get('alergeny') and item.get('alergeny') != '-':
-                        context_parts.append(f'    *   Alergeny: {item.get("alergeny")}')
-                    if item.get('opcje'):
-                        context_parts.append(f'    *   Opcje: {item.get("opcje")}')
-                context_parts.append('\n')
-
-        if self.special_offers:
-            context_parts.append('## Oferty Specjalne')
-            for offer in self.special_offers:
-                context_parts.append(f'*   **{offer.get("nazwa")}**')
-                context_parts.append(f'    *   Opis: {offer.get("opis")}')
-                if offer.get('cena'):
-                    context_parts.append(f'    *   Cena: {offer.get("cena")}')
-                if offer.get('szczegóły'):
-                    context_parts.append(f'    *   Szczegóły: {offer.get("szczegóły")}')
-                if offer.get('ważność'):
-                    context_parts.append(f'    *   Ważność: {offer.get("ważność")}')
-            context_parts.append('\n')
-
-        if self.faq:
-            context_parts.append('## FAQ - Często Zadawane Pytania')
-            for item in self.faq:
-                context_parts.append(f'*   **Pytanie**: {item.get("pytanie")}')
-                context_parts.append(f'    *   **Odpowiedź**: {item.get("odpowiedź")}')
-            context_parts.append('\n')
-
-        return '\n'.join(context_parts)
+        return self.snapshot.full_context.text
+
+    def get_full_context_as_bytes(self) -> bytes:
+        return self.snapshot.full_context.data
+
+    def get_section_block(self, section: str) -> TextBlock | None:
+        """The rendered text of one section, None when the section is empty."""
+        return self.snapshot.blocks[section]
+
+    def get_menu_category_block(self, category: str) -> TextBlock | None:
+        return self.snapshot.menu_blocks.get(category)
+
+    def find_menu_items(self, name: str, limit: int = 5) -> list[MenuItemEntry]:
+        """Menu items whose name matches `name`, tolerating accents and misspellings."""
+        return [item for item, _ in self.snapshot.menu_index.search(name, limit)]
+
+    def get_chunks(self) -> list[KnowledgeChunk]:
+        """Split the knowledge base into the chunks indexed for retrieval."""
+        chunks = self.snapshot.chunks
+        return [chunk for section in SECTIONS for chunk in chunks[section]]
+
+    def build_vector_index(self, chunks: list[KnowledgeChunk]) -> VectorIndex:
+        """Load the persisted vector index and embed the chunks that changed since it was saved."""
+        if self._vector_index is None:
+            self._vector_index = VectorIndex(VECTOR_INDEX_DIR, create_embedder())
+        self._vector_index.sync(chunks)
+        return self._vector_index
+
+    def _get_retriever(self) -> KnowledgeRetriever:
+        snapshot = self.snapshot
+        cached = self._retriever
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        # Like the snapshot, the retriever of the previous data serves during a rebuild
+        if not self._retriever_lock.acquire(blocking=cached is None):
+            return cached[1]  # type: ignore[index]
+        try:
+            if self._retriever is None or self._retriever[0] is not snapshot:
+                chunks = self.get_chunks()
+                vector_index = self.build_vector_index(chunks) if RETRIEVAL_MODE != 'bm25' else None
+                retriever = KnowledgeRetriever(
+                    chunks, vector_index, RETRIEVAL_MODE, VECTOR_MIN_SIMILARITY
+                )
+                self._retriever = (snapshot, retriever)
+            return self._retriever[1]
+        finally:
+            self._retriever_lock.release()
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> list[KnowledgeChunk]:
+        """Return the `top_k` chunks most relevant to the query."""
+        return self._get_retriever().search(query, top_k)
+
+
+def load_restaurant_info(db: Session) -> Mapping[str, Any] | None:
+    info = db.query(RestaurantInfoDB).first()
+    if not info:
+        log_warning('Restaurant info not found in the database for KnowledgeBase.')
+        return None
+    return MappingProxyType(
+        {
+            'Nazwa Restauracji': info.name,
+            'Adres': info.address,
+            'Godziny Otwarcia': MappingProxyType(
+                {
+                    'Poniedziałek - Piątek': info.opening_hours_weekday,
+                    'Sobota - Niedziela': info.opening_hours_weekend,
+                }
+            ),
+            'Telefon': info.phone,
+            'Email': info.email,
+            'Strona WWW': info.website,
+            'Rodzaj kuchni': info.cuisine_type,
+            'Akceptowane formy płatności': info.payment_methods,
+            'Dostępność parkingu': 'Tak' if info.parking_available else 'Nie',
+            'Ogródek letni': 'Tak' if info.summer_garden_available else 'Nie',
+            'Rezerwacje': info.reservations_info,
+        }
+    )
+
+
+def menu_item_entry(item: MenuItemDB) -> MenuItemEntry:
+    item_id, name = cast(int, item.id), cast(str, item.name)
+    description = cast(str | None, item.description)
+    price, options = cast(float | None, item.price), cast(str | None, item.options)
+    allergens = ', '.join(allergen.name for allergen in item.allergens) or '-'
+    if price is not None and price > 0:
+        return MenuItemEntry(
+            item_id, name, description, f'{price:.2f} PLN', allergens, options or None
+        )
+    return MenuItemEntry(item_id, name, description, options or 'Zapytaj obsługę', allergens)
+
+
+def load_menu(db: Session) -> Mapping[str, tuple[MenuItemEntry, ...]]:
+    # The whole menu graph in two queries (the categories, then their items joined with the
+    # allergens) instead of one lazy load per category and per item
+    categories = (
+        db.query(MenuCategoryDB)
+        .options(selectinload(MenuCategoryDB.items).joinedload(MenuItemDB.allergens))
+        .all()
+    )
+    if not categories:
+        log_warning('No menu categories found in the database for KnowledgeBase.')
+    return MappingProxyType(
+        {
+            cast(str, category.name): tuple(menu_item_entry(item) for item in category.items)
+            for category in categories
+        }
+    )
+
+
+def load_special_offers(db: Session) -> tuple[SpecialOfferEntry, ...]:
+    offers = db.query(SpecialOfferDB).all()
+    if not offers:
+        log_info('No special offers found in the database. This might be normal.')
+    return tuple(
+        SpecialOfferEntry(
+            cast(str, offer.title),
+            cast(str, offer.description),
+            cast(str | None, offer.price_info) or None,
+            cast(str | None, offer.details) or None,
+            cast(str | None, offer.validity) or None,
+        )
+        for offer in offers
+    )
+
+
+def load_faq(db: Session) -> tuple[FaqEntry, ...]:
+    faqs = db.query(FaqDB).all()
+    if not faqs:
+        log_warning('No FAQs found in the database.')
+    return tuple(
+        FaqEntry(cast(str, faq_item.question), cast(str, faq_item.answer)) for faq_item in faqs
+    )
+
+
+def restaurant_info_chunks(
+    restaurant_info: Mapping[str, Any] | None,
+) -> tuple[KnowledgeChunk, ...]:
+    return tuple(
+        KnowledgeChunk(
+            RESTAURANT_INFO,
+            key,
+            '\n'.join(['[Informacje o Restauracji]', *format_info_field(key, value)]),
+        )
+        for key, value in (restaurant_info or {}).items()
+    )
+
+
+def menu_chunks(menu: Mapping[str, tuple[MenuItemEntry, ...]]) -> tuple[KnowledgeChunk, ...]:
+    return tuple(
+        KnowledgeChunk(
+            MENU,
+            f'{category} {item.name}',
+            '\n'.join([f'[Menu: {category}]', *format_menu_item(item)]),
+        )
+        for category, items in menu.items()
+        for item in items
+    )
+
+
+def special_offer_chunks(
+    special_offers: tuple[SpecialOfferEntry, ...],
+) -> tuple[KnowledgeChunk, ...]:
+    return tuple(
+        KnowledgeChunk(
+            SPECIAL_OFFERS,
+            str(offer.name),
+            '\n'.join(['[Oferty Specjalne]', *format_special_offer(offer)]),
+        )
+        for offer in special_offers
+    )
+
+
+def faq_chunks(faq: tuple[FaqEntry, ...]) -> tuple[KnowledgeChunk, ...]:
+    return tuple(
+        KnowledgeChunk(FAQ, str(item.question), '\n'.join(['[FAQ]', *format_faq_entry(item)]))
+        for item in faq
+    )
+
+
+def render_menu_categories(menu: Mapping[str, tuple[MenuItemEntry, ...]]) -> dict[str, TextBlock]:
+    return {
+        category: TextBlock.from_lines(
+            [f'### {category}', *(line for item in items for line in format_menu_item(item)), '\n']
+        )
+        for category, items in menu.items()
+    }
+
+
+def render_section(
+    section: str, data: Any, menu_blocks: Mapping[str, TextBlock]
+) -> TextBlock | None:
+    """Render the markdown of a section of the full context, in the order it has there."""
+    if not data:
+        return None
+    if section == RESTAURANT_INFO:
+        lines = ['## Informacje o Restauracji']
+        for key, value in data.items():
+            lines.extend(format_info_field(key, value))
+    elif section == MENU:
+        return TextBlock.join([TextBlock.from_lines(['## Menu']), *menu_blocks.values()])
+    elif section == SPECIAL_OFFERS:
+        lines = ['## Oferty Specjalne']
+        for offer in data:
+            lines.extend(format_special_offer(offer))
+    else:
+        lines = ['## FAQ - Często Zadawane Pytania']
+        for item in data:
+            lines.extend(format_faq_entry(item))
+    lines.append('\n')
+    return TextBlock.from_lines(lines)
+
+
+def format_info_field(key: str, value: Any) -> list[str]:
+    if not isinstance(value, Mapping):
+        return [f'*   **{key}**: {value}']
+    lines = [f'*   **{key}**:']
+    for sub_key, sub_value in value.items():
+        lines.append(f'    *   {sub_key}: {sub_value}')
+    return lines
+
+
+def format_menu_item(item: MenuItemEntry) -> list[str]:
+    lines = [f'*   **{item.name}**']
+    if item.description:
+        lines.append(f'    *   Opis: {item.description}')
+    lines.append(f'    *   Cena: {item.price}')
+    if item.allergens and item.allergens != '-':
+        lines.append(f'    *   Alergeny: {item.allergens}')
+    if item.options:
+        lines.append(f'    *   Opcje: {item.options}')
+    return lines
+
+
+def format_special_offer(offer: SpecialOfferEntry) -> list[str]:
+    lines = [f'*   **{offer.name}**', f'    *   Opis: {offer.description}']
+    if offer.price:
+        lines.append(f'    *   Cena: {offer.price}')
+    if offer.details:
+        lines.append(f'    *   Szczegóły: {offer.details}')
+    if offer.validity:
+        lines.append(f'    *   Ważność: {offer.validity}')
+    return lines
+
+
+def format_faq_entry(item: FaqEntry) -> list[str]:
+    return [
+        f'*   **Pytanie**: {item.question}',
+        f'    *   **Odpowiedź**: {item.answer}',
+    ]
 
 
 # Global singleton instance for KnowledgeBase
@@ -176,16 +502,12 @@ def get_knowledge_base() -> KnowledgeBase:
     global _knowledge_base_instance
     if _knowledge_base_instance is None:
         log_info('Initializing KnowledgeBase singleton...')
-        db_session = SessionLocal()
         try:
-            if not db_session.query(RestaurantInfoDB).first():
-                log_warning('Database appears to be empty (no RestaurantInfo found).')
-
-            _knowledge_base_instance = KnowledgeBase(db_session=db_session)
-            log_info('KnowledgeBase singleton initialized.')
+            _knowledge_base_instance = KnowledgeBase()
         except Exception as e:
             log_error(f'Error initializing KnowledgeBase: {e}')
-            if db_session:
-                db_session.close()
             raise
+        if _knowledge_base_instance.restaurant_info is None:
+            log_warning('Database appears to be empty (no RestaurantInfo found).')
+        log_info('KnowledgeBase singleton initialized.')
     return _knowledge_base_instance
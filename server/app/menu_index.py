@@ -0,0 +1,234 @@
+"""
+In-memory fuzzy index of the menu item names.
+
+Names and descriptions are lowercased, stripped of diacritics and punctuation, and split into
+the character trigrams of their words. A query is scored against each item sharing a trigram
+with it by the trigram overlap with the name, the edit distance between the query and the name
+and, with a lower weight, the overlap with the description. Misspelled or partially transcribed
+names ("zurek", "pierogi rusky") still find their dish.
+
+Queries matching no name fall back to the phonetic keys of the names: the spelling of a query
+mangled by the transcription ("pie rogi rusky", "sharlotka", "gowompki") is reduced to roughly
+how it sounds in Polish and aligned with the keys regardless of word boundaries.
+"""
+
+import heapq
+import re
+from collections import Counter
+from collections.abc import Sequence
+from itertools import chain
+from typing import Generic, Protocol, TypeVar
+
+from app.retrieval import fold_diacritics
+
+NON_ALPHANUMERIC = re.compile(r'[^0-9a-z]+')
+
+# Matches scoring below the minimum, or below this fraction of the best match, are dropped
+MIN_SCORE = 0.5
+RELATIVE_CUTOFF = 0.8
+
+# Below this score the best spelling match is not trusted, phonetic matches are added
+CONFIDENT_SCORE = 0.8
+
+# Only the items sharing the most trigrams with the query, this many per result, are scored
+RERANK_FACTOR = 3
+
+# Weight of a match with the description instead of the name
+DESCRIPTION_WEIGHT = 0.5
+
+# Phonetic matches need this similarity, the keys of short queries match too easily otherwise
+PHONETIC_MIN_SCORE = 0.8
+PHONETIC_MIN_LENGTH = 4
+
+POLISH_LETTERS = str.maketrans(
+    {'ó': 'u', 'ł': 'w', 'ą': 'on', 'ę': 'en', 'ż': 'z', 'ź': 'z', 'ś': 's', 'ć': 'c', 'ń': 'n'}
+)
+
+# Spellings of the same sound, Polish ones and those of an English-minded transcription.
+# Voiced consonants are merged with their voiceless pairs, as they are pronounced at the end
+# of words and before voiceless consonants.
+PHONETIC_SPELLINGS = {
+    'szcz': 'sc', 'tsch': 'c', 'sch': 's', 'ch': 'h', 'sh': 's', 'zh': 's', 'rz': 's',
+    'sz': 's', 'cz': 'c', 'dz': 'c', 'tz': 'c', 'ts': 'c', 'ck': 'k', 'ph': 'f', 'th': 't',
+    'qu': 'kf', 'ie': 'i', 'ee': 'i', 'oo': 'u', 'ou': 'u', 'mp': 'np', 'mb': 'np',
+    'x': 'ks', 'y': 'i', 'j': 'i', 'w': 'f', 'v': 'f', 'b': 'p', 'd': 't', 'g': 'k', 'z': 's',
+    'q': 'k',
+}  # fmt: skip
+PHONETIC_PATTERN = re.compile('|'.join(sorted(PHONETIC_SPELLINGS, key=len, reverse=True)))
+REPEATED_LETTERS = re.compile(r'(.)\1+')
+
+
+class NamedItem(Protocol):
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def description(self) -> str | None: ...
+
+
+Item = TypeVar('Item', bound=NamedItem)
+
+
+def normalize(text: str) -> str:
+    return NON_ALPHANUMERIC.sub(' ', fold_diacritics(text.lower())).strip()
+
+
+def phonetic_key(text: str) -> str:
+    """Approximate Polish pronunciation of a text, without spaces and punctuation."""
+    words = NON_ALPHANUMERIC.sub(' ', fold_diacritics(text.lower().translate(POLISH_LETTERS)))
+    # Spelled per word, a digraph never spans two words ("kotlet schabowy" is not "ts")
+    key = ''.join(
+        PHONETIC_PATTERN.sub(lambda match: PHONETIC_SPELLINGS[match.group()], word)
+        for word in words.split()
+    )
+    return REPEATED_LETTERS.sub(r'\1', key)
+
+
+def substring_edit_distance(query: str, text: str) -> int:
+    """Edit distance between the query and its best matching substring of the text."""
+    previous = [0] * (len(text) + 1)
+    for i, char_query in enumerate(query, start=1):
+        current = [i]
+        for j, char_text in enumerate(text, start=1):
+            current.append(
+                min(
+                    previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_query != char_text)
+                )
+            )
+        previous = current
+    return min(previous)
+
+
+def trigrams(text: str) -> set[str]:
+    grams: set[str] = set()
+    for word in text.split():
+        padded = f' {word} '
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        previous = current
+    return previous[-1]
+
+
+def word_similarity(word: str, other: str) -> float:
+    return 1 - edit_distance(word, other) / max(len(word), len(other))
+
+
+def bigrams(text: str) -> set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class PhoneticIndex(Generic[Item]):
+    """Phonetic keys of the menu item names, indexed by their letter bigrams."""
+
+    def __init__(self, items: Sequence[Item]):
+        self.items = items
+        self.keys = [phonetic_key(item.name) for item in items]
+        self.postings: dict[str, list[int]] = {}
+        for position, key in enumerate(self.keys):
+            for gram in bigrams(key):
+                self.postings.setdefault(gram, []).append(position)
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[int, float]]:
+        """Return the positions of up to `limit` items sounding like the query, with scores."""
+        key = phonetic_key(query)
+        if len(key) < PHONETIC_MIN_LENGTH:
+            return []
+        grams = bigrams(key)
+        shared = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in grams))
+        # An edit removes at most two bigrams of the key, items sharing fewer cannot match
+        max_distance = int(len(key) * (1 - PHONETIC_MIN_SCORE))
+        min_shared = len(grams) - 2 * max_distance
+        scores = []
+        for position, count in shared.most_common(limit * RERANK_FACTOR):
+            if count < min_shared:
+                break
+            distance = substring_edit_distance(key, self.keys[position])
+            score = 1 - distance / len(key)
+            if score >= PHONETIC_MIN_SCORE:
+                scores.append((position, score))
+        return heapq.nlargest(limit, scores, key=lambda entry: entry[1])
+
+
+class MenuNameIndex(Generic[Item]):
+    """Trigram index over the names and descriptions of a fixed list of menu items."""
+
+    def __init__(self, items: Sequence[Item], phonetic: bool = True):
+        self.items = items
+        self.names = [normalize(item.name) for item in items]
+        self.name_words = [frozenset(name.split()) for name in self.names]
+        self.name_grams = [trigrams(name) for name in self.names]
+        self.postings: dict[str, list[int]] = {}
+        self.description_postings: dict[str, list[int]] = {}
+        # Words of the names by trigram, the edit distances are computed against these only
+        self.word_postings: dict[str, set[str]] = {}
+        for position, (item, grams) in enumerate(zip(items, self.name_grams, strict=True)):
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+            for gram in trigrams(normalize(item.description or '')):
+                self.description_postings.setdefault(gram, []).append(position)
+            for word in self.name_words[position]:
+                for gram in trigrams(word):
+                    self.word_postings.setdefault(gram, set()).add(word)
+        self.phonetic = PhoneticIndex(items) if phonetic else None
+
+    def _closest_words(self, query_word: str) -> dict[str, float]:
+        """Edit similarity of a query word with the name words sharing a trigram with it."""
+        words: set[str] = set()
+        for gram in trigrams(query_word):
+            words.update(self.word_postings.get(gram, ()))
+        return {word: word_similarity(query_word, word) for word in words}
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[Item, float]]:
+        """Return up to `limit` items matching the query, the best first, with their scores."""
+        normalized = normalize(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        # Number of trigrams each item shares with the query
+        shared = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in query_grams))
+        shared_description = Counter(
+            chain.from_iterable(self.description_postings.get(gram, ()) for gram in query_grams)
+        )
+
+        scores = {
+            position: DESCRIPTION_WEIGHT * count / len(query_grams)
+            for position, count in shared_description.items()
+        }
+        closest = [self._closest_words(word) for word in normalized.split()]
+        candidates = heapq.nlargest(limit * RERANK_FACTOR, shared.items(), key=lambda e: e[1])
+        for position, count in candidates:
+            name, words = self.names[position], self.name_words[position]
+            score = 2 * count / (len(query_grams) + len(self.name_grams[position]))
+            if normalized in name:
+                # Substring matches, the former ILIKE results, rank above fuzzy ones
+                score = max(score, 0.5 + 0.5 * len(normalized) / len(name))
+            # Mean similarity of the query words with their closest word of the name
+            similarity = sum(
+                max((similarities.get(word, 0.0) for word in words), default=0.0)
+                for similarities in closest
+            ) / len(closest)
+            scores[position] = max(score, similarity, scores.get(position, 0.0))
+
+        if self.phonetic is not None and max(scores.values(), default=0.0) < CONFIDENT_SCORE:
+            for position, score in self.phonetic.search(query, limit):
+                scores[position] = max(score, scores.get(position, 0.0))
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+        if not best:
+            return []
+        threshold = max(MIN_SCORE, best[0][1] * RELATIVE_CUTOFF)
+        return [(self.items[position], score) for position, score in best if score >= threshold]
@@ -0,0 +1,70 @@
+"""
+Upgrades of the schema of existing databases.
+
+`Base.metadata.create_all` creates the missing tables but leaves the existing ones as they are.
+The columns added to a table after a database was created are added here and backfilled, so the
+orders and bookings of the database are kept. Every step first checks the columns of its table,
+the upgrade runs on every start of the server and on every sync of the data.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, inspect, text
+
+from app.database import engine
+from app.utils import log_info
+
+
+@dataclass(frozen=True)
+class AddedColumn:
+    table: str
+    column: str
+    type: str
+    # Fills the column of the existing rows
+    backfill: str
+
+
+# In the order of the upgrades, a backfill may use the columns added before it
+ADDED_COLUMNS = (
+    AddedColumn(
+        'order_items',
+        'unit_price',
+        'FLOAT',
+        # The price of the menu item when the order was placed is lost, use the current one
+        'UPDATE order_items SET unit_price = ('
+        'SELECT price FROM menu_items WHERE menu_items.id = order_items.menu_item_id) '
+        'WHERE unit_price IS NULL',
+    ),
+    AddedColumn(
+        'orders',
+        'total',
+        'FLOAT',
+        # Items without a price do not count towards the total, as in `create_order`
+        'UPDATE orders SET total = ('
+        'SELECT COALESCE(SUM(unit_price * quantity), 0) FROM order_items '
+        'WHERE order_items.order_id = orders.id) '
+        'WHERE total IS NULL',
+    ),
+)
+
+
+def upgrade_schema(bind: Engine = engine) -> list[str]:
+    """Add and backfill the missing columns of the existing tables, returns the ones added."""
+    added = []
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for step in ADDED_COLUMNS:
+            if step.table not in tables:
+                # Created with all its columns by `create_all`
+                continue
+            columns = {column['name'] for column in inspector.get_columns(step.table)}
+            if step.column in columns:
+                continue
+            connection.execute(
+                text(f'ALTER TABLE {step.table} ADD COLUMN {step.column} {step.type}')
+            )
+            connection.execute(text(step.backfill))
+            added.append(f'{step.table}.{step.column}')
+            log_info(f'Added the column {step.table}.{step.column} to the database.')
+    return added
@@ -116,6 +116,8 @@ class OrderItemDB(Base):
     order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
     menu_item_id = Column(Integer, ForeignKey('menu_items.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
+    # Price of the menu item when the order was placed
+    unit_price = Column(Float, nullable=True)
     special_requests = Column(Text, nullable=True)
 
     order = relationship('OrderDB', back_populates='items')
@@ -130,6 +132,7 @@ class OrderDB(Base):
     created_at = Column(String, nullable=False)
     updated_at = Column(String, nullable=False)
     notes = Column(Text, nullable=True)
+    total = Column(Float, nullable=True)
 
     items = relationship('OrderItemDB', back_populates='order', cascade='all, delete-orphan')
 
@@ -268,6 +271,7 @@ class OrderItemCreate(OrderItemBase):
 
 class OrderItem(OrderItemBase):
     id: int
+    unit_price: float | None = None
     # menu_item: MenuItem # Future enhancement: include full menu item details
 
 
@@ -290,4 +294,5 @@ class Order(OrderBase):
     status: OrderStatusEnum
     created_at: str
     updated_at: str
+    total: float | None = None
     items: list[OrderItem] = []
@@ -0,0 +1,284 @@
+"""
+Outbound side of the voice websocket.
+
+Each connection sends from a dedicated writer task, so a slow client never stalls the agent
+stream or the TTS. Producers put messages on a bounded queue and the writer applies a few
+rules before sending them:
+
+* audio chunks are sent ahead of any other queued message,
+* a queued ``history.updated`` message is replaced by a newer one since both carry the whole
+  history,
+* consecutive ``history.item.delta`` messages for the same item are merged and a
+  ``history.snapshot`` supersedes the queued delta protocol messages before it,
+* the ``seq`` of delta protocol messages and the sequence number of binary audio frames are
+  assigned when they are sent, so merged or dropped messages never leave gaps.
+
+Markers queued with `after_audio` run a callback once the audio queued before them is sent.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.audio import OUTPUT_AUDIO_FRAME, encode_audio_frame
+from app.metrics import registry
+from app.serialization import MessageEncoder, encode_audio_event
+from app.settings import OUTBOUND_OVERFLOW_POLICY, OUTBOUND_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MERGE_POLICY = 'merge'
+DROP_POLICY = 'drop'
+WAIT_POLICY = 'wait'
+
+queue_depth = registry.gauge(
+    'websocket_outbound_queue_depth', 'Messages waiting in the outbound queues of all connections'
+)
+send_latency = registry.histogram(
+    'websocket_send_latency_seconds',
+    'Time from queueing an outbound message to the end of its send',
+)
+dropped_messages = registry.counter(
+    'websocket_outbound_dropped_total', 'Outbound messages dropped or superseded before being sent'
+)
+merged_messages = registry.counter(
+    'websocket_outbound_merged_total', 'Outbound messages merged into another queued message'
+)
+
+
+@dataclass
+class OutboundMessage:
+    payload: dict
+    sequenced: bool = False
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class OutboundAudio:
+    stream_id: int
+    pcm: bytes
+    binary: bool
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class OutboundMarker:
+    callback: Callable[[], None]
+
+
+class WebsocketWriter:
+    """Sends the outbound messages of one websocket from its own task.
+
+    At most `max_size` messages are queued. When the queue is full the `overflow_policy`
+    decides what happens: ``merge`` concatenates the queued audio chunks of each response,
+    ``drop`` discards the oldest queued audio chunk and ``wait`` blocks the producer. The
+    producer also waits when there is no audio left to merge or drop.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int = OUTBOUND_QUEUE_SIZE,
+        overflow_policy: str = OUTBOUND_OVERFLOW_POLICY,
+    ):
+        self.websocket = websocket
+        self.max_size = max(max_size, 1)
+        self.overflow_policy = overflow_policy
+        self.seq = 0
+        self.audio_seq = 0
+        self.closed = False
+        self.encoder = MessageEncoder()
+        self._audio: deque[OutboundAudio | OutboundMarker] = deque()
+        self._messages: deque[OutboundMessage] = deque()
+        self._queued_history: OutboundMessage | None = None
+        self._audio_stream_id: int | None = None
+        self._reported_depth = 0
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._audio) + len(self._messages)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the writer, messages still queued are discarded."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._shutdown()
+
+    def _shutdown(self):
+        self.closed = True
+        self._audio.clear()
+        self._messages.clear()
+        self._queued_history = None
+        self._update_depth()
+        self._space.set()
+
+    def _update_depth(self):
+        queue_depth.inc(self.depth - self._reported_depth)
+        self._reported_depth = self.depth
+
+    def _merge_audio(self) -> int:
+        """Concatenate the adjacent queued audio chunks of the same stream."""
+        merged: deque[OutboundAudio | OutboundMarker] = deque()
+        for chunk in self._audio:
+            last = merged[-1] if merged else None
+            if (
+                isinstance(last, OutboundAudio)
+                and isinstance(chunk, OutboundAudio)
+                and last.stream_id == chunk.stream_id
+                and last.binary == chunk.binary
+            ):
+                last.pcm += chunk.pcm
+            else:
+                merged.append(chunk)
+        count = len(self._audio) - len(merged)
+        self._audio = merged
+        if count:
+            merged_messages.inc(count, kind='audio')
+        return count
+
+    def drop_audio(self):
+        """Discard the queued audio, e.g. when the response it belongs to was interrupted."""
+        if self._audio:
+            count = sum(isinstance(chunk, OutboundAudio) for chunk in self._audio)
+            dropped_messages.inc(count, kind='audio', reason='cancelled')
+            self._audio.clear()
+            self._update_depth()
+            self._space.set()
+
+    def _drop_oldest_audio(self) -> bool:
+        for chunk in self._audio:
+            if isinstance(chunk, OutboundAudio):
+                self._audio.remove(chunk)
+                dropped_messages.inc(kind='audio', reason='overflow')
+                self._update_depth()
+                return True
+        return False
+
+    async def _reserve(self):
+        while self.depth >= self.max_size and not self.closed:
+            if self.overflow_policy == MERGE_POLICY and self._merge_audio():
+                self._update_depth()
+                continue
+            if self.overflow_policy == DROP_POLICY and self._drop_oldest_audio():
+                continue
+            self._space.clear()
+            await self._space.wait()
+
+    def _coalesce(self, payload: dict) -> bool:
+        """Fold the payload into a queued message, return whether it was absorbed."""
+        message_type = payload['type']
+        if message_type == 'history.updated' and self._queued_history is not None:
+            self._queued_history.payload = payload
+            dropped_messages.inc(kind='message', reason='superseded')
+            return True
+
+        if message_type == 'history.item.delta' and self._messages:
+            last = self._messages[-1].payload
+            if last['type'] == 'history.item.delta' and last['index'] == payload['index']:
+                last['delta'] += payload['delta']
+                merged_messages.inc(kind='message')
+                return True
+
+        if message_type == 'history.snapshot':
+            superseded = sum(message.sequenced for message in self._messages)
+            if superseded:
+                self._messages = deque(m for m in self._messages if not m.sequenced)
+                dropped_messages.inc(superseded, kind='message', reason='superseded')
+                self._update_depth()
+        return False
+
+    async def send_json(self, payload: dict, sequenced: bool = False):
+        """Queue a JSON message, `sequenced` messages get the next ``seq`` when sent."""
+        if self.closed or self._coalesce(payload):
+            return
+        await self._reserve()
+        if self.closed:
+            return
+        message = OutboundMessage(payload, sequenced)
+        if payload['type'] == 'history.updated':
+            self._queued_history = message
+        self._messages.append(message)
+        self._update_depth()
+        self._ready.set()
+
+    async def send_audio(self, stream_id: int, pcm: bytes, binary: bool):
+        """Queue PCM16 audio of an output stream, sent as a binary frame or a JSON event."""
+        if self.closed:
+            return
+        await self._reserve()
+        if self.closed:
+            return
+        self._audio.append(OutboundAudio(stream_id, pcm, binary))
+        self._update_depth()
+        self._ready.set()
+
+    def after_audio(self, callback: Callable[[], None]):
+        """Run `callback` once the audio queued so far is sent, unless it gets dropped."""
+        if self.closed:
+            return
+        self._audio.append(OutboundMarker(callback))
+        self._update_depth()
+        self._ready.set()
+
+    async def _write(self, item: OutboundAudio | OutboundMessage):
+        if isinstance(item, OutboundMessage):
+            if item.sequenced:
+                self.seq += 1
+                item.payload['seq'] = self.seq
+            await self.websocket.send_text(self.encoder.encode(item.payload))
+        elif item.binary:
+            if item.stream_id != self._audio_stream_id:
+                self._audio_stream_id = item.stream_id
+                self.audio_seq = 0
+            self.audio_seq += 1
+            await self.websocket.send_bytes(
+                encode_audio_frame(OUTPUT_AUDIO_FRAME, item.stream_id, self.audio_seq, item.pcm)
+            )
+        else:
+            await self.websocket.send_text(encode_audio_event(item.pcm))
+
+    async def _run(self):
+        try:
+            while True:
+                if not self.depth:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                item: OutboundAudio | OutboundMarker | OutboundMessage
+                if self._audio:
+                    item, kind = self._audio.popleft(), 'audio'
+                else:
+                    item, kind = self._messages.popleft(), 'message'
+                    if item is self._queued_history:
+                        self._queued_history = None
+                self._update_depth()
+                self._space.set()
+
+                if isinstance(item, OutboundMarker):
+                    item.callback()
+                    continue
+                await self._write(item)
+                send_latency.observe(time.perf_counter() - item.queued_at, kind=kind)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            # The client is gone, the receive loop ends the connection
+            pass
+        except Exception:
+            logger.exception('Outbound writer failed, closing the queue')
+        finally:
+            # Producers waiting for space must not block on a queue nobody drains
+            self._shutdown()
@@ -0,0 +1,161 @@
+"""
+Retrieval over the knowledge base.
+
+The knowledge base is split into chunks (an info field, a menu item, a special offer, an FAQ
+entry) indexed with BM25. Text is lowercased, stripped of diacritics and lightly stemmed by
+truncating words, which folds most Polish inflections ("pierogi", "pierogów") onto one term.
+The BM25 ranking can be fused with the ranking of the vector index (`app.vector_index`) by
+reciprocal rank fusion.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.vector_index import VectorIndex
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Words are truncated to this many characters, shorter words lose their last character
+STEM_LENGTH = 6
+
+RETRIEVAL_MODES = ('bm25', 'vector', 'hybrid')
+
+# Depth of each ranking fused in hybrid mode, as a multiple of the number of chunks returned
+HYBRID_CANDIDATES_FACTOR = 4
+
+STOPWORDS = frozenset(
+    {
+        # Polish, without diacritics
+        'a', 'aby', 'ale', 'albo', 'bez', 'by', 'byc', 'co', 'czy', 'dla', 'do', 'gdzie', 'i',
+        'ich', 'ile', 'jak', 'jaka', 'jaki', 'jakie', 'jest', 'juz', 'ktore', 'ktory', 'lub',
+        'ma', 'macie', 'mi', 'mnie', 'na', 'nie', 'o', 'od', 'oraz', 'po', 'przy', 'sa', 'sie',
+        'ta', 'tak', 'te', 'ten', 'to', 'u', 'w', 'we', 'z', 'za', 'ze',
+        # English
+        'an', 'and', 'are', 'can', 'does', 'for', 'have', 'how', 'in', 'is', 'it', 'of',
+        'on', 'or', 'the', 'there', 'what', 'when', 'where', 'which', 'with', 'you',
+    }
+)  # fmt: skip
+
+
+def fold_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text.replace('ł', 'l').replace('Ł', 'L'))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token: str) -> str:
+    if len(token) <= 3 or token.isdigit():
+        return token
+    return token[: min(len(token) - 1, STEM_LENGTH)]
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into the normalized terms used by the index."""
+    tokens = TOKEN_PATTERN.findall(fold_diacritics(text.lower()))
+    return [stem(token) for token in tokens if token not in STOPWORDS]
+
+
+@dataclass(frozen=True, slots=True)
+class KnowledgeChunk:
+    section: str
+    title: str
+    text: str
+
+
+class BM25Index:
+    """Okapi BM25 over tokenized documents, scored through an inverted index."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.size = len(documents)
+        average_length = sum(map(len, documents)) / self.size if self.size else 0.0
+
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, terms in enumerate(documents):
+            for term, frequency in Counter(terms).items():
+                self.postings.setdefault(term, []).append((doc_id, frequency))
+
+        self.idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        # Length normalization of each document, the denominator of the BM25 term weight
+        self.norms = [
+            k1 * (1 - b + b * len(terms) / average_length) if average_length else k1
+            for terms in documents
+        ]
+
+    def scores(self, query_terms: list[str]) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        for term in set(query_terms):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self.postings[term]:
+                weight = frequency * (self.k1 + 1) / (frequency + self.norms[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        return scores
+
+    def search(self, query_terms: list[str], top_k: int) -> list[tuple[int, float]]:
+        """Return the ids and scores of the `top_k` best matching documents."""
+        scores = self.scores(query_terms)
+        return heapq.nlargest(top_k, scores.items(), key=lambda entry: entry[1])
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> list[int]:
+    """Merge rankings of document ids, each document scoring 1 / (k + rank) per ranking."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+class KnowledgeRetriever:
+    """Top-k chunk retrieval over a fixed set of knowledge base chunks.
+
+    In ``hybrid`` mode the BM25 ranking and the ranking of the vector index are fused, ``vector``
+    uses the vector index alone and ``bm25`` (or a retriever without vector index) BM25 alone.
+    """
+
+    def __init__(
+        self,
+        chunks: list[KnowledgeChunk],
+        vector_index: 'VectorIndex | None' = None,
+        mode: str = 'bm25',
+        min_similarity: float = 0.0,
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f'Unknown retrieval mode: {mode}')
+        self.chunks = chunks
+        self.index = BM25Index([tokenize(f'{chunk.title}\n{chunk.text}') for chunk in chunks])
+        self.vector_index = vector_index
+        self.mode = mode if vector_index is not None else 'bm25'
+        self.min_similarity = min_similarity
+        self._positions = {chunk: position for position, chunk in enumerate(chunks)}
+
+    def _lexical_ranking(self, query: str, top_k: int) -> list[int]:
+        return [doc_id for doc_id, _ in self.index.search(tokenize(query), top_k)]
+
+    def _vector_ranking(self, query: str, top_k: int) -> list[int]:
+        assert self.vector_index is not None
+        matches = self.vector_index.search(query, top_k, self.min_similarity)
+        return [self._positions[chunk] for chunk, _ in matches if chunk in self._positions]
+
+    def search(self, query: str, top_k: int) -> list[KnowledgeChunk]:
+        if self.mode == 'bm25':
+            ranking = self._lexical_ranking(query, top_k)
+        elif self.mode == 'vector':
+            ranking = self._vector_ranking(query, top_k)
+        else:
+            # Both rankings go deeper than top_k, a chunk ranked fairly by both can win
+            candidates = top_k * HYBRID_CANDIDATES_FACTOR
+            ranking = reciprocal_rank_fusion(
+                [self._lexical_ranking(query, candidates), self._vector_ranking(query, candidates)]
+            )
+        return [self.chunks[doc_id] for doc_id in ranking[:top_k]]
@@ -1,50 +1,54 @@
+import asyncio
+from dataclasses import asdict
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import (
-    create_allergen,
-    create_booking,
-    create_faq,
-    create_menu_category,
-    create_menu_item,
-    create_order,
-    create_restaurant_info,
-    create_special_offer,
-    delete_booking,
-    delete_faq,
-    delete_menu_item,
-    delete_order,
-    delete_restaurant_info,
-    delete_special_offer,
-    get_allergen_by_name,
-    get_allergens,
-    get_booking,
-    get_bookings,
-    get_bookings_by_date,
-    get_faq,
-    get_faqs,
-    get_first_restaurant_info,
-    get_menu_categories,
-    get_menu_category,
-    get_menu_category_by_name,
-    get_menu_item,
-    get_menu_items,
-    get_menu_items_by_category,
-    get_order,
-    get_orders,
-    get_restaurant_info,
-    get_special_offer,
-    get_special_offers,
-    update_booking,
-    update_booking_status,
-    update_faq,
-    update_menu_item,
-    update_order,
-    update_order_status,
-    update_restaurant_info,
-    update_special_offer,
+    create_allergen_async,
+    create_booking_async,
+    create_faq_async,
+    create_menu_category_async,
+    create_menu_item_async,
+    create_order_async,
+    create_restaurant_info_async,
+    create_special_offer_async,
+    delete_booking_async,
+    delete_faq_async,
+    delete_menu_item_async,
+    delete_order_async,
+    delete_restaurant_info_async,
+    delete_special_offer_async,
+    get_allergen_by_name_async,
+    get_allergens_async,
+    get_booking_async,
+    get_bookings_async,
+    get_bookings_by_date_async,
+    get_faq_async,
+    get_faqs_async,
+    get_first_restaurant_info_async,
+    get_menu_categories_async,
+    get_menu_category_async,
+    get_menu_category_by_name_async,
+    get_menu_item_async,
+    get_menu_items_async,
+    get_menu_items_by_category_async,
+    get_order_async,
+    get_orders_async,
+    get_restaurant_info_async,
+    get_special_offer_async,
+    get_special_offers_async,
+    update_booking_async,
+    update_booking_status_async,
+    update_faq_async,
+    update_menu_item_async,
+    update_order_async,
+    update_order_status_async,
+    update_restaurant_info_async,
+    update_special_offer_async,
 )
-from app.database import get_db
+from app.data_sync import sync_data_file
+from app.database import get_async_db
 from app.models import (
     Allergen,
     AllergenCreate,
@@ -67,6 +71,7 @@ from app.models import (
     SpecialOffer,
     SpecialOfferCreate,
 )
+from app.settings import DATA_FILE_PATH
 
 router = APIRouter()
 
@@ -74,25 +79,29 @@ router = APIRouter()
 @router.post(
     '/restaurant-info/', response_model=RestaurantInfo, status_code=status.HTTP_201_CREATED
 )
-def create_restaurant_info_endpoint(info: RestaurantInfoCreate, db: Session = Depends(get_db)):
-    existing_info = get_first_restaurant_info(db)
+async def create_restaurant_info_endpoint(
+    info: RestaurantInfoCreate, db: AsyncSession = Depends(get_async_db)
+):
+    existing_info = await get_first_restaurant_info_async(db)
     if existing_info:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail='Restaurant info already exists. Use PUT to update.',
         )
-    return create_restaurant_info(db=db, info=info)
+    return await create_restaurant_info_async(db=db, info=info)
 
 
 @router.get('/restaurant-info/', response_model=RestaurantInfo | None)
-def read_restaurant_info_endpoint(db: Session = Depends(get_db)):
-    db_info = get_first_restaurant_info(db)
+async def read_restaurant_info_endpoint(db: AsyncSession = Depends(get_async_db)):
+    db_info = await get_first_restaurant_info_async(db)
     return db_info
 
 
 @router.get('/restaurant-info/{info_id}', response_model=RestaurantInfo)
-def read_single_restaurant_info_endpoint(info_id: int, db: Session = Depends(get_db)):
-    db_info = get_restaurant_info(db, info_id=info_id)
+async def read_single_restaurant_info_endpoint(
+    info_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    db_info = await get_restaurant_info_async(db, info_id=info_id)
     if db_info is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Restaurant info not found'
@@ -101,10 +110,10 @@ def read_single_restaurant_info_endpoint(info_id: int, db: Session = Depends(get
 
 
 @router.put('/restaurant-info/{info_id}', response_model=RestaurantInfo)
-def update_restaurant_info_endpoint(
-    info_id: int, info: RestaurantInfoCreate, db: Session = Depends(get_db)
+async def update_restaurant_info_endpoint(
+    info_id: int, info: RestaurantInfoCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    db_info = update_restaurant_info(db, info_id=info_id, info_update=info)
+    db_info = await update_restaurant_info_async(db, info_id=info_id, info_update=info)
     if db_info is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Restaurant info not found for updating'
@@ -113,8 +122,8 @@ def update_restaurant_info_endpoint(
 
 
 @router.delete('/restaurant-info/{info_id}', response_model=RestaurantInfo)
-def delete_restaurant_info_endpoint(info_id: int, db: Session = Depends(get_db)):
-    db_info = delete_restaurant_info(db, info_id=info_id)
+async def delete_restaurant_info_endpoint(info_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_info = await delete_restaurant_info_async(db, info_id=info_id)
     if db_info is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Restaurant info not found for deletion'
@@ -123,94 +132,111 @@ def delete_restaurant_info_endpoint(info_id: int, db: Session = Depends(get_db))
 
 
 @router.post('/menu-categories/', response_model=MenuCategory, status_code=status.HTTP_201_CREATED)
-def create_menu_category_endpoint(category: MenuCategoryCreate, db: Session = Depends(get_db)):
-    db_category = get_menu_category_by_name(db, name=category.name)
+async def create_menu_category_endpoint(
+    category: MenuCategoryCreate, db: AsyncSession = Depends(get_async_db)
+):
+    db_category = await get_menu_category_by_name_async(db, name=category.name)
     if db_category:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Menu category '{category.name}' already exists.",
         )
-    return create_menu_category(db=db, category=category)
+    return await create_menu_category_async(db=db, category=category)
 
 
 @router.get('/menu-categories/', response_model=list[MenuCategory])
-def read_menu_categories_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    categories = get_menu_categories(db, skip=skip, limit=limit)
+async def read_menu_categories_endpoint(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
+):
+    categories = await get_menu_categories_async(db, skip=skip, limit=limit)
     return categories
 
 
 @router.get('/menu-categories/{category_id}', response_model=MenuCategory)
-def read_single_menu_category_endpoint(category_id: int, db: Session = Depends(get_db)):
-    db_category = get_menu_category(db, category_id=category_id)
+async def read_single_menu_category_endpoint(
+    category_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    db_category = await get_menu_category_async(db, category_id=category_id)
     if db_category is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Menu category not found')
     return db_category
 
 
 @router.post('/allergens/', response_model=Allergen, status_code=status.HTTP_201_CREATED)
-def create_allergen_endpoint(allergen: AllergenCreate, db: Session = Depends(get_db)):
-    db_allergen = get_allergen_by_name(db, name=allergen.name)
+async def create_allergen_endpoint(
+    allergen: AllergenCreate, db: AsyncSession = Depends(get_async_db)
+):
+    db_allergen = await get_allergen_by_name_async(db, name=allergen.name)
     if db_allergen:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Allergen '{allergen.name}' already exists.",
         )
-    return create_allergen(db=db, allergen=allergen)
+    return await create_allergen_async(db=db, allergen=allergen)
 
 
 @router.get('/allergens/', response_model=list[Allergen])
-def read_allergens_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    allergens = get_allergens(db, skip=skip, limit=limit)
+async def read_allergens_endpoint(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
+):
+    allergens = await get_allergens_async(db, skip=skip, limit=limit)
     return allergens
 
 
 @router.post('/menu-items/', response_model=MenuItem, status_code=status.HTTP_201_CREATED)
-def create_menu_item_endpoint(item: MenuItemCreate, db: Session = Depends(get_db)):
-    category = get_menu_category(db, category_id=item.category_id)
+async def create_menu_item_endpoint(item: MenuItemCreate, db: AsyncSession = Depends(get_async_db)):
+    category = await get_menu_category_async(db, category_id=item.category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Menu category with id {item.category_id} not found.',
         )
-    return create_menu_item(db=db, item=item, category_id=item.category_id)
+    return await create_menu_item_async(db=db, item=item, category_id=item.category_id)
 
 
 @router.get('/menu-items/', response_model=list[MenuItem])
-def read_menu_items_endpoint(
-    skip: int = 0, limit: int = 100, category_id: int | None = None, db: Session = Depends(get_db)
+async def read_menu_items_endpoint(
+    skip: int = 0,
+    limit: int = 100,
+    category_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
     if category_id is not None:
-        category = get_menu_category(db, category_id=category_id)
+        category = await get_menu_category_async(db, category_id=category_id)
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f'Menu category with id {category_id} not found.',
             )
-        items = get_menu_items_by_category(db, category_id=category_id, skip=skip, limit=limit)
+        items = await get_menu_items_by_category_async(
+            db, category_id=category_id, skip=skip, limit=limit
+        )
     else:
-        items = get_menu_items(db, skip=skip, limit=limit)
+        items = await get_menu_items_async(db, skip=skip, limit=limit)
     return items
 
 
 @router.get('/menu-items/{item_id}', response_model=MenuItem)
-def read_single_menu_item_endpoint(item_id: int, db: Session = Depends(get_db)):
-    db_item = get_menu_item(db, item_id=item_id)
+async def read_single_menu_item_endpoint(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_item = await get_menu_item_async(db, item_id=item_id)
     if db_item is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Menu item not found')
     return db_item
 
 
 @router.put('/menu-items/{item_id}', response_model=MenuItem)
-def update_menu_item_endpoint(item_id: int, item: MenuItemCreate, db: Session = Depends(get_db)):
+async def update_menu_item_endpoint(
+    item_id: int, item: MenuItemCreate, db: AsyncSession = Depends(get_async_db)
+):
     if item.category_id:
-        category = get_menu_category(db, category_id=item.category_id)
+        category = await get_menu_category_async(db, category_id=item.category_id)
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f'Menu category with id {item.category_id} not found for update.',
             )
 
-    updated_item = update_menu_item(db, item_id=item_id, item_update=item)
+    updated_item = await update_menu_item_async(db, item_id=item_id, item_update=item)
     if updated_item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Menu item not found for updating'
@@ -219,8 +245,8 @@ def update_menu_item_endpoint(item_id: int, item: MenuItemCreate, db: Session =
 
 
 @router.delete('/menu-items/{item_id}', response_model=MenuItem)
-def delete_menu_item_endpoint(item_id: int, db: Session = Depends(get_db)):
-    deleted_item = delete_menu_item(db, item_id=item_id)
+async def delete_menu_item_endpoint(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_item = await delete_menu_item_async(db, item_id=item_id)
     if deleted_item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Menu item not found for deletion'
@@ -229,34 +255,39 @@ def delete_menu_item_endpoint(item_id: int, db: Session = Depends(get_db)):
 
 
 @router.post('/bookings/', response_model=Booking, status_code=status.HTTP_201_CREATED)
-def create_booking_endpoint(booking: BookingCreate, db: Session = Depends(get_db)):
-    return create_booking(db=db, booking=booking)
+async def create_booking_endpoint(booking: BookingCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_booking_async(db=db, booking=booking)
 
 
 @router.get('/bookings/', response_model=list[Booking])
-def read_bookings_endpoint(
-    skip: int = 0, limit: int = 100, date: str | None = None, db: Session = Depends(get_db)
+async def read_bookings_endpoint(
+    skip: int = 0,
+    limit: int = 100,
+    date: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
     if date:
-        bookings = get_bookings_by_date(db, date=date, skip=skip, limit=limit)
+        bookings = await get_bookings_by_date_async(db, date=date, skip=skip, limit=limit)
     else:
-        bookings = get_bookings(db, skip=skip, limit=limit)
+        bookings = await get_bookings_async(db, skip=skip, limit=limit)
     return bookings
 
 
 @router.get('/bookings/{booking_id}', response_model=Booking)
-def read_single_booking_endpoint(booking_id: int, db: Session = Depends(get_db)):
-    db_booking = get_booking(db, booking_id=booking_id)
+async def read_single_booking_endpoint(booking_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_booking = await get_booking_async(db, booking_id=booking_id)
     if db_booking is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Booking not found')
     return db_booking
 
 
 @router.put('/bookings/{booking_id}', response_model=Booking)
-def update_booking_endpoint(
-    booking_id: int, booking_update: BookingUpdate, db: Session = Depends(get_db)
+async def update_booking_endpoint(
+    booking_id: int, booking_update: BookingUpdate, db: AsyncSession = Depends(get_async_db)
 ):
-    updated_booking = update_booking(db, booking_id=booking_id, booking_update=booking_update)
+    updated_booking = await update_booking_async(
+        db, booking_id=booking_id, booking_update=booking_update
+    )
     if updated_booking is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Booking not found for updating'
@@ -265,10 +296,12 @@ def update_booking_endpoint(
 
 
 @router.patch('/bookings/{booking_id}/status', response_model=Booking)
-def update_booking_status_endpoint(
-    booking_id: int, status_update: BookingStatusEnum, db: Session = Depends(get_db)
+async def update_booking_status_endpoint(
+    booking_id: int, status_update: BookingStatusEnum, db: AsyncSession = Depends(get_async_db)
 ):
-    updated_booking = update_booking_status(db, booking_id=booking_id, status=status_update)
+    updated_booking = await update_booking_status_async(
+        db, booking_id=booking_id, status=status_update
+    )
     if updated_booking is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Booking not found for status update'
@@ -277,8 +310,8 @@ def update_booking_status_endpoint(
 
 
 @router.delete('/bookings/{booking_id}', response_model=Booking)
-def delete_booking_endpoint(booking_id: int, db: Session = Depends(get_db)):
-    deleted_booking = delete_booking(db, booking_id=booking_id)
+async def delete_booking_endpoint(booking_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_booking = await delete_booking_async(db, booking_id=booking_id)
     if deleted_booking is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Booking not found for deletion'
@@ -287,29 +320,35 @@ def delete_booking_endpoint(booking_id: int, db: Session = Depends(get_db)):
 
 
 @router.post('/special-offers/', response_model=SpecialOffer, status_code=status.HTTP_201_CREATED)
-def create_special_offer_endpoint(offer: SpecialOfferCreate, db: Session = Depends(get_db)):
-    return create_special_offer(db=db, offer=offer)
+async def create_special_offer_endpoint(
+    offer: SpecialOfferCreate, db: AsyncSession = Depends(get_async_db)
+):
+    return await create_special_offer_async(db=db, offer=offer)
 
 
 @router.get('/special-offers/', response_model=list[SpecialOffer])
-def read_special_offers_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    offers = get_special_offers(db, skip=skip, limit=limit)
+async def read_special_offers_endpoint(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
+):
+    offers = await get_special_offers_async(db, skip=skip, limit=limit)
     return offers
 
 
 @router.get('/special-offers/{offer_id}', response_model=SpecialOffer)
-def read_single_special_offer_endpoint(offer_id: int, db: Session = Depends(get_db)):
-    db_offer = get_special_offer(db, offer_id=offer_id)
+async def read_single_special_offer_endpoint(
+    offer_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    db_offer = await get_special_offer_async(db, offer_id=offer_id)
     if db_offer is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Special offer not found')
     return db_offer
 
 
 @router.put('/special-offers/{offer_id}', response_model=SpecialOffer)
-def update_special_offer_endpoint(
-    offer_id: int, offer: SpecialOfferCreate, db: Session = Depends(get_db)
+async def update_special_offer_endpoint(
+    offer_id: int, offer: SpecialOfferCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    updated_offer = update_special_offer(db, offer_id=offer_id, offer_update=offer)
+    updated_offer = await update_special_offer_async(db, offer_id=offer_id, offer_update=offer)
     if updated_offer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Special offer not found for updating'
@@ -318,8 +357,8 @@ def update_special_offer_endpoint(
 
 
 @router.delete('/special-offers/{offer_id}', response_model=SpecialOffer)
-def delete_special_offer_endpoint(offer_id: int, db: Session = Depends(get_db)):
-    deleted_offer = delete_special_offer(db, offer_id=offer_id)
+async def delete_special_offer_endpoint(offer_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_offer = await delete_special_offer_async(db, offer_id=offer_id)
     if deleted_offer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Special offer not found for deletion'
@@ -328,27 +367,31 @@ def delete_special_offer_endpoint(offer_id: int, db: Session = Depends(get_db)):
 
 
 @router.post('/faqs/', response_model=Faq, status_code=status.HTTP_201_CREATED)
-def create_faq_endpoint(faq: FaqCreate, db: Session = Depends(get_db)):
-    return create_faq(db=db, faq=faq)
+async def create_faq_endpoint(faq: FaqCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_faq_async(db=db, faq=faq)
 
 
 @router.get('/faqs/', response_model=list[Faq])
-def read_faqs_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    faqs = get_faqs(db, skip=skip, limit=limit)
+async def read_faqs_endpoint(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
+):
+    faqs = await get_faqs_async(db, skip=skip, limit=limit)
     return faqs
 
 
 @router.get('/faqs/{faq_id}', response_model=Faq)
-def read_single_faq_endpoint(faq_id: int, db: Session = Depends(get_db)):
-    db_faq = get_faq(db, faq_id=faq_id)
+async def read_single_faq_endpoint(faq_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_faq = await get_faq_async(db, faq_id=faq_id)
     if db_faq is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='FAQ not found')
     return db_faq
 
 
 @router.put('/faqs/{faq_id}', response_model=Faq)
-def update_faq_endpoint(faq_id: int, faq: FaqCreate, db: Session = Depends(get_db)):
-    updated_faq = update_faq(db, faq_id=faq_id, faq_update=faq)
+async def update_faq_endpoint(
+    faq_id: int, faq: FaqCreate, db: AsyncSession = Depends(get_async_db)
+):
+    updated_faq = await update_faq_async(db, faq_id=faq_id, faq_update=faq)
     if updated_faq is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='FAQ not found for updating'
@@ -357,8 +400,8 @@ def update_faq_endpoint(faq_id: int, faq: FaqCreate, db: Session = Depends(get_d
 
 
 @router.delete('/faqs/{faq_id}', response_model=Faq)
-def delete_faq_endpoint(faq_id: int, db: Session = Depends(get_db)):
-    deleted_faq = delete_faq(db, faq_id=faq_id)
+async def delete_faq_endpoint(faq_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_faq = await delete_faq_async(db, faq_id=faq_id)
     if deleted_faq is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='FAQ not found for deletion'
@@ -367,27 +410,37 @@ def delete_faq_endpoint(faq_id: int, db: Session = Depends(get_db)):
 
 
 @router.post('/orders/', response_model=Order, status_code=status.HTTP_201_CREATED)
-def create_order_endpoint(order: OrderCreate, db: Session = Depends(get_db)):
-    return create_order(db=db, order=order)
+async def create_order_endpoint(order: OrderCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await create_order_async(db=db, order=order)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
 
 
 @router.get('/orders/', response_model=list[Order])
-def read_orders_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = get_orders(db, skip=skip, limit=limit)
+async def read_orders_endpoint(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
+):
+    orders = await get_orders_async(db, skip=skip, limit=limit)
     return orders
 
 
 @router.get('/orders/{order_id}', response_model=Order)
-def read_single_order_endpoint(order_id: int, db: Session = Depends(get_db)):
-    db_order = get_order(db, order_id=order_id)
+async def read_single_order_endpoint(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order = await get_order_async(db, order_id=order_id)
     if db_order is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Order not found')
     return db_order
 
 
 @router.put('/orders/{order_id}', response_model=Order)
-def update_order_endpoint(order_id: int, order_update: OrderUpdate, db: Session = Depends(get_db)):
-    db_order = update_order(db, order_id=order_id, order_update=order_update)
+async def update_order_endpoint(
+    order_id: int, order_update: OrderUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        db_order = await update_order_async(db, order_id=order_id, order_update=order_update)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
     if db_order is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Order not found for updating'
@@ -396,10 +449,10 @@ def update_order_endpoint(order_id: int, order_update: OrderUpdate, db: Session
 
 
 @router.patch('/orders/{order_id}/status', response_model=Order)
-def update_order_status_endpoint(
-    order_id: int, status_update: OrderStatusEnum, db: Session = Depends(get_db)
+async def update_order_status_endpoint(
+    order_id: int, status_update: OrderStatusEnum, db: AsyncSession = Depends(get_async_db)
 ):
-    db_order = update_order_status(db, order_id=order_id, status=status_update)
+    db_order = await update_order_status_async(db, order_id=order_id, status=status_update)
     if db_order is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Order not found for status update'
@@ -408,10 +461,22 @@ def update_order_status_endpoint(
 
 
 @router.delete('/orders/{order_id}', response_model=Order)
-def delete_order_endpoint(order_id: int, db: Session = Depends(get_db)):
-    db_order = delete_order(db, order_id=order_id)
+async def delete_order_endpoint(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order = await delete_order_async(db, order_id=order_id)
     if db_order is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Order not found for deletion'
         )
     return db_order
+
+
+@router.post('/data/sync')
+async def sync_data_endpoint(dry_run: bool = False):
+    """Apply the differences between the data file and the database, see `app.data_sync`."""
+    # Run in the server process, so the knowledge base refreshes the changed sections
+    changes = await asyncio.to_thread(sync_data_file, str(DATA_FILE_PATH), dry_run)
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail='Data file could not be read'
+        )
+    return {'dry_run': dry_run, 'sections': changes.sections(), **asdict(changes)}
@@ -0,0 +1,168 @@
+"""
+JSON serialization of the websocket messages.
+
+`orjson` or `msgspec` is used when installed, with the standard library as the fallback. The
+`JSON_BACKEND` setting forces one of them. Every connection encodes its outbound messages with
+a `MessageEncoder` that reuses the encoding of the parts that do not change between messages:
+the history items already sent, the agent name and the other constant strings.
+"""
+
+import base64
+import json
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from app.settings import JSON_BACKEND
+
+
+def _stdlib_backend() -> tuple[Callable[[Any], str], Callable[[str | bytes], Any]]:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    return encoder.encode, json.loads
+
+
+def _orjson_backend() -> tuple[Callable[[Any], str], Callable[[str | bytes], Any]]:
+    import orjson  # pylint: disable=import-outside-toplevel
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    return dumps, orjson.loads
+
+
+def _msgspec_backend() -> tuple[Callable[[Any], str], Callable[[str | bytes], Any]]:
+    import msgspec  # pylint: disable=import-outside-toplevel
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> str:
+        return encoder.encode(obj).decode('utf-8')
+
+    return dumps, decoder.decode
+
+
+_BACKENDS = {'orjson': _orjson_backend, 'msgspec': _msgspec_backend, 'json': _stdlib_backend}
+
+
+def load_backend(name: str = 'auto') -> tuple[str, Callable[[Any], str], Callable[..., Any]]:
+    """Return the name, `dumps` and `loads` of a JSON backend, `auto` picks the fastest one."""
+    if name != 'auto':
+        return (name, *_BACKENDS[name]())
+    for candidate, factory in _BACKENDS.items():
+        try:
+            return (candidate, *factory())
+        except ImportError:
+            continue
+    raise RuntimeError('No JSON backend available')
+
+
+BACKEND, dumps, loads = load_backend(JSON_BACKEND)
+
+
+@lru_cache(maxsize=1024)
+def encode_constant(value: str) -> str:
+    """Encoding of a string that is sent over and over, e.g. a message type or an agent name."""
+    return dumps(value)
+
+
+# Fields of the audio delta events besides the audio itself, they never change
+_AUDIO_EVENT_PREFIX = '{"type":"response.audio.delta","delta":"'
+_AUDIO_EVENT_SUFFIX = (
+    '","output_index":0,"content_index":0,"item_id":"","response_id":"","event_id":""}'
+)
+
+
+def encode_audio_event(pcm: bytes) -> str:
+    """Encode a ``response.audio.delta`` event carrying base64 PCM16 audio."""
+    # Base64 never needs escaping, so the audio is spliced into the pre-encoded event
+    return _AUDIO_EVENT_PREFIX + base64.b64encode(pcm).decode('ascii') + _AUDIO_EVENT_SUFFIX
+
+
+# Fields whose value is one of a few strings sent over and over
+CONSTANT_FIELDS = frozenset({'type', 'reason', 'agent_name'})
+
+
+class MessageEncoder:
+    """Encodes the outbound messages of one connection.
+
+    The encoding of each history item is kept by its position in the history, along with the
+    joined encoding of the history without its last item, which is the part shared by the
+    consecutive ``history.updated`` messages of a streamed response. An item sent again at the
+    same position, in a ``history.updated`` or ``history.snapshot`` message or as the ``item`` of
+    a delta protocol message, is re-encoded only if it changed. Messages without history items
+    are encoded by the backend in one call.
+    """
+
+    def __init__(self):
+        self._items: list[Any] = []
+        self._encoded_items: list[str] = []
+        self._joined = ''
+        self._joined_count = 0
+
+    def _is_cached(self, index: int, item: Any) -> bool:
+        if index >= len(self._items):
+            return False
+        cached = self._items[index]
+        return cached is item or cached == item
+
+    def encode_item(self, index: int, item: Any) -> str:
+        if self._is_cached(index, item):
+            return self._encoded_items[index]
+        encoded = dumps(item)
+        if index < len(self._items):
+            self._truncate_joined(index)
+            self._items[index] = item
+            self._encoded_items[index] = encoded
+        elif index == len(self._items):
+            self._items.append(item)
+            self._encoded_items.append(encoded)
+        return encoded
+
+    def _truncate_joined(self, count: int):
+        """Keep the joined encoding of the first `count` items only."""
+        if count < self._joined_count:
+            length = sum(map(len, self._encoded_items[:count])) + max(count - 1, 0)
+            self._joined, self._joined_count = self._joined[:length], count
+
+    def _history_parts(self, inputs: list) -> list[str]:
+        if not inputs:
+            return ['[]']
+
+        head_count = len(inputs) - 1
+        valid_count = min(self._joined_count, head_count)
+        # List comparison checks identity before equality for each item, without a Python loop
+        if inputs[:valid_count] != self._items[:valid_count]:
+            valid_count = next(i for i in range(valid_count) if not self._is_cached(i, inputs[i]))
+        self._truncate_joined(valid_count)
+
+        parts = [self._joined] if self._joined_count else []
+        parts.extend(self.encode_item(i, inputs[i]) for i in range(self._joined_count, head_count))
+        self._joined, self._joined_count = ','.join(parts), head_count
+
+        tail = self.encode_item(head_count, inputs[-1])
+        return ['[', self._joined, ',', tail, ']'] if head_count else ['[', tail, ']']
+
+    def encode_history(self, inputs: list) -> str:
+        return ''.join(self._history_parts(inputs))
+
+    def encode(self, payload: dict) -> str:
+        if 'inputs' not in payload and 'item' not in payload:
+            return dumps(payload)
+
+        parts = ['{']
+        for key, value in payload.items():
+            if len(parts) > 1:
+                parts.append(',')
+            parts.append(encode_constant(key))
+            parts.append(':')
+            if key == 'inputs' and isinstance(value, list):
+                parts.extend(self._history_parts(value))
+            elif key == 'item' and isinstance(payload.get('index'), int):
+                parts.append(self.encode_item(payload['index'], value))
+            elif key in CONSTANT_FIELDS and isinstance(value, str):
+                parts.append(encode_constant(value))
+            else:
+                parts.append(dumps(value))
+        parts.append('}')
+        return ''.join(parts)
@@ -1,13 +1,18 @@
 # pylint: disable=line-too-long
 # ruff: noqa
 
+import os
 from pathlib import Path
 
 import yaml
+from dotenv import load_dotenv
 
 # Base directory of the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# When .env file is present, it will override the environment variables
+load_dotenv(dotenv_path=BASE_DIR.parent / '.env', override=True)
+
 # Path to the data file
 DATA_FILE_PATH = BASE_DIR / 'data' / 'data.json'
 
@@ -24,5 +29,89 @@ INFORMATION_AGENT_INSTRUCTIONS = _prompts['information_agent_instructions']
 ORDER_AGENT_INSTRUCTIONS = _prompts['order_agent_instructions']
 RESERVATION_AGENT_INSTRUCTIONS = _prompts['reservation_agent_instructions']
 
-# Database settings
-DATABASE_URL = 'sqlite:///../restaurant_data.db'
+# Voice pipeline settings, the models default to the Agents SDK defaults
+STT_MODEL = os.getenv('STT_MODEL') or None
+TTS_MODEL = os.getenv('TTS_MODEL') or None
+TTS_BUFFER_SIZE = 512
+
+# Audio settings
+AUDIO_SAMPLE_RATE = 24000
+MAX_UTTERANCE_SECONDS = 60
+INITIAL_AUDIO_BUFFER_SECONDS = 5
+
+# How incoming audio reaches the transcription model: "buffered" transcribes each committed
+# utterance, "streamed" pushes every chunk into a streaming transcription session as it arrives
+AUDIO_INPUT_MODE = os.getenv('AUDIO_INPUT_MODE', 'buffered')
+STREAMED_COMMIT_SILENCE_MS = 1000
+
+# Server-side voice activity detection, can also be enabled per connection with a
+# `session.update` message carrying `turn_detection: {"type": "server_vad", ...}`
+SERVER_VAD_ENABLED = os.getenv('SERVER_VAD_ENABLED', 'false').lower() == 'true'
+VAD_THRESHOLD_DB = float(os.getenv('VAD_THRESHOLD_DB', '-45'))
+VAD_FRAME_MS = 20
+VAD_MIN_SPEECH_MS = int(os.getenv('VAD_MIN_SPEECH_MS', '100'))
+VAD_SILENCE_DURATION_MS = int(os.getenv('VAD_SILENCE_DURATION_MS', '600'))
+VAD_PREFIX_PADDING_MS = int(os.getenv('VAD_PREFIX_PADDING_MS', '300'))
+
+# Outbound websocket queue, each connection sends from its own writer task. When a client falls
+# behind and the queue is full, "merge" concatenates the queued audio chunks of a response,
+# "drop" discards the oldest queued audio and "wait" blocks the producer until there is room
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', '256'))
+OUTBOUND_OVERFLOW_POLICY = os.getenv('OUTBOUND_OVERFLOW_POLICY', 'merge')
+
+# JSON library used for the websocket messages: "orjson", "msgspec", "json" or "auto" to pick
+# the first one installed in that order
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+# Where the per-turn latency spans go, a comma-separated list of "prometheus" (histograms served
+# on /metrics) and "log" (one JSON log line per turn)
+METRICS_SINKS = os.getenv('METRICS_SINKS', 'prometheus,log')
+
+# Blocking bodies of the agent tools run in a pool of TOOL_EXECUTOR_WORKERS threads, with at most
+# TOOL_EXECUTOR_QUEUE_SIZE more calls waiting for a thread; calls beyond that are rejected. Every
+# tool call is bounded by TOOL_TIMEOUT_SECONDS, or by its entry in TOOL_TIMEOUTS, a
+# comma-separated list of "tool_name=seconds". The tools writing to the database are not cancelled
+# past it, the call is reported as pending while the write finishes
+TOOL_EXECUTOR_WORKERS = int(os.getenv('TOOL_EXECUTOR_WORKERS', '4'))
+TOOL_EXECUTOR_QUEUE_SIZE = int(os.getenv('TOOL_EXECUTOR_QUEUE_SIZE', '16'))
+TOOL_TIMEOUT_SECONDS = float(os.getenv('TOOL_TIMEOUT_SECONDS', '10'))
+TOOL_TIMEOUTS = os.getenv('TOOL_TIMEOUTS', '')
+
+# Number of knowledge base chunks returned by the query_restaurant_database tool
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '5'))
+
+# How the chunks are retrieved: "bm25" (lexical), "vector" (FAISS index) or "hybrid" (both
+# rankings fused). Vector matches below VECTOR_MIN_SIMILARITY (cosine) are discarded
+RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'hybrid')
+VECTOR_MIN_SIMILARITY = float(os.getenv('VECTOR_MIN_SIMILARITY', '0.2'))
+
+# Embeddings of the vector index: "hashing" is computed locally (no network), "openai" uses the
+# EMBEDDING_MODEL of the OpenAI API. The index is persisted in VECTOR_INDEX_DIR
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'hashing')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+EMBEDDING_DIMENSION = int(os.getenv('EMBEDDING_DIMENSION', '512'))
+# Texts per embeddings request, the API accepts at most 2048 inputs per request
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '256'))
+VECTOR_INDEX_DIR = Path(os.getenv('VECTOR_INDEX_DIR', BASE_DIR.parent / 'vector_index'))
+
+# Database settings, the API routes and the agent tools use the same database through an async
+# driver: aiosqlite for SQLite, other backends need ASYNC_DATABASE_URL with an async driver
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///../restaurant_data.db')
+ASYNC_DATABASE_URL = os.getenv(
+    'ASYNC_DATABASE_URL', DATABASE_URL.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+)
+
+# Connection pool of each engine, ignored by in-memory SQLite databases
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+DATABASE_POOL_TIMEOUT = float(os.getenv('DATABASE_POOL_TIMEOUT', '30'))
+
+# Pragmas set on every SQLite connection. In WAL mode readers do not block the writer and
+# synchronous=NORMAL only syncs at checkpoints; a writer waits up to SQLITE_BUSY_TIMEOUT_MS for the
+# lock instead of failing with "database is locked". SQLITE_CACHE_SIZE is in pages, or in KiB
+# when negative. An empty value leaves the SQLite default
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')
+SQLITE_MMAP_SIZE = os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = os.getenv('SQLITE_CACHE_SIZE', '-65536')
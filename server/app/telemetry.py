@@ -0,0 +1,216 @@
+"""
+Per-turn latency spans of the voice pipeline.
+
+A turn starts when the user's input is complete. `TurnTimer` records when each stage of the
+turn is reached, relative to that moment, and the duration of the tool calls made by the
+agents. Finished turns are handed to the configured metrics sinks: ``prometheus`` aggregates
+them into histograms per stage and per agent served on ``/metrics``, ``log`` writes one JSON
+line per turn.
+"""
+
+import functools
+import inspect
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+from app.metrics import MetricsRegistry, registry
+from app.serialization import dumps
+from app.settings import METRICS_SINKS
+from app.utils import log_info
+
+AUDIO_RECEIVED = 'audio_received'
+STT_DONE = 'stt_done'
+FIRST_LLM_TOKEN = 'first_llm_token'
+FIRST_TTS_BYTE = 'first_tts_byte'
+LAST_AUDIO_SENT = 'last_audio_sent'
+RESPONSE_DONE = 'response_done'
+
+# Mode of the turns answering a text message
+TEXT_MODE = 'text'
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+
+
+@dataclass
+class ToolCallSpan:
+    tool: str
+    agent: str
+    start: float
+    duration: float
+    error: bool = False
+
+
+@dataclass
+class TurnRecord:
+    mode: str
+    agent: str
+    started_at: float
+    stages: dict[str, float] = field(default_factory=dict)
+    tool_calls: list[ToolCallSpan] = field(default_factory=list)
+    interrupted: bool = False
+
+
+class MetricsSink(ABC):
+    """Receives the finished turns."""
+
+    @abstractmethod
+    def record_turn(self, turn: TurnRecord):
+        """Record a finished turn."""
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregates the turns into histograms of the metrics registry."""
+
+    def __init__(self, metrics_registry: MetricsRegistry = registry):
+        self.turns = metrics_registry.counter('voice_turns_total', 'Voice assistant turns')
+        self.stage_latency = metrics_registry.histogram(
+            'voice_turn_stage_seconds',
+            'Time from the end of the user input to each stage of a turn',
+            buckets=LATENCY_BUCKETS,
+        )
+        self.tool_latency = metrics_registry.histogram(
+            'voice_tool_call_seconds', 'Duration of the tool calls', buckets=LATENCY_BUCKETS
+        )
+
+    def record_turn(self, turn: TurnRecord):
+        outcome = 'interrupted' if turn.interrupted else 'completed'
+        self.turns.inc(agent=turn.agent, mode=turn.mode, outcome=outcome)
+        for span in turn.tool_calls:
+            self.tool_latency.observe(span.duration, tool=span.tool, agent=span.agent)
+        if turn.interrupted:
+            # The later stages of an interrupted turn never happen, do not skew the latencies
+            return
+        for stage, seconds in turn.stages.items():
+            self.stage_latency.observe(seconds, stage=stage, agent=turn.agent, mode=turn.mode)
+
+
+class JsonLogSink(MetricsSink):
+    """Logs every turn as a JSON line."""
+
+    def record_turn(self, turn: TurnRecord):
+        log_info('Turn timings: %s', dumps(asdict(turn)))
+
+
+SINK_TYPES: dict[str, type[MetricsSink]] = {'prometheus': PrometheusSink, 'log': JsonLogSink}
+
+
+def create_metrics_sinks(names: str) -> list[MetricsSink]:
+    """Create the sinks of a comma-separated list of sink names."""
+    sinks = []
+    for name in filter(None, (name.strip() for name in names.split(','))):
+        if name not in SINK_TYPES:
+            raise ValueError(f'Unknown metrics sink: {name}')
+        sinks.append(SINK_TYPES[name]())
+    return sinks
+
+
+metrics_sinks: list[MetricsSink] = create_metrics_sinks(METRICS_SINKS)
+
+# Timer of the turn being answered, the tool calls of the agent run report to it
+current_timer: ContextVar['TurnTimer | None'] = ContextVar('current_timer', default=None)
+
+
+class TurnTimer:
+    """Records the latency spans of the turns of one connection.
+
+    The input of a turn is complete when the buffered audio is committed; in streamed mode it is
+    the last audio chunk received before the transcript. Text turns start with the transcript.
+    The timer is also the `transform_data` hook of the TTS settings, to catch the first byte.
+    """
+
+    def __init__(self, mode: str, sinks: list[MetricsSink] | None = None):
+        self.mode = mode
+        self.sinks = metrics_sinks if sinks is None else sinks
+        self.turn: TurnRecord | None = None
+        self.agent = ''
+        self._input_end: float | None = None
+        self._start = 0.0
+
+    def input_done(self):
+        self._input_end = time.perf_counter()
+
+    def transcript_done(self, agent_name: str):
+        """Start the spans of a new turn, an unfinished previous turn was interrupted."""
+        self.finish(interrupted=True)
+        now = time.perf_counter()
+        self._start = self._input_end or now
+        self.agent = agent_name
+        mode = self.mode if self._input_end is not None else TEXT_MODE
+        self.turn = TurnRecord(mode=mode, agent=agent_name, started_at=time.time())
+        if self._input_end is not None:
+            self.turn.stages[AUDIO_RECEIVED] = 0.0
+        self._input_end = None
+        self.mark(STT_DONE, now)
+
+    def mark(self, stage: str, now: float | None = None):
+        """Record the first time the current turn reaches `stage`."""
+        if self.turn is not None and stage not in self.turn.stages:
+            self.turn.stages[stage] = (now or time.perf_counter()) - self._start
+
+    def agent_changed(self, agent_name: str):
+        self.agent = agent_name
+
+    def tool_called(self, tool: str, start: float, duration: float, error: bool = False):
+        if self.turn is not None:
+            self.turn.tool_calls.append(
+                ToolCallSpan(tool, self.agent, start - self._start, duration, error)
+            )
+
+    def audio_sent(self):
+        """Called by the websocket writer once the last audio chunk of the turn is sent."""
+        self.mark(LAST_AUDIO_SENT)
+        self.finish()
+
+    def finish(self, interrupted: bool = False):
+        turn, self.turn = self.turn, None
+        if turn is None:
+            return
+        turn.agent = self.agent
+        turn.interrupted = interrupted
+        for sink in self.sinks:
+            sink.record_turn(turn)
+
+    def __call__(self, data):
+        self.mark(FIRST_TTS_BYTE)
+        return data
+
+
+def timed_tool(func: Callable) -> Callable:
+    """Report the duration of a function tool to the timer of the turn that called it."""
+
+    def report(timer: TurnTimer | None, start: float, error: bool):
+        if timer is not None:
+            timer.tool_called(func.__name__, start, time.perf_counter() - start, error)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            timer = current_timer.get()
+            start = time.perf_counter()
+            error = True
+            try:
+                result = await func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                report(timer, start, error)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = current_timer.get()
+        start = time.perf_counter()
+        error = True
+        try:
+            result = func(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            report(timer, start, error)
+
+    return wrapper
@@ -0,0 +1,186 @@
+"""
+Bounded execution of the agent tools.
+
+The agents run on the event loop that also streams the audio of every connection, a tool
+blocking it (a SQLite commit, a knowledge base refresh, dateparser) stalls all of them.
+`ToolExecutor` runs the blocking bodies of the tools in a dedicated thread pool of a fixed
+size and bounds every tool call, blocking or not, by the timeout of its tool. A call that
+finds all the threads busy and the queue full is rejected right away instead of piling up.
+
+The tools writing to the database are not cancelled by their timeout: a write cut in the middle
+of its commit may be persisted while the agent reports it as failed, and retried into a
+duplicate. Their body runs in a task shielded from the timeout and from the cancellation of the
+agent run, past the timeout the call is reported as pending while the write finishes.
+
+Calls are counted per tool and outcome (``ok``, ``error``, ``timeout``, ``rejected``), the time
+spent waiting for a thread and the number of busy threads are exported too.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import MetricsRegistry, registry
+from app.settings import (
+    TOOL_EXECUTOR_QUEUE_SIZE,
+    TOOL_EXECUTOR_WORKERS,
+    TOOL_TIMEOUT_SECONDS,
+    TOOL_TIMEOUTS,
+)
+from app.utils import log_info, log_warning
+
+QUEUE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+WRITE_PENDING_MESSAGE = (
+    'The request is taking longer than expected and is still being processed. '
+    'Do not submit it again, tell the user it is pending and will be confirmed shortly.'
+)
+
+
+class ToolTimeoutError(TimeoutError):
+    """A tool call did not finish within the timeout of its tool."""
+
+
+class ToolRejectedError(RuntimeError):
+    """All the threads of the executor are busy and its queue is full."""
+
+
+def parse_timeouts(value: str) -> dict[str, float]:
+    """Parse a comma-separated list of ``tool_name=seconds``."""
+    timeouts = {}
+    for entry in filter(None, (entry.strip() for entry in value.split(','))):
+        name, separator, seconds = entry.partition('=')
+        if not separator:
+            raise ValueError(f'Invalid tool timeout, expected "tool_name=seconds": {entry}')
+        timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+class ToolExecutor:
+    """Thread pool of the blocking tool bodies, with per-tool timeouts and metrics."""
+
+    def __init__(
+        self,
+        max_workers: int = TOOL_EXECUTOR_WORKERS,
+        queue_size: int = TOOL_EXECUTOR_QUEUE_SIZE,
+        default_timeout: float = TOOL_TIMEOUT_SECONDS,
+        timeouts: dict[str, float] | None = None,
+        metrics_registry: MetricsRegistry = registry,
+    ):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tool')
+        # Released when the body returns, a timed out call holds its slot until then
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self.default_timeout = default_timeout
+        self.timeouts = parse_timeouts(TOOL_TIMEOUTS) if timeouts is None else timeouts
+        self.calls = metrics_registry.counter(
+            'voice_tool_executions_total', 'Tool calls by tool and outcome'
+        )
+        self.queue_wait = metrics_registry.histogram(
+            'voice_tool_queue_seconds',
+            'Time the blocking tool calls waited for a thread',
+            buckets=QUEUE_BUCKETS,
+        )
+        self.busy_threads = metrics_registry.gauge(
+            'voice_tool_executor_busy_threads', 'Threads of the tool executor running a tool'
+        )
+        # Writes still running after their call returned, referenced until they finish
+        self._pending_writes: set[asyncio.Task] = set()
+
+    def timeout_for(self, tool: str) -> float:
+        return self.timeouts.get(tool, self.default_timeout)
+
+    def _run_in_thread(self, tool: str, func: Callable, queued_at: float, *args, **kwargs):
+        self.queue_wait.observe(time.perf_counter() - queued_at, tool=tool)
+        self.busy_threads.inc()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.busy_threads.dec()
+
+    async def run(self, tool: str, func: Callable, *args, **kwargs):
+        """Run a blocking function in the pool, within the timeout of `tool`."""
+        if not self._slots.acquire(blocking=False):
+            self.calls.inc(tool=tool, outcome='rejected')
+            raise ToolRejectedError(f'Too many tool calls in progress, {tool} was not run')
+        context = contextvars.copy_context()
+        future = self.pool.submit(
+            context.run, self._run_in_thread, tool, func, time.perf_counter(), *args, **kwargs
+        )
+        future.add_done_callback(lambda _: self._slots.release())
+        return await self._bounded(tool, asyncio.wrap_future(future))
+
+    async def _bounded(self, tool: str, awaitable):
+        timeout = self.timeout_for(tool)
+        try:
+            result = await asyncio.wait_for(awaitable, timeout)
+        except TimeoutError as e:
+            self.calls.inc(tool=tool, outcome='timeout')
+            log_warning('Tool %s timed out after %s s', tool, timeout)
+            raise ToolTimeoutError(f'{tool} did not finish within {timeout} s') from e
+        except Exception:
+            self.calls.inc(tool=tool, outcome='error')
+            raise
+        self.calls.inc(tool=tool, outcome='ok')
+        return result
+
+    def tool(self, func: Callable) -> Callable:
+        """Decorate a tool: a sync body runs in the pool, a coroutine is only given a timeout.
+
+        Either way the decorated tool is a coroutine function, so the agents await it on the
+        event loop.
+        """
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await self._bounded(func.__name__, func(*args, **kwargs))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func.__name__, func, *args, **kwargs)
+
+        return wrapper
+
+    def write_tool(self, func: Callable) -> Callable:
+        """Decorate a coroutine tool writing to the database, see the module docstring."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            tool = func.__name__
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+            try:
+                return await self._bounded(tool, asyncio.shield(task))
+            except ToolTimeoutError:
+                task.add_done_callback(functools.partial(_log_late_write, tool))
+                return WRITE_PENDING_MESSAGE
+
+        return wrapper
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _log_late_write(tool: str, task: asyncio.Task):
+    if task.cancelled() or task.exception() is not None:
+        log_warning(
+            'Pending %s call failed: %s',
+            tool,
+            'cancelled' if task.cancelled() else task.exception(),
+        )
+    else:
+        log_info('Pending %s call finished after its timeout', tool)
+
+
+tool_executor = ToolExecutor()
+
+bounded_tool = tool_executor.tool
+bounded_write_tool = tool_executor.write_tool
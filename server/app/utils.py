@@ -1,14 +1,22 @@
 import base64
-import json
 import logging
+from typing import Any
 
 import coloredlogs
 import numpy as np
 from agents import Agent, AgentUpdatedStreamEvent, RawResponsesStreamEvent, RunItemStreamEvent
-from agents.voice import AudioInput, VoiceStreamEvent, VoiceStreamEventAudio
-from fastapi import WebSocket
+from agents.voice import VoiceStreamEvent, VoiceStreamEventAudio
+from fastapi import WebSocket, WebSocketDisconnect
 from openai.types.responses import ResponseTextDeltaEvent
 
+from app.audio import BINARY_AUDIO_FORMAT, INPUT_AUDIO_FRAME, decode_audio_frame
+from app.outbound import WebsocketWriter
+from app.serialization import loads
+from app.settings import AUDIO_INPUT_MODE, SERVER_VAD_ENABLED
+
+BUFFERED_AUDIO_INPUT = 'buffered'
+STREAMED_AUDIO_INPUT = 'streamed'
+
 # Set up logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -38,18 +46,6 @@ def log_error(*args, **kwargs):
     logger.error(*args, **kwargs)
 
 
-def transform_data_to_events(audio_np: np.ndarray) -> dict:
-    return {
-        'type': 'response.audio.delta',
-        'delta': base64.b64encode(audio_np.tobytes()).decode('utf-8'),
-        'output_index': 0,
-        'content_index': 0,
-        'item_id': '',
-        'response_id': '',
-        'event_id': '',
-    }
-
-
 def is_new_output_item(event):
     return isinstance(event, RunItemStreamEvent)
 
@@ -70,9 +66,30 @@ def is_new_text_message(data):
     )
 
 
+def is_history_reset(data):
+    """A sync message clearing the history or resetting the agent, honoured even if stale."""
+    return not data['inputs'] or data.get('reset_agent', False)
+
+
+def extract_user_input(data) -> str:
+    return data['inputs'][-1]['content']
+
+
 def process_inputs(data, connection) -> str:
     connection.history = data['inputs'][:-1]
-    return data['inputs'][-1]['content']
+    return extract_user_input(data)
+
+
+def is_session_update(data):
+    return data['type'] == 'session.update'
+
+
+def is_resync_request(data):
+    return data['type'] == 'history.resync'
+
+
+def is_response_cancel(data):
+    return data['type'] == 'response.cancel'
 
 
 def is_new_audio_chunk(data):
@@ -83,23 +100,154 @@ def is_audio_complete(data):
     return data['type'] == 'input_audio_buffer.commit'
 
 
-def extract_audio_chunk(data):
+def extract_audio_chunk(data) -> np.ndarray:
     decoded_bytes = base64.b64decode(data['delta'])
-    audio_int16 = np.frombuffer(decoded_bytes, dtype=np.int16)
-    audio_data = audio_int16.astype(np.float32) / 32768.0
-    return audio_data
+    return np.frombuffer(decoded_bytes, dtype='<i2')
+
+
+def extract_binary_audio_chunk(frame: bytes) -> np.ndarray:
+    header, audio_int16 = decode_audio_frame(frame)
+    if header.kind != INPUT_AUDIO_FRAME:
+        raise ValueError(f'Unexpected audio frame kind: {header.kind}')
+    return audio_int16
+
 
+async def receive_message(websocket: WebSocket) -> dict | bytes:
+    """Receive a JSON message or a binary audio frame from the websocket."""
+    message = await websocket.receive()
+    if message['type'] == 'websocket.disconnect':
+        raise WebSocketDisconnect(message.get('code', 1000))
+    if message.get('bytes') is not None:
+        return message['bytes']
+    return loads(message['text'])
 
-def concat_audio_chunks(chunks) -> AudioInput:
-    return AudioInput(np.concatenate(chunks))
+
+def remove_unanswered_tool_calls(history: list) -> list:
+    """Drop the tool calls of an interrupted run that never got an output."""
+    answered = {
+        item.get('call_id') for item in history if item.get('type') == 'function_call_output'
+    }
+    return [
+        item
+        for item in history
+        if item.get('type') != 'function_call' or item.get('call_id') in answered
+    ]
 
 
 class WebsocketHelper:
+    """Keeps the conversation history of a websocket client in sync.
+
+    Two history protocols are supported. The legacy one resends the whole history in a
+    ``history.updated`` message on every change. The delta protocol, negotiated by the client
+    with a ``session.update`` message, sends constant-size messages that carry a sequence
+    number (``seq``) the client uses to detect gaps:
+
+    * ``history.snapshot`` - the whole history, sent on request or on a version mismatch,
+    * ``history.item.appended`` - ``inputs[index] = item``, the history is truncated after it,
+    * ``history.item.delta`` - text appended to the content of ``inputs[index]``,
+    * ``history.item.replaced`` - ``inputs[index] = item``,
+    * ``history.committed`` - the turn is done and the history has ``length`` items.
+
+    Messages are not sent inline, they are queued on the connection's `WebsocketWriter`.
+    """
+
     def __init__(self, websocket: WebSocket, history: list, initial_agent: Agent):
         self.websocket = websocket
         self.history = history or []
         self.latest_agent = initial_agent
         self.partial_response = ''
+        self.delta_protocol = False
+        self.binary_audio = False
+        self.input_audio_mode = AUDIO_INPUT_MODE
+        self.turn_detection: dict | None = {'type': 'server_vad'} if SERVER_VAD_ENABLED else None
+        self.audio_stream_id = 0
+        # A spoken response is being generated, from its turn_started to its turn_ended
+        self.speaking = False
+        self.writer = WebsocketWriter(websocket)
+        self._partial_index: int | None = None
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last delta protocol message sent to the client."""
+        return self.writer.seq
+
+    async def _send(self, payload: dict):
+        await self.writer.send_json(payload)
+
+    async def _send_delta(self, payload: dict):
+        await self.writer.send_json(payload, sequenced=True)
+
+    async def _send_legacy_history(self, inputs: list, reason: str | None = None, **extra):
+        payload: dict[str, Any] = {'type': 'history.updated'}
+        if reason:
+            payload['reason'] = reason
+        payload['inputs'] = inputs
+        payload.update(extra)
+        payload['agent_name'] = self.latest_agent.name
+        await self._send(payload)
+
+    def _partial_item(self) -> dict:
+        return {'type': 'message', 'role': 'assistant', 'content': self.partial_response}
+
+    def _client_history(self) -> list:
+        if self._partial_index is None:
+            return self.history
+        return self.history + [self._partial_item()]
+
+    async def send_snapshot(self, reason: str = 'resync'):
+        await self._send_delta(
+            {
+                'type': 'history.snapshot',
+                'reason': reason,
+                'inputs': self._client_history(),
+                'agent_name': self.latest_agent.name,
+            }
+        )
+
+    async def update_session(self, data: dict):
+        """Apply the protocol options negotiated by a ``session.update`` message."""
+        if 'history_protocol' in data:
+            self.delta_protocol = data['history_protocol'] == 'delta'
+        if 'audio_format' in data:
+            self.binary_audio = data['audio_format'] == BINARY_AUDIO_FORMAT
+        if data.get('input_audio_mode') in (BUFFERED_AUDIO_INPUT, STREAMED_AUDIO_INPUT):
+            self.input_audio_mode = data['input_audio_mode']
+        if 'turn_detection' in data:
+            turn_detection = data['turn_detection']
+            is_server_vad = turn_detection and turn_detection.get('type') == 'server_vad'
+            self.turn_detection = turn_detection if is_server_vad else None
+
+        await self._send(
+            {
+                'type': 'session.updated',
+                'history_protocol': 'delta' if self.delta_protocol else 'full',
+                'audio_format': BINARY_AUDIO_FORMAT if self.binary_audio else 'pcm16.base64',
+                'input_audio_mode': self.input_audio_mode,
+                'turn_detection': self.turn_detection,
+            }
+        )
+        if self.delta_protocol:
+            await self.send_snapshot(reason='session.update')
+
+    def is_in_sync(self, data: dict) -> bool:
+        """Whether the client's last seen ``seq`` (if it sent one) matches the server's.
+
+        The history of a client that is not in sync is ignored, it is sent a snapshot instead,
+        unless the message resets the history. Check it before cancelling a response, the
+        interrupted response is sent as deltas the client has not seen when it sent the message.
+        """
+        return data.get('seq') in (None, self.seq)
+
+    async def _send_item(self, message_type: str, index: int, item: dict, reason: str):
+        await self._send_delta(
+            {
+                'type': message_type,
+                'reason': reason,
+                'index': index,
+                'item': item,
+                'agent_name': self.latest_agent.name,
+            }
+        )
 
     async def show_user_input(self, user_input: str):
         self.history.append(
@@ -109,16 +257,12 @@ class WebsocketHelper:
                 'content': user_input,
             }
         )
-        await self.websocket.send_text(
-            json.dumps(
-                {
-                    'type': 'history.updated',
-                    'reason': 'user.input',
-                    'inputs': self.history,
-                    'agent_name': self.latest_agent.name,
-                }
+        if self.delta_protocol:
+            await self._send_item(
+                'history.item.appended', len(self.history) - 1, self.history[-1], 'user.input'
             )
-        )
+        else:
+            await self._send_legacy_history(self.history, reason='user.input')
         return (self.history, self.latest_agent)
 
     async def stream_response(self, new_tokens: str, is_text: bool = False):
@@ -126,23 +270,27 @@ class WebsocketHelper:
             return
 
         self.partial_response += new_tokens
-        await self.websocket.send_text(
-            json.dumps(
+        if not self.delta_protocol:
+            self._partial_index = len(self.history)
+            await self._send_legacy_history(
+                self.history + [self._partial_item()], reason='response.text.delta'
+            )
+        elif self._partial_index is None:
+            self._partial_index = len(self.history)
+            await self._send_item(
+                'history.item.appended',
+                self._partial_index,
+                self._partial_item(),
+                'response.text.delta',
+            )
+        else:
+            await self._send_delta(
                 {
-                    'type': 'history.updated',
-                    'reason': 'response.text.delta',
-                    'inputs': self.history
-                    + [
-                        {
-                            'type': 'message',
-                            'role': 'assistant',
-                            'content': self.partial_response,
-                        }
-                    ],
-                    'agent_name': self.latest_agent.name,
+                    'type': 'history.item.delta',
+                    'index': self._partial_index,
+                    'delta': new_tokens,
                 }
             )
-        )
 
     async def handle_new_item(
         self,
@@ -151,51 +299,108 @@ class WebsocketHelper:
         if is_new_output_item(event):
             self.history.append(event.item.to_input_item())  # type: ignore
 
-            await self.websocket.send_text(
-                json.dumps(
-                    {
-                        'type': 'history.updated',
-                        'reason': 'response.input_item',
-                        'inputs': self.history,
-                        'agent_name': self.latest_agent.name,
-                    }
+            if not self.delta_protocol:
+                if event.item.type == 'message_output_item':  # type: ignore
+                    self.partial_response = ''
+                    self._partial_index = None
+                await self._send_legacy_history(self.history, reason='response.input_item')
+                return
+
+            index = len(self.history) - 1
+            if self._partial_index != index:
+                await self._send_item(
+                    'history.item.appended', index, self.history[-1], 'response.input_item'
                 )
+                return
+
+            # The new item lands where the partial assistant message is displayed
+            await self._send_item(
+                'history.item.replaced', index, self.history[-1], 'response.input_item'
             )
+            if event.item.type == 'message_output_item':  # type: ignore
+                self.partial_response = ''
+                self._partial_index = None
+            else:
+                self._partial_index = index + 1
+                await self._send_item(
+                    'history.item.appended',
+                    self._partial_index,
+                    self._partial_item(),
+                    'response.text.delta',
+                )
         elif is_text_output(event):
             await self.stream_response(event.data.delta)  # type: ignore
 
+    async def _send_history_diff(self, new_history: list, reason: str):
+        old_history = self._client_history()
+        if len(new_history) < len(old_history):
+            self.history = new_history
+            self._partial_index = None
+            await self.send_snapshot(reason=reason)
+            return
+
+        for index, item in enumerate(new_history):
+            if index >= len(old_history):
+                await self._send_item('history.item.appended', index, item, reason)
+            elif old_history[index] != item:
+                await self._send_item('history.item.replaced', index, item, reason)
+        self.history = new_history
+        self._partial_index = None
+        await self._send_delta(
+            {
+                'type': 'history.committed',
+                'reason': reason,
+                'length': len(self.history),
+                'agent_name': self.latest_agent.name,
+            }
+        )
+
     async def text_output_complete(self, output, is_done=False):
         if not is_done:
-            await self.websocket.send_text(
-                json.dumps(
-                    {
-                        'type': 'history.updated',
-                        'inputs': self.history,
-                        'sync': True,
-                        'agent_name': self.latest_agent.name,
-                    }
-                )
-            )
+            if self.delta_protocol:
+                await self.send_snapshot(reason='sync')
+            else:
+                await self._send_legacy_history(self.history, sync=True)
         else:
             self.partial_response = ''
             self.latest_agent = output.last_agent
-            self.history = output.to_input_list()
-            await self.websocket.send_text(
-                json.dumps(
-                    {
-                        'type': 'history.updated',
-                        'inputs': self.history,
-                        'reason': 'response.done',
-                        'agent_name': self.latest_agent.name,
-                    }
-                )
-            )
+            if self.delta_protocol:
+                await self._send_history_diff(output.to_input_list(), reason='response.done')
+            else:
+                self.history = output.to_input_list()
+                self._partial_index = None
+                await self._send_legacy_history(self.history, reason='response.done')
+
+    async def send_event(self, event_type: str, **data):
+        await self._send({'type': event_type, **data})
+
+    def start_audio_stream(self):
+        self.audio_stream_id += 1
+        self.speaking = True
+
+    def end_audio_stream(self):
+        self.speaking = False
+
+    async def commit_partial_response(self, output):
+        """Keep what an interrupted response produced so far as the conversation history."""
+        history = remove_unanswered_tool_calls(self.history)
+        if self._partial_index is not None and self.partial_response:
+            history.append(self._partial_item())
+        self.latest_agent = output.last_agent
+
+        if self.delta_protocol:
+            await self._send_history_diff(history, reason='response.cancelled')
+        else:
+            self.history = history
+            await self._send_legacy_history(self.history, reason='response.cancelled')
+        self.partial_response = ''
+        self._partial_index = None
 
     async def send_audio_chunk(self, event: VoiceStreamEvent):
-        if isinstance(event, VoiceStreamEventAudio):
-            await self.websocket.send_text(
-                json.dumps(transform_data_to_events(event.data))  # type: ignore
-            )
+        if not isinstance(event, VoiceStreamEventAudio):
+            return
+        pcm = event.data.astype('<i2', copy=False).tobytes()  # type: ignore
+        await self.writer.send_audio(self.audio_stream_id, pcm, self.binary_audio)
 
     async def send_audio_done(self):
-        await self.websocket.send_text(json.dumps({'type': 'audio.done'}))
+        await self._send({'type': 'audio.done'})
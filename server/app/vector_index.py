@@ -0,0 +1,260 @@
+"""
+FAISS vector index over the knowledge base chunks.
+
+Chunks are embedded by a pluggable `Embedder`: ``hashing`` is a deterministic offline embedder
+based on feature hashing, ``openai`` calls the OpenAI embeddings API. The index is persisted to
+`VECTOR_INDEX_DIR` with a manifest of the content hash of every chunk, and memory-mapped when
+loaded. `VectorIndex.sync` compares the chunks with the manifest, so only new or changed chunks
+are embedded and the vectors of removed chunks are deleted.
+"""
+
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from app.retrieval import TOKEN_PATTERN, KnowledgeChunk, fold_diacritics, tokenize
+from app.settings import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_MODEL,
+)
+from app.utils import log_info
+
+INDEX_FILE_NAME = 'index.faiss'
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Maps the flat vectors instead of reading them, only available in recent faiss versions
+MMAP_FLAG = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP)
+
+
+class Embedder(ABC):
+    """Turns texts into L2-normalized float32 vectors of `dimension` components."""
+
+    name = ''
+    dimension = 0
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed the texts, one row per text."""
+
+    @property
+    def signature(self) -> str:
+        """Identifies the vector space, an index built by another embedder is rebuilt."""
+        return f'{self.name}:{self.dimension}'
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimension: int) -> tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbedder(Embedder):
+    """Offline embedder hashing the terms and the character trigrams of a text.
+
+    Terms are the stemmed tokens of the BM25 index, trigrams of the words catch the partial
+    matches (compound words, typos) that the terms miss.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, trigram_weight: float = 0.5):
+        self.dimension = dimension
+        self.trigram_weight = trigram_weight
+
+    def features(self, text: str) -> list[tuple[str, float]]:
+        features = [(f't:{term}', 1.0) for term in tokenize(text)]
+        for word in TOKEN_PATTERN.findall(fold_diacritics(text.lower())):
+            padded = f' {word} '
+            features.extend(
+                (f'c:{padded[i : i + 3]}', self.trigram_weight) for i in range(len(padded) - 2)
+            )
+        return features
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self.features(text):
+                column, sign = _hash_feature(feature, self.dimension)
+                matrix[row, column] += sign * weight
+        return normalize_rows(matrix)
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from the OpenAI API, requires network access and an API key."""
+
+    name = 'openai'
+
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        dimension: int = EMBEDDING_DIMENSION,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ):
+        from openai import OpenAI  # pylint: disable=import-outside-toplevel
+
+        self.client = OpenAI()
+        self.model = model
+        self.dimension = dimension
+        self.batch_size = max(batch_size, 1)
+
+    @property
+    def signature(self) -> str:
+        return f'{self.name}:{self.model}:{self.dimension}'
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        # A request takes a limited number of inputs, a full rebuild is sent in batches
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=texts[start : start + self.batch_size],
+                dimensions=self.dimension,
+            )
+            for item in response.data:
+                vectors[start + item.index] = item.embedding
+        return normalize_rows(vectors)
+
+
+EMBEDDERS: dict[str, type[Embedder]] = {'hashing': HashingEmbedder, 'openai': OpenAIEmbedder}
+
+
+def create_embedder(name: str = EMBEDDING_BACKEND) -> Embedder:
+    if name not in EMBEDDERS:
+        raise ValueError(f'Unknown embedding backend: {name}')
+    return EMBEDDERS[name]()
+
+
+def content_hash(chunk: KnowledgeChunk) -> str:
+    return hashlib.sha1(f'{chunk.title}\n{chunk.text}'.encode()).hexdigest()
+
+
+def chunk_ids(chunks: list[KnowledgeChunk]) -> list[int]:
+    """Stable 63-bit ids derived from the section and title of the chunks."""
+    ids = []
+    seen: dict[str, int] = {}
+    for chunk in chunks:
+        key = f'{chunk.section}/{chunk.title}'
+        # Chunks sharing a title are told apart by their order
+        occurrence = seen[key] = seen.get(key, -1) + 1
+        digest = hashlib.blake2b(f'{key}#{occurrence}'.encode(), digest_size=8).digest()
+        ids.append(int.from_bytes(digest, 'little') >> 1)
+    return ids
+
+
+@dataclass(frozen=True)
+class SyncStats:
+    added: int
+    removed: int
+    unchanged: int
+
+
+class VectorIndex:
+    """Inner product (cosine) FAISS index of the knowledge base chunks, persisted to disk."""
+
+    def __init__(self, directory: Path, embedder: Embedder):
+        self.directory = Path(directory)
+        self.embedder = embedder
+        self.index: faiss.Index | None = None
+        self.manifest: dict[str, str] = {}
+        self.chunks: dict[int, KnowledgeChunk] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE_NAME
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_FILE_NAME
+
+    def _new_index(self) -> faiss.Index:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedder.dimension))
+
+    def load(self) -> bool:
+        """Memory-map the persisted index, unless it was built by another embedder."""
+        if not self.index_path.exists() or not self.manifest_path.exists():
+            return False
+        manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        if manifest.get('embedder') != self.embedder.signature:
+            return False
+        self.index = faiss.read_index(str(self.index_path), MMAP_FLAG)
+        self.manifest = manifest['chunks']
+        return True
+
+    def _save(self, index: faiss.Index):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, the previous file may still be mapped
+        temporary_path = self.index_path.with_suffix('.tmp')
+        faiss.write_index(index, str(temporary_path))
+        os.replace(temporary_path, self.index_path)
+        manifest = {'embedder': self.embedder.signature, 'chunks': self.manifest}
+        temporary_path = self.manifest_path.with_suffix('.tmp')
+        temporary_path.write_text(json.dumps(manifest), encoding='utf-8')
+        os.replace(temporary_path, self.manifest_path)
+
+    def sync(self, chunks: list[KnowledgeChunk]) -> SyncStats:
+        """Bring the index in line with `chunks`, embedding only the new or changed ones."""
+        if self.index is None:
+            self.load()
+
+        ids = chunk_ids(chunks)
+        hashes = {
+            str(chunk_id): content_hash(chunk) for chunk_id, chunk in zip(ids, chunks, strict=True)
+        }
+        self.chunks = dict(zip(ids, chunks, strict=True))
+
+        stale = [int(key) for key, value in self.manifest.items() if hashes.get(key) != value]
+        fresh = [i for i, key in enumerate(map(str, ids)) if self.manifest.get(key) != hashes[key]]
+        stats = SyncStats(added=len(fresh), removed=len(stale), unchanged=len(ids) - len(fresh))
+        if self.index is not None and not fresh and not stale:
+            return stats
+
+        # A mapped index is read-only, the changes are applied to a copy read from disk
+        if self.index is not None and self.index_path.exists():
+            index = faiss.read_index(str(self.index_path))
+        else:
+            index = self._new_index()
+        if stale:
+            # The Python wrapper also takes the ids as an array, not only as an IDSelector
+            index.remove_ids(np.array(stale, dtype=np.int64))  # type: ignore
+        if fresh:
+            vectors = self.embedder.embed([f'{chunks[i].title}\n{chunks[i].text}' for i in fresh])
+            index.add_with_ids(vectors, np.array([ids[i] for i in fresh], dtype=np.int64))
+
+        self.manifest = hashes
+        self._save(index)
+        self.index = faiss.read_index(str(self.index_path), MMAP_FLAG)
+        log_info(
+            'Vector index synced: %s added, %s removed, %s unchanged',
+            stats.added,
+            stats.removed,
+            stats.unchanged,
+        )
+        return stats
+
+    def search(
+        self, query: str, top_k: int, min_similarity: float = 0.0
+    ) -> list[tuple[KnowledgeChunk, float]]:
+        """Return the `top_k` chunks closest to the query with their cosine similarity."""
+        if self.index is None or not self.index.ntotal:
+            return []
+        scores, ids = self.index.search(self.embedder.embed([query]), top_k)
+        return [
+            (self.chunks[chunk_id], score)
+            for chunk_id, score in zip(ids[0].tolist(), scores[0].tolist(), strict=True)
+            # Missing results are padded with the id -1
+            if chunk_id in self.chunks and score >= min_similarity
+        ]
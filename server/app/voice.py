@@ -0,0 +1,67 @@
+"""
+Voice pipeline construction shared by the websocket connections.
+The model provider, its HTTP client and the STT/TTS models are created once per process;
+each connection builds its pipeline once and reuses it for every turn.
+"""
+
+import time
+from collections.abc import Callable
+
+from agents.voice import (
+    OpenAIVoiceModelProvider,
+    STTModel,
+    TTSModel,
+    TTSModelSettings,
+    VoiceModelProvider,
+    VoicePipeline,
+    VoicePipelineConfig,
+    VoiceWorkflowBase,
+)
+
+from app.settings import STT_MODEL, TTS_BUFFER_SIZE, TTS_MODEL
+from app.utils import log_info
+
+# Process-wide instances, the models only wrap the provider's HTTP client
+_voice_model_provider: VoiceModelProvider | None = None
+_stt_model: STTModel | None = None
+_tts_model: TTSModel | None = None
+
+
+def get_voice_model_provider() -> VoiceModelProvider:
+    # pylint: disable=global-statement
+    global _voice_model_provider
+    if _voice_model_provider is None:
+        _voice_model_provider = OpenAIVoiceModelProvider()
+    return _voice_model_provider
+
+
+def get_voice_models() -> tuple[STTModel, TTSModel]:
+    # pylint: disable=global-statement
+    global _stt_model, _tts_model
+    provider = get_voice_model_provider()
+    if _stt_model is None:
+        _stt_model = provider.get_stt_model(STT_MODEL)
+    if _tts_model is None:
+        _tts_model = provider.get_tts_model(TTS_MODEL)
+    return _stt_model, _tts_model
+
+
+def create_voice_pipeline(
+    workflow: VoiceWorkflowBase, transform_data: Callable | None = None
+) -> VoicePipeline:
+    """Build the pipeline of one connection, it is reused for all of its turns."""
+    start_time = time.perf_counter()
+    stt_model, tts_model = get_voice_models()
+    pipeline = VoicePipeline(
+        workflow=workflow,
+        stt_model=stt_model,
+        tts_model=tts_model,
+        config=VoicePipelineConfig(
+            model_provider=get_voice_model_provider(),
+            tts_settings=TTSModelSettings(
+                buffer_size=TTS_BUFFER_SIZE, transform_data=transform_data
+            ),
+        ),
+    )
+    log_info('Voice pipeline set up in %.2fms', (time.perf_counter() - start_time) * 1000)
+    return pipeline
@@ -0,0 +1,92 @@
+"""
+Rows per second of the data loader, row by row through CRUD against one bulk transaction.
+
+Run from the server directory:
+
+    python -m benchmarks.data_loading [--items 5000] [--categories 40] [--allergens 14]
+
+The benchmark generates a data file in the format of ``data/data.json`` with a large synthetic
+menu, the menus of several locations, and loads it into empty temporary SQLite databases. The
+rows counted are the menu items and their links to the allergens.
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.data_loader import load_data
+from app.database import Base
+from app.models import MenuItemDB, menu_item_allergen_association
+
+
+def synthetic_data(items: int, categories: int, allergens: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    menu = [{'category_name': f'Kategoria {i}', 'items': []} for i in range(categories)]
+    for i in range(items):
+        rng.choice(menu)['items'].append(
+            {
+                'name': f'Danie {i}',
+                'description': f'Opis dania numer {i} z sezonowych składników',
+                'price': round(rng.uniform(10, 90), 2),
+                'allergens': [
+                    f'Alergen {a}' for a in rng.sample(range(allergens), rng.randint(0, 3))
+                ],
+            }
+        )
+    return {
+        'restaurant_info': {
+            'name': 'Poligon Smaków',
+            'address': 'ul. Testowa 1',
+            'opening_hours': {'weekday': '12:00 - 22:00', 'weekend': '12:00 - 23:00'},
+            'phone': '+48 123 456 789',
+            'email': 'kontakt@example.com',
+            'cuisine_type': 'Polska',
+            'payment_methods': 'Gotówka',
+            'reservations_info': 'Telefonicznie.',
+        },
+        'menu': menu,
+        'special_offers': [{'title': f'Oferta {i}', 'description': 'Opis.'} for i in range(20)],
+        'faq': [{'question': f'Pytanie {i}?', 'answer': 'Tak.'} for i in range(50)],
+    }
+
+
+def measure(data: dict, bulk: bool) -> tuple[float, int]:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{Path(directory) / "menu.db"}')
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            start = time.perf_counter()
+            load_data(db, data, bulk=bulk)
+            seconds = time.perf_counter() - start
+            rows = db.scalar(select(func.count(MenuItemDB.id))) or 0
+            rows += db.scalar(select(func.count()).select_from(menu_item_allergen_association)) or 0
+        engine.dispose()
+    return seconds, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--items', type=int, default=5000, help='menu items')
+    parser.add_argument('--categories', type=int, default=40, help='menu categories')
+    parser.add_argument('--allergens', type=int, default=14, help='distinct allergens')
+    args = parser.parse_args()
+
+    data = synthetic_data(args.items, args.categories, args.allergens)
+    # The CRUD path logs every row, only the timings are of interest
+    logging.disable(logging.INFO)
+
+    print(f'{args.items} items in {args.categories} categories, {args.allergens} allergens')
+    print(f'{"loader":<12} {"seconds":>8} {"rows":>7} {"rows/s":>9}')
+    for name, bulk in (('row by row', False), ('bulk', True)):
+        seconds, rows = measure(data, bulk)
+        print(f'{name:<12} {seconds:>8.2f} {rows:>7} {rows / seconds:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Throughput of concurrent order writes with and without the SQLite tuning profile.
+
+Run from the server directory:
+
+    python -m benchmarks.db_writers [--writers 8] [--writes 200] [--readers 2]
+
+Each writer thread places orders like the ``place_order`` tool, one transaction per order,
+while reader threads keep listing the orders. The ``default`` profile is the engine the server
+used before: rollback journal, synchronous=FULL and no pragmas. The ``tuned`` profile is
+`create_database_engine` with the pragmas of the settings (WAL, synchronous=NORMAL,
+busy_timeout, mmap_size, cache_size).
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_database_engine
+from app.models import MenuCategoryDB, MenuItemDB, OrderDB, OrderItemDB, OrderStatusEnum
+
+PROFILES = {
+    'default': lambda url: create_engine(url, connect_args={'check_same_thread': False}),
+    'tuned': create_database_engine,
+}
+
+
+def place_order(session_factory, table_number: int):
+    now = datetime.utcnow().isoformat()
+    with session_factory() as session:
+        session.add(
+            OrderDB(
+                table_number=table_number,
+                status=OrderStatusEnum.PENDING,
+                created_at=now,
+                updated_at=now,
+                items=[OrderItemDB(menu_item_id=i, quantity=1) for i in range(1, 4)],
+            )
+        )
+        session.commit()
+
+
+def run(engine, writers: int, writes: int, readers: int) -> dict[str, float]:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(MenuCategoryDB), [{'name': 'Dania'}])
+        connection.execute(
+            insert(MenuItemDB),
+            [{'name': f'Danie {i}', 'price': 10.0, 'category_id': 1} for i in range(1, 4)],
+        )
+    session_factory = sessionmaker(bind=engine)
+    errors = reads = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def write(table_number: int):
+        nonlocal errors
+        for _ in range(writes):
+            try:
+                place_order(session_factory, table_number)
+            except OperationalError:
+                with lock:
+                    errors += 1
+
+    def read():
+        nonlocal reads
+        while not done.is_set():
+            with session_factory() as session:
+                session.scalar(select(func.count(OrderDB.id)))
+            with lock:
+                reads += 1
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    with session_factory() as session:
+        orders = session.scalar(select(func.count(OrderDB.id))) or 0
+    return {
+        'seconds': seconds,
+        'orders': orders,
+        'errors': errors,
+        'writes_per_second': orders / seconds,
+        'reads_per_second': reads / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--writers', type=int, default=8, help='writer threads')
+    parser.add_argument('--writes', type=int, default=200, help='orders placed by each writer')
+    parser.add_argument('--readers', type=int, default=2, help='reader threads')
+    args = parser.parse_args()
+
+    print(f'{args.writers} writers x {args.writes} orders, {args.readers} readers')
+    print(
+        f'{"profile":<10} {"seconds":>8} {"orders":>7} {"errors":>7} {"writes/s":>9} {"reads/s":>9}'
+    )
+    for name, create in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create(f'sqlite:///{Path(directory) / "orders.db"}')
+            result = run(engine, args.writers, args.writes, args.readers)
+            engine.dispose()
+        print(
+            f'{name:<10} {result["seconds"]:>8.2f} {result["orders"]:>7} {result["errors"]:>7} '
+            f'{result["writes_per_second"]:>9.0f} {result["reads_per_second"]:>9.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Knowledge base startup time and number of SQL queries on a large synthetic menu.
+
+Run from the server directory:
+
+    python -m benchmarks.kb_loading [--items 10000] [--categories 50] [--allergens 14]
+
+The benchmark creates a temporary SQLite database with a synthetic menu and compares loading it
+with the lazy relationship loads the knowledge base used before (one query per category and per
+item) against `KnowledgeBase`, which eager-loads the menu graph.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.knowledge_base import KnowledgeBase
+from app.models import (
+    AllergenDB,
+    FaqDB,
+    MenuCategoryDB,
+    MenuItemDB,
+    RestaurantInfoDB,
+    menu_item_allergen_association,
+)
+
+
+def populate(engine, items: int, categories: int, allergens: int, seed: int = 0):
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(RestaurantInfoDB), [{'name': 'Poligon Smaków'}])
+        connection.execute(
+            insert(MenuCategoryDB), [{'name': f'Kategoria {i}'} for i in range(categories)]
+        )
+        connection.execute(insert(AllergenDB), [{'name': f'Alergen {i}'} for i in range(allergens)])
+        connection.execute(
+            insert(MenuItemDB),
+            [
+                {
+                    'name': f'Danie {i}',
+                    'description': f'Opis dania numer {i} z sezonowych składników',
+                    'price': round(rng.uniform(10, 90), 2),
+                    'category_id': rng.randint(1, categories),
+                    'options': 'mała / duża porcja' if i % 5 == 0 else None,
+                }
+                for i in range(items)
+            ],
+        )
+        connection.execute(
+            insert(menu_item_allergen_association),
+            [
+                {'menu_item_id': item_id, 'allergen_id': allergen_id}
+                for item_id in range(1, items + 1)
+                for allergen_id in rng.sample(range(1, allergens + 1), rng.randint(0, 3))
+            ],
+        )
+        connection.execute(
+            insert(FaqDB), [{'question': f'Pytanie {i}?', 'answer': 'Tak.'} for i in range(20)]
+        )
+
+
+def lazy_load_menu(session_factory) -> int:
+    """The menu loading of the knowledge base relying on lazy relationship loads."""
+    count = 0
+    with session_factory() as session:
+        for category in session.query(MenuCategoryDB).all():
+            for item in category.items:
+                count += len([allergen.name for allergen in item.allergens])
+    return count
+
+
+def measure(engine, load) -> tuple[float, int]:
+    queries = 0
+
+    def count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, 'before_cursor_execute', count_query)
+    try:
+        start = time.perf_counter()
+        load(sessionmaker(bind=engine))
+        return time.perf_counter() - start, queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--items', type=int, default=10000, help='menu items')
+    parser.add_argument('--categories', type=int, default=50, help='menu categories')
+    parser.add_argument('--allergens', type=int, default=14, help='distinct allergens')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{Path(directory) / "menu.db"}')
+        populate(engine, args.items, args.categories, args.allergens)
+
+        print(f'{args.items} items in {args.categories} categories, {args.allergens} allergens')
+        print(f'{"loader":<28} {"seconds":>8} {"queries":>8}')
+        for name, load in (
+            ('lazy relationships (menu)', lazy_load_menu),
+            ('KnowledgeBase (all)', KnowledgeBase),
+        ):
+            seconds, queries = measure(engine, load)
+            print(f'{name:<28} {seconds:>8.3f} {queries:>8}')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
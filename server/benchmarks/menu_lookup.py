@@ -0,0 +1,94 @@
+"""
+Dish name lookups of find_menu_item_by_name on names as voice transcripts spell them.
+
+Run from the server directory, after `python create_db_tables.py`:
+
+    python -m benchmarks.menu_lookup
+
+Each query is looked up with the ILIKE substring query used before, with the spelling index
+alone and with its phonetic fallback. A lookup succeeds when the expected dish is the first
+result; the agent asks the user to clarify after the others.
+"""
+
+import argparse
+import time
+
+from app.crud import get_menu_items_by_name_fuzzy
+from app.database import SessionLocal
+from app.knowledge_base import get_knowledge_base
+from app.menu_index import MenuNameIndex
+
+# Transcribed query and the beginning of the name of the dish that was meant
+QUERIES = [
+    ('pierogi', 'Pierogi ruskie'),
+    ('Pierogi Ruskie', 'Pierogi ruskie'),
+    ('pierogi rusky', 'Pierogi ruskie'),
+    ('pie rogi rusky', 'Pierogi ruskie'),
+    ('ŻUREK', 'Żurek'),
+    ('zurek', 'Żurek'),
+    ('zhurek', 'Żurek'),
+    ('śledź', 'Śledź'),
+    ('sledz', 'Śledź'),
+    ('shledge', 'Śledź'),
+    ('kotlet schabowy', 'Kotlet schabowy'),
+    ('kotlet szabowy', 'Kotlet schabowy'),
+    ('kotlet shabovy', 'Kotlet schabowy'),
+    ('gołąbki', 'Gołąbki'),
+    ('golabki', 'Gołąbki'),
+    ('gowompki', 'Gołąbki'),
+    ('szarlotka', 'Szarlotka'),
+    ('sharlotka', 'Szarlotka'),
+    ('sernick', 'Sernik'),
+    ('tchatar', 'Tatar'),
+    ('kachka pieczona', 'Kaczka pieczona'),
+    ('lemoniadah', 'Lemoniada'),
+    ('chekolada', 'Czekolada'),
+    ('rosół', 'Rosół'),
+    ('rosul', 'Rosół'),
+    ('salatka grecka', 'Sałatka grecka'),
+    ('oscypek', 'Oscypek'),
+    ('oshipek', 'Oscypek'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--limit', type=int, default=5, help='results per lookup')
+    args = parser.parse_args()
+
+    kb = get_knowledge_base()
+    items = [item for items in kb.menu.values() for item in items]
+    indexes = {'spelling': MenuNameIndex(items, phonetic=False), 'phonetic': MenuNameIndex(items)}
+    db = SessionLocal()
+    lookups = {
+        'ilike': lambda query: get_menu_items_by_name_fuzzy(db, query, limit=args.limit),
+        **{
+            name: lambda query, index=index: [item for item, _ in index.search(query, args.limit)]
+            for name, index in indexes.items()
+        },
+    }
+
+    print(f'{"query":<18} ' + ' '.join(f'{name:>10}' for name in lookups))
+    found = dict.fromkeys(lookups, 0)
+    elapsed = dict.fromkeys(lookups, 0.0)
+    for query, expected in QUERIES:
+        row = []
+        for name, lookup in lookups.items():
+            start = time.perf_counter()
+            results = lookup(query)
+            elapsed[name] += time.perf_counter() - start
+            hit = bool(results) and results[0].name.startswith(expected)
+            found[name] += hit
+            row.append('first' if hit else f'{len(results)} other' if results else 'none')
+        print(f'{query:<18} ' + ' '.join(f'{cell:>10}' for cell in row))
+    db.close()
+
+    print(f'{"found first":<18} ' + ' '.join(f'{found[name]:>10}' for name in lookups))
+    print(
+        f'{"us per lookup":<18} '
+        + ' '.join(f'{elapsed[name] / len(QUERIES) * 1e6:>10.0f}' for name in lookups)
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Prompt tokens returned by query_restaurant_database: retrieved chunks versus the full dump.
+
+Run from the server directory, after `python create_db_tables.py`:
+
+    python -m benchmarks.retrieval [--top-k 5]
+
+Tokens are counted with tiktoken (o200k_base) when it is installed, otherwise estimated as
+one token per four characters.
+"""
+
+import argparse
+import time
+
+from app.knowledge_base import get_knowledge_base
+
+QUERIES = [
+    'Jakie alergeny mają pierogi ruskie?',
+    'Godziny otwarcia w weekend',
+    'Czy macie parking?',
+    'Czy można płacić kartą lub BLIK?',
+    'Ile kosztuje żurek?',
+    'Jakie piwa macie?',
+    'Czy jest lunch dnia?',
+    'Desery bez glutenu',
+    'Czy mogę przyjść z psem?',
+    'Adres restauracji i telefon',
+]
+
+
+def token_counter():
+    try:
+        import tiktoken  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return 'chars/4', lambda text: (len(text) + 3) // 4
+    encoding = tiktoken.get_encoding('o200k_base')
+    return 'o200k_base', lambda text: len(encoding.encode(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--top-k', type=int, default=5, help='chunks returned per query')
+    args = parser.parse_args()
+
+    kb = get_knowledge_base()
+    tokenizer, count_tokens = token_counter()
+    full_tokens = count_tokens(kb.get_full_context_as_text())
+    kb.search('')  # Build the index outside of the timings
+
+    print(f'Tokenizer: {tokenizer}, full dump: {full_tokens} tokens')
+    print(f'{"query":<40} {"chunks":>6} {"tokens":>7} {"saved":>7} {"search ms":>10}')
+    total = 0
+    for query in QUERIES:
+        start = time.perf_counter()
+        chunks = kb.search(query, args.top_k)
+        elapsed = time.perf_counter() - start
+        tokens = count_tokens('\n'.join(chunk.text for chunk in chunks))
+        total += tokens
+        saved = 1 - tokens / full_tokens
+        print(f'{query:<40} {len(chunks):>6} {tokens:>7} {saved:>7.0%} {elapsed * 1000:>10.3f}')
+    average = total / len(QUERIES)
+    print(f'Average: {average:.0f} tokens per call, {1 - average / full_tokens:.0%} fewer')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Serialization cost per streamed token of the websocket history messages.
+
+Run from the server directory:
+
+    python -m benchmarks.serialization [--tokens 200] [--lengths 10 50 200 1000]
+
+For each conversation length the benchmark streams a response token by token and reports the
+average time spent encoding the message(s) of one token with the plain standard library
+(`json.dumps` of the whole message, the previous behaviour), with the selected backend and with
+a `MessageEncoder` on top of it. Set `JSON_BACKEND` to compare the backends.
+"""
+
+import argparse
+import json
+import time
+
+from app.serialization import BACKEND, MessageEncoder, dumps
+
+AGENT_NAME = 'Poligon Smaków Assistant'
+
+
+def build_history(length: int) -> list[dict]:
+    history: list[dict] = []
+    for i in range(length):
+        if i % 4 == 0:
+            history.append({'type': 'message', 'role': 'user', 'content': f'Pytanie {i} o menu?'})
+        elif i % 4 == 1:
+            history.append(
+                {
+                    'type': 'function_call',
+                    'call_id': f'call_{i}',
+                    'name': 'query_restaurant_database',
+                    'arguments': '{"query": "pierogi ruskie"}',
+                }
+            )
+        elif i % 4 == 2:
+            history.append(
+                {
+                    'type': 'function_call_output',
+                    'call_id': f'call_{i - 1}',
+                    'output': 'Pierogi ruskie - ziemniaki, twaróg, cebula. Cena: 28 zł. ' * 3,
+                }
+            )
+        else:
+            history.append(
+                {
+                    'role': 'assistant',
+                    'content': 'Polecam pierogi ruskie, są bardzo popularne w naszej restauracji.',
+                }
+            )
+    return history
+
+
+def legacy_messages(history: list[dict], tokens: int):
+    """The ``history.updated`` messages of a response streamed over `tokens` tokens."""
+    response = ''
+    for i in range(tokens):
+        response += f'słowo{i} '
+        partial = {'type': 'message', 'role': 'assistant', 'content': response}
+        yield {
+            'type': 'history.updated',
+            'reason': 'response.text.delta',
+            'inputs': history + [partial],
+            'agent_name': AGENT_NAME,
+        }
+
+
+def delta_messages(history: list[dict], tokens: int):
+    """The delta protocol messages of a response streamed over `tokens` tokens."""
+    index = len(history)
+    for i in range(tokens):
+        yield {'type': 'history.item.delta', 'index': index, 'delta': f'słowo{i} ', 'seq': i + 1}
+
+
+def time_per_message(messages: list[dict], encode) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        encode(message)
+    return (time.perf_counter() - start) / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--tokens', type=int, default=200, help='tokens per response')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 50, 200, 1000])
+    args = parser.parse_args()
+
+    print(f'Backend: {BACKEND}, {args.tokens} tokens per response, microseconds per token')
+    print(
+        f'{"protocol":<8} {"history":>8} {"stdlib":>10} {BACKEND:>10} {"encoder":>10} {"bytes":>9}'
+    )
+    for length in args.lengths:
+        history = build_history(length)
+        for protocol, messages in (
+            ('legacy', list(legacy_messages(history, args.tokens))),
+            ('delta', list(delta_messages(history, args.tokens))),
+        ):
+            encoder = MessageEncoder()
+            stdlib = time_per_message(messages, json.dumps)
+            backend = time_per_message(messages, dumps)
+            cached = time_per_message(messages, encoder.encode)
+            size = len(json.dumps(messages[-1]).encode('utf-8'))
+            print(
+                f'{protocol:<8} {length:>8} {stdlib * 1e6:>10.1f} {backend * 1e6:>10.1f} '
+                f'{cached * 1e6:>10.1f} {size:>9}'
+            )
+
+
+if __name__ == '__main__':
+    main()
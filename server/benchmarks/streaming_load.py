@@ -0,0 +1,146 @@
+"""
+Peak memory of loading a large catalog, whole file against streamed in batches.
+
+Run from the server directory:
+
+    python -m benchmarks.streaming_load [--items 100000] [--batch-size 1000]
+
+The benchmark writes a synthetic catalog as a JSON data file and as NDJSON, then loads it into
+empty temporary SQLite databases with `load_data`, which reads the whole file first, and with
+`stream_load` from both files. The peak memory is the one traced by tracemalloc, so the memory
+of SQLite itself is not counted. The catalog has drinks priced with numbers and with strings, and
+the tables loaded from the streams are checked to be identical to the ones of the whole file.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.data_loader import load_data
+from app.data_stream import read_json_stream, read_ndjson, stream_load
+from app.database import Base
+from benchmarks.data_loading import synthetic_data
+
+
+def add_drinks(data: dict, drinks: int):
+    sub_categories = [{'sub_category_name': f'Podkategoria {i}', 'items': []} for i in range(4)]
+    for i in range(drinks):
+        price_info = 8.5 + i % 10 if i % 2 else f'od {8 + i % 10} PLN'
+        sub_categories[i % 4]['items'].append({'name': f'Napój {i}', 'price_info': price_info})
+    data['menu'].append({'category_name': 'Napoje', 'sub_categories': sub_categories})
+
+
+def write_ndjson(data: dict, path: Path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'section': 'restaurant_info', **data['restaurant_info']}) + '\n')
+        for category in data['menu']:
+            name = category['category_name']
+            f.write(json.dumps({'section': 'menu_category', 'category_name': name}) + '\n')
+            for item in category.get('items', []):
+                record = {'section': 'menu_item', 'category_name': name, **item}
+                f.write(json.dumps(record) + '\n')
+            for sub_category in category.get('sub_categories', []):
+                for item in sub_category['items']:
+                    record = {
+                        'section': 'menu_item',
+                        'category_name': name,
+                        'sub_category_name': sub_category['sub_category_name'],
+                        **item,
+                    }
+                    f.write(json.dumps(record) + '\n')
+        for offer in data['special_offers']:
+            f.write(json.dumps({'section': 'special_offer', **offer}) + '\n')
+        for entry in data['faq']:
+            f.write(json.dumps({'section': 'faq', **entry}) + '\n')
+
+
+def load_whole(db: Session, path: Path, _batch_size: int):
+    with open(path, encoding='utf-8') as f:
+        load_data(db, json.load(f))
+
+
+def stream_json(db: Session, path: Path, batch_size: int):
+    stream_load(db, read_json_stream(path), batch_size)
+    db.commit()
+
+
+def stream_ndjson(db: Session, path: Path, batch_size: int):
+    stream_load(db, read_ndjson(path), batch_size)
+    db.commit()
+
+
+def dump_tables(db: Session) -> dict[str, list[tuple]]:
+    return {
+        table.name: [tuple(row) for row in db.execute(select(table).order_by(*table.primary_key))]
+        for table in Base.metadata.sorted_tables
+    }
+
+
+def measure(
+    load: Callable[[Session, Path, int], None], path: Path, batch_size: int
+) -> tuple[float, float, dict[str, list[tuple]]]:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{Path(directory) / "menu.db"}')
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            load(db, path, batch_size)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            tables = dump_tables(db)
+        engine.dispose()
+    return seconds, peak / 2**20, tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--items', type=int, default=100_000, help='menu items')
+    parser.add_argument('--categories', type=int, default=200, help='menu categories')
+    parser.add_argument('--allergens', type=int, default=14, help='distinct allergens')
+    parser.add_argument('--drinks', type=int, default=1000, help='drinks in sub-categories')
+    parser.add_argument('--batch-size', type=int, default=1000, help='entries per batch')
+    args = parser.parse_args()
+
+    data = synthetic_data(args.items, args.categories, args.allergens)
+    add_drinks(data, args.drinks)
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path, ndjson_path = Path(directory) / 'data.json', Path(directory) / 'data.ndjson'
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        write_ndjson(data, ndjson_path)
+        del data
+
+        loaders = [
+            ('whole file', load_whole, json_path),
+            ('ndjson', stream_ndjson, ndjson_path),
+            ('json stream', stream_json, json_path),
+        ]
+        size = json_path.stat().st_size / 2**20
+        print(f'{args.items} items, {size:.1f} MiB of JSON, batches of {args.batch_size}')
+        print(f'{"loader":<12} {"seconds":>8} {"peak MiB":>9}')
+        expected = None
+        for name, load, path in loaders:
+            seconds, peak, tables = measure(load, path, args.batch_size)
+            print(f'{name:<12} {seconds:>8.2f} {peak:>9.1f}')
+            if expected is None:
+                expected = tables
+                continue
+            for table, rows in tables.items():
+                if rows != expected[table]:
+                    raise SystemExit(f'{name} loaded a different {table} table than the whole file')
+
+
+if __name__ == '__main__':
+    main()
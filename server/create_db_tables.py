@@ -1,18 +1,33 @@
 """Create database tables and load initial data."""
 
+import argparse
+
 from app.data_loader import load_data_from_json
+from app.data_stream import DEFAULT_BATCH_SIZE, load_data_stream
+from app.data_sync import sync_data_file
 from app.database import Base, engine
+from app.migrations import upgrade_schema
 from app.settings import DATA_FILE_PATH
 from app.utils import log_info
 
 
-def create_and_populate_tables():
+def create_and_populate_tables(bulk: bool = True):
     log_info('Creating database tables...')
     Base.metadata.create_all(bind=engine)
     log_info('Database tables created.')
 
     log_info('\nLoading initial data from JSON...')
-    load_data_from_json(str(DATA_FILE_PATH))
+    load_data_from_json(str(DATA_FILE_PATH), bulk=bulk)
+    log_info('Initial data loaded.')
+
+
+def create_and_stream_tables(data_file: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    log_info('Creating database tables...')
+    Base.metadata.create_all(bind=engine)
+    log_info('Database tables created.')
+
+    log_info(f'\nStreaming initial data from {data_file}...')
+    load_data_stream(data_file, batch_size=batch_size)
     log_info('Initial data loaded.')
 
 
@@ -22,9 +37,56 @@ def drop_db():
     log_info('Database tables dropped.')
 
 
+def sync_tables(dry_run: bool = False):
+    log_info('Syncing database tables with the JSON data...')
+    # Only creates the tables that do not exist yet, the new columns of the others are added
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    sync_data_file(str(DATA_FILE_PATH), dry_run=dry_run)
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--row-by-row',
+        action='store_true',
+        help='load each entry through the CRUD operations instead of in one bulk transaction',
+    )
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='apply only the differences with the JSON data, keeping the orders and bookings',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='with --sync, report the changes without applying them',
+    )
+    parser.add_argument(
+        '--stream',
+        metavar='DATA_FILE',
+        nargs='?',
+        const=str(DATA_FILE_PATH),
+        help='stream a large data file (JSON, with ijson, or NDJSON) in batches, '
+        'defaults to the JSON data',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help='with --stream, entries inserted per batch',
+    )
+    args = parser.parse_args()
+
+    if args.sync:
+        sync_tables(dry_run=args.dry_run)
+        return
+
     drop_db()
-    create_and_populate_tables()
+    if args.stream:
+        create_and_stream_tables(args.stream, batch_size=args.batch_size)
+    else:
+        create_and_populate_tables(bulk=not args.row_by_row)
 
 
 if __name__ == '__main__':
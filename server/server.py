@@ -1,36 +1,63 @@
-import time
-from collections.abc import AsyncIterator
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 from logging import getLogger
 
-from agents import Runner, trace
+import numpy as np
+from agents import AgentUpdatedStreamEvent, Runner, RunResultStreaming, trace
 from agents.voice import (
-    TTSModelSettings,
-    VoicePipeline,
-    VoicePipelineConfig,
+    AudioInput,
+    StreamedAudioInput,
+    StreamedAudioResult,
+    VoiceStreamEventLifecycle,
     VoiceWorkflowBase,
 )
-from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app import routers as api_routers
 from app.agent_config import starting_agent
+from app.audio import (
+    SPEECH_STARTED,
+    VAD_OPTIONS,
+    AudioBuffer,
+    VoiceActivityDetector,
+)
+from app.metrics import render_prometheus
+from app.migrations import upgrade_schema
+from app.settings import STREAMED_COMMIT_SILENCE_MS
+from app.telemetry import FIRST_LLM_TOKEN, RESPONSE_DONE, TurnTimer, current_timer
 from app.utils import (
+    STREAMED_AUDIO_INPUT,
     WebsocketHelper,
-    concat_audio_chunks,
     extract_audio_chunk,
+    extract_binary_audio_chunk,
+    extract_user_input,
     is_audio_complete,
+    is_history_reset,
     is_new_audio_chunk,
     is_new_text_message,
+    is_response_cancel,
+    is_resync_request,
+    is_session_update,
     is_sync_message,
     is_text_output,
+    log_error,
     process_inputs,
+    receive_message,
 )
+from app.voice import create_voice_pipeline
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # The columns added since the database was created, before the first order is read
+    await asyncio.to_thread(upgrade_schema)
+    yield
 
-# When .env file is present, it will override the environment variables
-load_dotenv(dotenv_path='../.env', override=True)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 logger = getLogger(__name__)
 
@@ -47,11 +74,26 @@ app.add_middleware(
 
 
 class Workflow(VoiceWorkflowBase):
-    def __init__(self, connection: WebsocketHelper):
+    def __init__(self, connection: WebsocketHelper, timer: TurnTimer | None = None):
         self.connection = connection
+        self.timer = timer
+        # The generator of the last run and the agent run it streams, until it completes
+        self._generator: AsyncGenerator[str, None] | None = None
+        self._output: RunResultStreaming | None = None
 
-    async def run(self, transcription: str) -> AsyncIterator[str]:
-        # pylint: disable=invalid-overridden-method
+    @property
+    def is_running(self) -> bool:
+        return self._output is not None
+
+    def run(self, transcription: str) -> AsyncIterator[str]:
+        self._generator = self._run(transcription)
+        return self._generator
+
+    async def _run(self, transcription: str) -> AsyncGenerator[str, None]:
+        if self.timer:
+            self.timer.transcript_done(self.connection.latest_agent.name)
+            # The tool calls of the run report to the timer of this turn
+            current_timer.set(self.timer)
         conversation_history, latest_agent = await self.connection.show_user_input(transcription)
 
         output = Runner.run_streamed(
@@ -59,13 +101,93 @@ class Workflow(VoiceWorkflowBase):
             conversation_history,
         )
 
-        async for event in output.stream_events():
-            await self.connection.handle_new_item(event)
+        self._output = output
+        try:
+            async for event in output.stream_events():
+                await self.connection.handle_new_item(event)
 
-            if is_text_output(event):
-                yield event.data.delta  # type: ignore
+                if self.timer and isinstance(event, AgentUpdatedStreamEvent):
+                    self.timer.agent_changed(event.new_agent.name)
+                if is_text_output(event):
+                    if self.timer:
+                        self.timer.mark(FIRST_LLM_TOKEN)
+                    yield event.data.delta  # type: ignore
+        except (asyncio.CancelledError, GeneratorExit):
+            # Only stop the agent run, `commit_interrupted` keeps what it produced
+            output.cancel()
+            raise
+        except Exception:
+            # A failed run has nothing to commit
+            if self._output is output:
+                self._output = None
+            raise
 
+        if self.timer:
+            self.timer.mark(RESPONSE_DONE)
         await self.connection.text_output_complete(output, is_done=True)
+        if self._output is output:
+            self._output = None
+
+    async def commit_interrupted(self):
+        """Close the interrupted run and keep what it produced as the conversation history.
+
+        Called by the barge-in path once the task consuming the run is cancelled. The generator
+        is closed here rather than left to be finalized later, and nothing is committed from it,
+        so a late finalization cannot overwrite the history of the next turn.
+        """
+        generator, self._generator = self._generator, None
+        if generator is not None:
+            await generator.aclose()
+        output, self._output = self._output, None
+        if output is not None:
+            output.cancel()
+            await self.connection.commit_partial_response(output)
+
+
+def append_audio(audio_buffer: AudioBuffer, samples):
+    was_full = audio_buffer.is_full
+    if audio_buffer.append(samples) < len(samples) and not was_full:
+        logger.warning('Utterance longer than %ss, dropping audio', audio_buffer.max_seconds)
+
+
+def create_vad(turn_detection: dict | None) -> VoiceActivityDetector | None:
+    if turn_detection is None:
+        return None
+    options = {key: turn_detection[key] for key in VAD_OPTIONS if key in turn_detection}
+    return VoiceActivityDetector(**options)
+
+
+async def send_audio_output(
+    connection: WebsocketHelper, output: StreamedAudioResult, timer: TurnTimer | None = None
+):
+    try:
+        async for event in output.stream():
+            if isinstance(event, VoiceStreamEventLifecycle):
+                if event.event == 'turn_started':
+                    connection.start_audio_stream()
+                elif event.event == 'turn_ended':
+                    connection.end_audio_stream()
+                    if timer:
+                        # The turn ends when its last audio chunk leaves the outbound queue
+                        connection.writer.after_audio(timer.audio_sent)
+            await connection.send_audio_chunk(event)
+    finally:
+        connection.end_audio_stream()
+        # Stop the agent run and the TTS when the response is interrupted
+        task = output.text_generation_task
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type='text/plain; version=0.0.4')
+
+
+def log_response_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        log_error('Error while generating a response: %s', task.exception())
 
 
 @app.websocket('/ws')
@@ -73,54 +195,228 @@ async def websocket_endpoint(websocket: WebSocket):
     with trace('Voice Agent Chat'):
         await websocket.accept()
         connection = WebsocketHelper(websocket, [], starting_agent)
-        audio_buffer = []
-
-        workflow = Workflow(connection)
-        while True:
-            try:
-                message = await websocket.receive_json()
-            except WebSocketDisconnect:
-                print('Client disconnected')
+        connection.writer.start()
+        audio_buffer = AudioBuffer()
+        vad = create_vad(connection.turn_detection)
+        timer = TurnTimer(connection.input_audio_mode)
+        workflow = Workflow(connection, timer)
+        pipeline = create_voice_pipeline(workflow, transform_data=timer)
+
+        # Only used when the input audio is streamed to the transcription model
+        streamed_input: StreamedAudioInput | None = None
+        streamed_task: asyncio.Task | None = None
+        # Without turn detection, the audio since the last commit is one utterance
+        streamed_utterance = False
+
+        # The response being generated, it runs concurrently with the receive loop
+        response_task: asyncio.Task | None = None
+
+        async def run_pipeline(audio_input: AudioInput | StreamedAudioInput):
+            output = await pipeline.run(audio_input)
+            await send_audio_output(connection, output, timer)
+
+        async def respond_to_text(user_input: str):
+            async for new_output_tokens in workflow.run(user_input):
+                await connection.stream_response(new_output_tokens, is_text=True)
+            timer.finish()
+
+        async def close_streamed_session():
+            nonlocal streamed_input, streamed_task
+            if streamed_input is not None:
+                await streamed_input.add_audio(None)
+            if streamed_task is not None:
+                streamed_task.cancel()
+                await asyncio.gather(streamed_task, return_exceptions=True)
+            streamed_input = streamed_task = None
+
+        async def cancel_response() -> bool:
+            """Interrupt the response in progress, if any (barge-in). Returns whether one was."""
+            nonlocal response_task
+            interrupted = False
+            if response_task is not None and not response_task.done():
+                response_task.cancel()
+                await asyncio.gather(response_task, return_exceptions=True)
+                interrupted = True
+            response_task = None
+
+            # A streamed session answers inside its own task, restart it on the next chunk
+            if streamed_task is not None and (workflow.is_running or connection.speaking):
+                await close_streamed_session()
+                interrupted = True
+
+            if interrupted:
+                await workflow.commit_interrupted()
+                # Audio of the interrupted response still waiting to be sent is stale
+                connection.writer.drop_audio()
+                await connection.send_event('response.cancelled')
+            return interrupted
+
+        async def start_response(coro):
+            nonlocal response_task
+            await cancel_response()
+            response_task = asyncio.create_task(coro)
+            response_task.add_done_callback(log_response_error)
+
+        async def respond_to_audio(audio_input: AudioInput):
+            await connection.send_event('input_audio_buffer.committed')
+            await start_response(run_pipeline(audio_input))
+
+        async def commit_audio():
+            timer.input_done()
+            if vad is None:
+                audio_input = audio_buffer.to_audio_input()
+            elif vad.has_speech:
+                # Trim the leading silence before the detected speech
+                audio_input = audio_buffer.to_audio_input(vad.speech_start)
+                vad.reset()
+            else:
+                audio_buffer.clear()
+                vad.reset()
                 return
+            await respond_to_audio(audio_input)
+
+        async def commit_speech(start: int, end: int):
+            """Answer a segment that ended, the audio after it may hold the next one."""
+            timer.input_done()
+            await respond_to_audio(audio_buffer.split_audio_input(start, end))
+
+        async def add_streamed_audio(samples):
+            """Push a chunk to the transcription session, which detects the turns itself.
+
+            A new utterance interrupts the response in progress. That restarts the session, the
+            utterance is pushed to the new one from its start.
+            """
+            nonlocal streamed_input, streamed_task, streamed_utterance
+            if vad is None:
+                if not streamed_utterance:
+                    streamed_utterance = True
+                    await cancel_response()
+            else:
+                append_audio(audio_buffer, samples)
+                for event in vad.process(samples):
+                    if event.type == SPEECH_STARTED:
+                        had_session = streamed_input is not None
+                        await cancel_response()
+                        if had_session and streamed_input is None:
+                            # The samples before this chunk went to the closed session
+                            start = max(event.start - audio_buffer.offset, 0)
+                            samples = audio_buffer.view()[start:].copy()
+                audio_buffer.discard_before(vad.position - vad.history_samples)
+
+            if streamed_input is None:
+                streamed_input = StreamedAudioInput()
+                streamed_task = asyncio.create_task(run_pipeline(streamed_input))
+                streamed_task.add_done_callback(log_response_error)
+            timer.input_done()
+            await streamed_input.add_audio(samples)
+
+        async def add_audio(samples):
+            if connection.input_audio_mode == STREAMED_AUDIO_INPUT:
+                await add_streamed_audio(samples)
+                return
+
+            if vad is None:
+                if not audio_buffer:
+                    # The caller started a new utterance
+                    await cancel_response()
+                append_audio(audio_buffer, samples)
+                return
+
+            append_audio(audio_buffer, samples)
+            for event in vad.process(samples):
+                if event.type == SPEECH_STARTED:
+                    await cancel_response()
+                    await connection.send_event(
+                        'input_audio_buffer.speech_started',
+                        audio_start_ms=event.start * 1000 // audio_buffer.sample_rate,
+                    )
+                else:
+                    await connection.send_event('input_audio_buffer.speech_stopped')
+                    await commit_speech(event.start, event.end)  # type: ignore
+            if not vad.has_speech:
+                # Only the audio a segment starting later could cover has to be kept
+                audio_buffer.discard_before(vad.position - vad.history_samples)
+            elif audio_buffer.is_full:
+                await connection.send_event('input_audio_buffer.speech_stopped')
+                await commit_audio()
+
+        try:
+            while True:
+                try:
+                    message = await receive_message(websocket)
+                except WebSocketDisconnect:
+                    print('Client disconnected')
+                    return
+
+                # Handle a new audio chunk sent as a binary frame
+                if isinstance(message, bytes):
+                    try:
+                        samples = extract_binary_audio_chunk(message)
+                    except ValueError as e:
+                        logger.warning('Dropping invalid audio frame: %s', e)
+                        continue
+                    await add_audio(samples)
+
+                # Handle protocol negotiation and history resync requests
+                elif is_session_update(message):
+                    await connection.update_session(message)
+                    if 'turn_detection' in message:
+                        audio_buffer.clear()
+                        vad = create_vad(connection.turn_detection)
+                    if connection.input_audio_mode != STREAMED_AUDIO_INPUT:
+                        await close_streamed_session()
+                    timer.mode = connection.input_audio_mode
+                elif is_resync_request(message):
+                    await connection.send_snapshot()
+                elif is_response_cancel(message):
+                    await cancel_response()
+
+                # Handle text based messages
+                elif is_sync_message(message):
+                    # Checked before the cancel, which sends the client the interrupted response
+                    in_sync = not connection.delta_protocol or connection.is_in_sync(message)
+                    interrupted = await cancel_response()
+                    if not in_sync and not is_history_reset(message):
+                        # The server's history wins over the one of a stale client
+                        await connection.send_snapshot(reason='version.mismatch')
+                        continue
+                    connection.history = message['inputs']
+                    if message.get('reset_agent', False):
+                        connection.latest_agent = starting_agent
+                    if connection.delta_protocol and (interrupted or not in_sync):
+                        # Replaces the deltas sent since the client's history
+                        await connection.send_snapshot(reason='history.update')
+                elif is_new_text_message(message):
+                    in_sync = not connection.delta_protocol or connection.is_in_sync(message)
+                    interrupted = await cancel_response()
+                    if not in_sync:
+                        # Only the new user input of a stale client is kept
+                        user_input = extract_user_input(message)
+                        await connection.send_snapshot(reason='version.mismatch')
+                    else:
+                        user_input = process_inputs(message, connection)
+                        if connection.delta_protocol and interrupted:
+                            await connection.send_snapshot(reason='history.update')
+                    await start_response(respond_to_text(user_input))
+
+                # Handle a new audio chunk
+                elif is_new_audio_chunk(message):
+                    await add_audio(extract_audio_chunk(message))
 
-            # Handle text based messages
-            if is_sync_message(message):
-                connection.history = message['inputs']
-                if message.get('reset_agent', False):
-                    connection.latest_agent = starting_agent
-            elif is_new_text_message(message):
-                user_input = process_inputs(message, connection)
-                async for new_output_tokens in workflow.run(user_input):
-                    await connection.stream_response(new_output_tokens, is_text=True)
-
-            # Handle a new audio chunk
-            elif is_new_audio_chunk(message):
-                audio_buffer.append(extract_audio_chunk(message))
-
-            # Send full audio to the agent
-            elif is_audio_complete(message):
-                start_time = time.perf_counter()
-
-                def transform_data(data):
-                    nonlocal start_time
-                    if start_time:
-                        print(f'Time taken to first byte: {time.perf_counter() - start_time}s')
-                        start_time = None
-                    return data
-
-                audio_input = concat_audio_chunks(audio_buffer)
-                output = await VoicePipeline(
-                    workflow=workflow,
-                    config=VoicePipelineConfig(
-                        tts_settings=TTSModelSettings(
-                            buffer_size=512, transform_data=transform_data
-                        )
-                    ),
-                ).run(audio_input)
-                async for event in output.stream():
-                    await connection.send_audio_chunk(event)
-
-                audio_buffer = []  # reset the audio buffer
+                # Send full audio to the agent
+                elif is_audio_complete(message):
+                    streamed_utterance = False
+                    if streamed_input is not None:
+                        # Trailing silence lets the transcription session close the turn
+                        silence = audio_buffer.sample_rate * STREAMED_COMMIT_SILENCE_MS // 1000
+                        await streamed_input.add_audio(np.zeros(silence, dtype=np.int16))
+                    elif audio_buffer:
+                        await commit_audio()
+        finally:
+            await cancel_response()
+            await close_streamed_session()
+            await connection.writer.close()
+            timer.finish(interrupted=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,118 @@
+"""Barge-in of the streamed audio input: a new utterance interrupts the spoken response."""
+
+import asyncio
+import base64
+
+import numpy as np
+import pytest
+from agents.voice import VoiceStreamEventAudio, VoiceStreamEventLifecycle
+from fastapi.testclient import TestClient
+
+import server
+
+CHUNK_SAMPLES = 2400
+
+
+class SpeakingResult:
+    """Audio result of a session that keeps speaking until its task is cancelled."""
+
+    text_generation_task = None
+
+    async def stream(self):
+        yield VoiceStreamEventLifecycle(event='turn_started')
+        while True:
+            yield VoiceStreamEventAudio(data=np.zeros(240, dtype=np.int16))
+            await asyncio.sleep(0.01)
+
+
+class FakePipeline:
+    def __init__(self):
+        self.inputs = []
+
+    async def run(self, audio_input):
+        self.inputs.append(audio_input)
+        return SpeakingResult()
+
+
+def pushed_audio(audio_input) -> list:
+    chunks = []
+    while not audio_input.queue.empty():
+        chunks.append(audio_input.queue.get_nowait())
+    return chunks
+
+
+def append_message(samples: np.ndarray) -> dict:
+    delta = base64.b64encode(samples.astype('<i2').tobytes()).decode()
+    return {'type': 'input_audio_buffer.append', 'delta': delta}
+
+
+def receive_until_resync(ws) -> list[str]:
+    """Types of the messages sent before the reply to a resync request."""
+    ws.send_json({'type': 'history.resync'})
+    types = []
+    while (message := ws.receive_json())['type'] != 'history.snapshot':
+        types.append(message['type'])
+    return types
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = FakePipeline()
+    monkeypatch.setattr(server, 'create_voice_pipeline', lambda *args, **kwargs: fake)
+    return fake
+
+
+def test_new_utterance_interrupts_the_response(pipeline):
+    silence = np.zeros(CHUNK_SAMPLES, dtype=np.int16)
+    client = TestClient(server.app)
+    with client.websocket_connect('/ws') as ws:
+        ws.send_json(
+            {'type': 'session.update', 'input_audio_mode': 'streamed', 'turn_detection': None}
+        )
+        assert ws.receive_json()['type'] == 'session.updated'
+
+        ws.send_json(append_message(silence))
+        ws.send_json({'type': 'input_audio_buffer.commit'})
+        # The response of the first utterance is spoken
+        while ws.receive_json()['type'] != 'response.audio.delta':
+            pass
+
+        ws.send_json(append_message(silence))
+        assert 'response.cancelled' in receive_until_resync(ws)
+
+    first, second = pipeline.inputs
+    assert pushed_audio(first)[-1] is None
+    # The new utterance, then the end of the stream when the connection closed
+    assert [chunk is None for chunk in pushed_audio(second)] == [False, True]
+
+
+def test_speech_start_restarts_the_session_from_the_speech(pipeline):
+    silence = np.zeros(CHUNK_SAMPLES, dtype=np.int16)
+    speech = np.full(CHUNK_SAMPLES, 8000, dtype=np.int16)
+    client = TestClient(server.app)
+    with client.websocket_connect('/ws') as ws:
+        ws.send_json(
+            {
+                'type': 'session.update',
+                'input_audio_mode': 'streamed',
+                'turn_detection': {'type': 'server_vad', 'min_speech_ms': 200},
+            }
+        )
+        assert ws.receive_json()['type'] == 'session.updated'
+
+        ws.send_json(append_message(silence))
+        while ws.receive_json()['type'] != 'response.audio.delta':
+            pass
+
+        # 100 ms of speech, too short to start a segment, then the rest of it
+        ws.send_json(append_message(speech))
+        assert 'response.cancelled' not in receive_until_resync(ws)
+        ws.send_json(append_message(speech))
+        assert 'response.cancelled' in receive_until_resync(ws)
+
+    first, second = pipeline.inputs
+    assert pushed_audio(first)[-1] is None
+    # The new session gets the whole speech, with the padding before it
+    restarted, _ = pushed_audio(second)
+    assert np.count_nonzero(restarted) == 2 * CHUNK_SAMPLES
+    assert len(restarted) > 2 * CHUNK_SAMPLES